@@ -0,0 +1,316 @@
+"""
+Two-tier answer cache for RAGSystem.query
+Tier one matches the normalized query text exactly, tier two reuses an answer
+whose query embedding is within a cosine distance of a previous query
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+
+
+class ExactAnswerCache:
+    """LRU/TTL cache keyed on (normalized query, language)"""
+
+    def __init__(self, max_entries: int = 2048, ttl_seconds: float = 86400):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Dict]]" = OrderedDict()
+
+    def get(self, query: str, language: str) -> Optional[Dict]:
+        key = (query, language)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, query: str, language: str, value: Dict):
+        key = (query, language)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SemanticAnswerCache:
+    """Near-duplicate cache over unit-normalized query embeddings held in one matrix"""
+
+    def __init__(self, max_entries: int = 2048, ttl_seconds: float = 86400, max_distance: float = 0.05):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_distance = max_distance
+        self._matrix: Optional[np.ndarray] = None  # (max_entries, dim) float32
+        self._valid = np.zeros(max_entries, dtype=bool)
+        self._entries: "OrderedDict[int, Tuple[float, str, Dict]]" = OrderedDict()  # slot -> (expires, language, value)
+        self._free: List[int] = list(range(max_entries - 1, -1, -1))
+
+    @staticmethod
+    def _unit(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _release(self, slot: int):
+        self._entries.pop(slot, None)
+        self._valid[slot] = False
+        self._free.append(slot)
+
+    def get(self, embedding: List[float], language: str) -> Optional[Tuple[Dict, float]]:
+        """Return (value, cosine distance) of the closest live entry within max_distance"""
+        if not self._entries or self._matrix is None:
+            return None
+
+        vector = self._unit(embedding)
+        if vector.shape[0] != self._matrix.shape[1]:
+            return None
+
+        similarities = self._matrix @ vector
+        similarities[~self._valid] = -np.inf
+        now = time.monotonic()
+
+        # Walk candidates from most to least similar until one is usable
+        for slot in np.argsort(similarities)[::-1][:8]:
+            slot = int(slot)
+            distance = 1.0 - float(similarities[slot])
+            if not self._valid[slot] or distance > self.max_distance:
+                return None
+            expires, entry_language, value = self._entries[slot]
+            if expires < now:
+                self._release(slot)
+                continue
+            if entry_language != language:
+                continue
+            self._entries.move_to_end(slot)
+            return value, distance
+
+        return None
+
+    def put(self, embedding: List[float], language: str, value: Dict):
+        vector = self._unit(embedding)
+        if self._matrix is None:
+            self._matrix = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+        elif vector.shape[0] != self._matrix.shape[1]:
+            return
+
+        if not self._free:
+            oldest_slot = next(iter(self._entries))
+            self._release(oldest_slot)
+
+        slot = self._free.pop()
+        self._matrix[slot] = vector
+        self._valid[slot] = True
+        self._entries[slot] = (time.monotonic() + self.ttl_seconds, language, value)
+
+    def clear(self):
+        self._entries.clear()
+        self._valid[:] = False
+        self._free = list(range(self.max_entries - 1, -1, -1))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class AnswerCache:
+    """Exact + semantic answer cache with hit/miss counters and store-version invalidation"""
+
+    def __init__(self, max_entries: int = 2048, ttl_seconds: float = 86400,
+                 semantic_enabled: bool = True, max_distance: float = 0.05):
+        self.exact = ExactAnswerCache(max_entries, ttl_seconds)
+        self.semantic = SemanticAnswerCache(max_entries, ttl_seconds, max_distance) if semantic_enabled else None
+        self._lock = threading.Lock()
+        self._store_fingerprint: Optional[str] = None
+        self.counters = {
+            "exact_hits": 0,
+            "semantic_hits": 0,
+            "misses": 0,
+            "invalidations": 0
+        }
+
+    @property
+    def semantic_enabled(self) -> bool:
+        return self.semantic is not None
+
+    def check_store(self, fingerprint: str):
+        """Drop every cached answer when the vector store fingerprint changes"""
+        with self._lock:
+            if self._store_fingerprint is not None and fingerprint != self._store_fingerprint:
+                self.exact.clear()
+                if self.semantic is not None:
+                    self.semantic.clear()
+                self.counters["invalidations"] += 1
+            self._store_fingerprint = fingerprint
+
+    def get_exact(self, query: str, language: str) -> Optional[Dict]:
+        with self._lock:
+            value = self.exact.get(query, language)
+            if value is not None:
+                self.counters["exact_hits"] += 1
+            return value
+
+    def get_semantic(self, embedding: List[float], language: str) -> Optional[Tuple[Dict, float]]:
+        with self._lock:
+            if self.semantic is None:
+                return None
+            hit = self.semantic.get(embedding, language)
+            if hit is not None:
+                self.counters["semantic_hits"] += 1
+            return hit
+
+    def record_miss(self):
+        with self._lock:
+            self.counters["misses"] += 1
+
+    def put(self, query: str, language: str, embedding: Optional[List[float]], value: Dict):
+        with self._lock:
+            self.exact.put(query, language, value)
+            if self.semantic is not None and embedding is not None:
+                self.semantic.put(embedding, language, value)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.counters["exact_hits"] + self.counters["semantic_hits"] + self.counters["misses"]
+            hits = self.counters["exact_hits"] + self.counters["semantic_hits"]
+            return {
+                **self.counters,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "exact_entries": len(self.exact),
+                "semantic_entries": len(self.semantic) if self.semantic is not None else 0
+            }
+
+
+class SQLiteAnswerCache(AnswerCache):
+    """AnswerCache shared by every worker process through one SQLite file
+
+    Exact lookups go to SQLite. The semantic tier stays an in-process matrix that
+    pulls rows added by other workers before each lookup. Rows are tagged with the
+    vector store fingerprint, so a rebuilt store simply stops matching them.
+    """
+
+    def __init__(self, db_path: str = "./answer_cache.sqlite3", max_entries: int = 2048,
+                 ttl_seconds: float = 86400, semantic_enabled: bool = True, max_distance: float = 0.05):
+        super().__init__(max_entries, ttl_seconds, semantic_enabled, max_distance)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._last_synced_row = 0
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " query TEXT NOT NULL,"
+            " language TEXT NOT NULL,"
+            " fingerprint TEXT NOT NULL,"
+            " embedding BLOB,"
+            " value TEXT NOT NULL,"
+            " expires REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS answers_lookup ON answers(query, language, fingerprint)")
+        self._conn.commit()
+
+    def check_store(self, fingerprint: str):
+        with self._lock:
+            if self._store_fingerprint is not None and fingerprint != self._store_fingerprint:
+                if self.semantic is not None:
+                    self.semantic.clear()
+                self._last_synced_row = 0
+                self.counters["invalidations"] += 1
+            self._store_fingerprint = fingerprint
+
+    def get_exact(self, query: str, language: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM answers WHERE query = ? AND language = ? AND fingerprint = ? AND expires >= ?"
+                " ORDER BY id DESC LIMIT 1",
+                (query, language, self._store_fingerprint or "", time.time())
+            ).fetchone()
+            if row is None:
+                return None
+            self.counters["exact_hits"] += 1
+            return json.loads(row[0])
+
+    def _sync_semantic(self):
+        """Load answers other workers stored since the last lookup into the local matrix"""
+        rows = self._conn.execute(
+            "SELECT id, language, embedding, value FROM answers"
+            " WHERE id > ? AND fingerprint = ? AND embedding IS NOT NULL AND expires >= ? ORDER BY id",
+            (self._last_synced_row, self._store_fingerprint or "", time.time())
+        ).fetchall()
+        for row_id, language, embedding, value in rows:
+            self.semantic.put(np.frombuffer(embedding, dtype=np.float32), language, json.loads(value))
+            self._last_synced_row = row_id
+
+    def get_semantic(self, embedding: List[float], language: str) -> Optional[Tuple[Dict, float]]:
+        with self._lock:
+            if self.semantic is None:
+                return None
+            self._sync_semantic()
+            hit = self.semantic.get(embedding, language)
+            if hit is not None:
+                self.counters["semantic_hits"] += 1
+            return hit
+
+    def put(self, query: str, language: str, embedding: Optional[List[float]], value: Dict):
+        with self._lock:
+            now = time.time()
+            blob = np.asarray(embedding, dtype=np.float32).tobytes() if embedding is not None else None
+            self._conn.execute(
+                "INSERT INTO answers (query, language, fingerprint, embedding, value, expires) VALUES (?, ?, ?, ?, ?, ?)",
+                (query, language, self._store_fingerprint or "", blob,
+                 json.dumps(value, ensure_ascii=False), now + self.ttl_seconds)
+            )
+            # Expire old rows and keep only the newest max_entries
+            self._conn.execute("DELETE FROM answers WHERE expires < ?", (now,))
+            self._conn.execute(
+                "DELETE FROM answers WHERE id <= (SELECT MAX(id) FROM answers) - ?", (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.counters["exact_hits"] + self.counters["semantic_hits"] + self.counters["misses"]
+            hits = self.counters["exact_hits"] + self.counters["semantic_hits"]
+            shared = self._conn.execute(
+                "SELECT COUNT(*) FROM answers WHERE fingerprint = ?", (self._store_fingerprint or "",)
+            ).fetchone()[0]
+            return {
+                **self.counters,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "backend": "sqlite",
+                "exact_entries": shared,
+                "semantic_entries": len(self.semantic) if self.semantic is not None else 0
+            }
+
+
+def create_answer_cache() -> Optional[AnswerCache]:
+    """Build the answer cache from environment configuration (None when disabled)"""
+    if os.getenv("ANSWER_CACHE_ENABLED", "true").lower() != "true":
+        return None
+
+    settings = dict(
+        max_entries=int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "2048")),
+        ttl_seconds=float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "86400")),
+        semantic_enabled=os.getenv("ANSWER_CACHE_SEMANTIC", "true").lower() == "true",
+        max_distance=float(os.getenv("ANSWER_CACHE_MAX_DISTANCE", "0.05"))
+    )
+    backend = os.getenv("ANSWER_CACHE_BACKEND", "memory").lower()
+    if backend == "sqlite":
+        return SQLiteAnswerCache(db_path=os.getenv("ANSWER_CACHE_SQLITE_PATH", "./answer_cache.sqlite3"), **settings)
+    if backend != "memory":
+        raise ValueError(f"Unknown ANSWER_CACHE_BACKEND: {backend} (expected 'memory' or 'sqlite')")
+    return AnswerCache(**settings)
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Peak memory of ingestion as the page count grows
+Builds PDFs holding 1, 2, 4, ... copies of the shipped PDF, ingests each into a
+fresh fake-embedded store and reads the peak RSS the run reports through
+INGEST_METRICS_PATH. Repeated pages collapse onto the same chunk ids, so the
+embedding work stays constant and the growth isolates extraction and chunking;
+a page-lazy pipeline keeps the peak flat
+"""
+
+import os
+import re
+import sys
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+import fitz
+
+from common import BACKEND_DIR, SHIPPED_PDF, write_report
+
+_PEAK_RSS = re.compile(r'^rag_ingest_peak_rss_bytes\{process="(?P<process>\w+)"\} (?P<value>\S+)$', re.MULTILINE)
+
+
+def build_pdf(path: str, copies: int) -> int:
+    """Write `copies` back-to-back copies of the shipped PDF, returning the page count"""
+    with fitz.open(SHIPPED_PDF) as source, fitz.open() as combined:
+        for _ in range(copies):
+            combined.insert_pdf(source)
+        combined.save(path)
+        return combined.page_count
+
+
+def ingest(pdf_path: str, persist_directory: str, metrics_path: str, sequential: bool, workers: int) -> dict:
+    """Run story_focused_processor.py on the fake embedder and return its peak RSS in MiB"""
+    command = [sys.executable, "story_focused_processor.py", pdf_path, "--persist-directory", persist_directory]
+    command += ["--sequential"] if sequential else ["--workers", str(workers)]
+    env = {**os.environ, "EMBEDDING_PROVIDER": "fake", "INGEST_METRICS_PATH": metrics_path}
+    subprocess.run(command, cwd=BACKEND_DIR, env=env, check=True, stdout=subprocess.DEVNULL)
+    with open(metrics_path, encoding="utf-8") as handle:
+        peaks = {match.group("process"): float(match.group("value")) for match in _PEAK_RSS.finditer(handle.read())}
+    return {f"peak_rss_{process}_mib": round(value / 2**20, 1) for process, value in sorted(peaks.items())}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure ingestion peak RSS against the number of pages")
+    parser.add_argument("--copies", default="1,2,4,8", help="Comma-separated copies of the shipped PDF")
+    parser.add_argument("--sequential", action="store_true", help="Ingest with --sequential instead of the worker pool")
+    parser.add_argument("--workers", type=int, default=2, help="Extraction processes when not sequential")
+    parser.add_argument("--output", default=None, help="Write the report as JSON to this file")
+    args = parser.parse_args()
+
+    state_directory = tempfile.mkdtemp(prefix="bench-ingest-memory-")
+    results = []
+    try:
+        for copies in [int(value) for value in args.copies.split(",")]:
+            pdf_path = os.path.join(state_directory, f"corpus-{copies}.pdf")
+            pages = build_pdf(pdf_path, copies)
+            result = {
+                "copies": copies,
+                "pages": pages,
+                **ingest(pdf_path, os.path.join(state_directory, f"store-{copies}"),
+                         os.path.join(state_directory, f"metrics-{copies}.prom"), args.sequential, args.workers)
+            }
+            results.append(result)
+            print(f"🧮 {pages} pages: {result.get('peak_rss_main_mib')} MiB main, "
+                  f"{result.get('peak_rss_workers_mib')} MiB largest worker")
+    finally:
+        shutil.rmtree(state_directory, ignore_errors=True)
+
+    baseline = results[0]["peak_rss_main_mib"] if results else 0
+    for result in results:
+        result["main_growth"] = round(result["peak_rss_main_mib"] / max(baseline, 1e-9), 2)
+    write_report("ingest_memory", {"sequential": args.sequential, "runs": results}, args.output)
+
+
+if __name__ == "__main__":
+    main()
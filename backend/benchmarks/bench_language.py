@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Accuracy and throughput of query language detection, and what routing changes
+Compares language_routing.detect_language with the per-call character-set scan it
+replaced, times query preparation per language against the old normalize-then-detect
+path, and checks how often English and Banglish questions reach the same keyword
+hits as their Bengali originals once routed
+"""
+
+import argparse
+
+from common import SHIPPED_STORE, QUERIES, load_stored_chunks, summarize, time_each, write_report
+
+from langchain.schema import Document
+
+from bengali_normalizer import normalize_bengali_text
+from hybrid_retrieval import BM25Index
+from language_routing import LanguageRouter, detect_language
+
+# The same question in Bengali, English and Banglish
+PARALLEL_QUERIES = [
+    ("অনুপমের মামা কে?", "Who is Anupam's uncle?", "anupam er mama ke?"),
+    ("কল্যাণীর বাবার নাম কী?", "What is the name of Kalyani's father?", "kalyani er babar nam ki?"),
+    ("বিয়ের সময় কল্যাণীর বয়স কত ছিল?", "How old was Kalyani at the time of the wedding?",
+     "biyer shomoy kalyani er boyosh koto chilo?"),
+    ("অনুপম কাকে ভাগ্য দেবতা বলেছে?", "Whom did Anupam call the god of fortune?", "anupam kake bhagyo debota boleche?"),
+    ("শম্ভুনাথ সেন কেন বিয়ে ভেঙে দিলেন?", "Why did Shombhunath Sen call off the wedding?",
+     "shombhunath sen keno biye venge dilen?"),
+    ("হরিশ কোথায় কাজ করে?", "Where does Harish work?", "harish kothay kaj kore?"),
+    ("অনুপমের বন্ধু কে?", "Who is Anupam's friend?", "anupam er bondhu ke?"),
+    ("গল্পের লেখক কে?", "Who is the author of the story?", "golper lekhok ke?"),
+    ("কল্যাণী বিয়ের পর কী করেছিল?", "What did Kalyani do after the wedding was cancelled?",
+     "kalyani biyer por ki korechilo?"),
+    ("স্টেশনে কার সঙ্গে দেখা হয়েছিল?", "Whom did Anupam meet at the station?", "station e kar sathe dekha hoyechilo?"),
+]
+LABELLED_QUERIES = [(query, language) for triple in PARALLEL_QUERIES for query, language in zip(triple, ("bn", "en", "banglish"))]
+LABELLED_QUERIES += [(query, "en" if query.isascii() else "bn") for query in QUERIES]
+
+
+def legacy_detect_language(text: str) -> str:
+    """The previous RAGSystem.detect_language, kept as the baseline"""
+    bengali_chars = set('অআইঈউঊঋএঐওঔকখগঘঙচছজঝঞটঠডঢণতথদধনপফবভমযরলশষসহড়ঢ়য়ৎংঃঁািীুূৃেৈোৌ্')
+    bengali_count = sum(1 for char in text if char in bengali_chars)
+
+    if bengali_count > len(text) * 0.1:  # More than 10% Bengali characters
+        return "bn"
+    return "en"
+
+
+def legacy_prepare(text: str) -> str:
+    """Query preparation before routing: every query normalized, then detected"""
+    return legacy_detect_language(normalize_bengali_text(text))
+
+
+def accuracy(detect, queries) -> dict:
+    """Share of queries per language that detect labels correctly"""
+    per_language = {}
+    for query, language in queries:
+        correct, total = per_language.get(language, (0, 0))
+        per_language[language] = (correct + (detect(query) == language), total + 1)
+    return {
+        "overall": round(sum(correct for correct, _ in per_language.values()) / len(queries), 4),
+        **{language: round(correct / total, 4) for language, (correct, total) in per_language.items()}
+    }
+
+
+def throughput(function, queries, repeat: int) -> dict:
+    latencies = time_each(function, queries, repeat)
+    total_seconds = sum(latencies) / 1000
+    return {**summarize(latencies), "queries_per_second": round(len(latencies) / total_seconds, 1) if total_seconds else None}
+
+
+def keyword_agreement(index: BM25Index, router: LanguageRouter, k: int) -> dict:
+    """Top-k keyword hits of English/Banglish questions shared with their Bengali original, raw vs routed"""
+    def hits(text: str) -> set:
+        return {doc.page_content for doc, _ in index.search(text, k=k)}
+
+    results = {}
+    for position, language in ((1, "en"), (2, "banglish")):
+        raw_overlap, routed_overlap, raw_any, routed_any = [], [], 0, 0
+        for triple in PARALLEL_QUERIES:
+            reference = hits(triple[0])
+            raw = hits(triple[position])
+            routed = hits(router.route(triple[position])["search_text"])
+            raw_any += bool(raw)
+            routed_any += bool(routed)
+            if reference:
+                raw_overlap.append(len(raw & reference) / len(reference))
+                routed_overlap.append(len(routed & reference) / len(reference))
+        results[language] = {
+            "queries_with_hits_raw": raw_any,
+            "queries_with_hits_routed": routed_any,
+            "overlap_with_bengali_raw": round(sum(raw_overlap) / len(raw_overlap), 4) if raw_overlap else None,
+            "overlap_with_bengali_routed": round(sum(routed_overlap) / len(routed_overlap), 4) if routed_overlap else None
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark language detection and routing")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--persist-directory", default=SHIPPED_STORE,
+                        help="Vector store whose chunks the keyword agreement check searches")
+    parser.add_argument("--k", type=int, default=8)
+    parser.add_argument("--output", default=None, help="Write the report as JSON to this file")
+    args = parser.parse_args()
+
+    queries = [query for query, _ in LABELLED_QUERIES]
+    router = LanguageRouter()
+    print(f"🌐 {len(queries)} labelled queries")
+
+    results = {
+        "detection": {
+            "legacy": {"accuracy": accuracy(legacy_detect_language, LABELLED_QUERIES),
+                       **throughput(legacy_detect_language, queries, args.repeat)},
+            "codepoint_ranges": {"accuracy": accuracy(detect_language, LABELLED_QUERIES),
+                                 **throughput(detect_language, queries, args.repeat)}
+        },
+        "preparation": {"legacy_normalize_then_detect": throughput(legacy_prepare, queries, args.repeat)}
+    }
+    for language in ("bn", "en", "banglish"):
+        subset = [query for query, label in LABELLED_QUERIES if label == language]
+        results["preparation"][f"routed_{language}"] = throughput(router.route, subset, args.repeat)
+        results["preparation"][f"legacy_{language}"] = throughput(legacy_prepare, subset, args.repeat)
+    results["routing_decisions"] = router.stats()
+
+    chunks = load_stored_chunks(args.persist_directory)
+    if chunks:
+        index = BM25Index().build([Document(page_content=text) for text in chunks])
+        results["keyword_agreement"] = keyword_agreement(index, LanguageRouter(), args.k)
+    else:
+        print(f"⚠️  No stored chunks in {args.persist_directory}, skipping the keyword agreement check")
+    write_report("language", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Concurrent HTTP load generator for /chat and /chat/stream
+Starts `python main.py` on the fake embedder and LLM (latencies configurable), or
+targets an already running server with --url, and drives it from a pool of
+keep-alive clients. Reports throughput and p50/p95/p99 latency (and TTFB for
+streaming) as JSON
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+import http.client
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+from common import BACKEND_DIR, QUERIES, summarize, write_report
+
+
+def build_fake_store(persist_directory: str):
+    """Ingest the shipped PDFs with the fake embedder so no API key is needed"""
+    env = {**os.environ, "EMBEDDING_PROVIDER": "fake"}
+    subprocess.run(
+        [sys.executable, "story_focused_processor.py", "--persist-directory", persist_directory],
+        cwd=BACKEND_DIR, env=env, check=True, stdout=subprocess.DEVNULL
+    )
+
+
+def start_server(port: int, persist_directory: str, state_directory: str, workers: int = 1,
+                 llm_latency: float = 0.0, token_latency: float = 0.0, embedding_latency: float = 0.0,
+                 extra_env: Optional[Dict[str, str]] = None) -> subprocess.Popen:
+    """Run the API on the fake providers with its state files in state_directory"""
+    env = {
+        **os.environ,
+        "WORKERS": str(workers),
+        "PORT": str(port),
+        "EMBEDDING_PROVIDER": "fake",
+        "LLM_PROVIDER": "fake",
+        "FAKE_LLM_LATENCY": str(llm_latency),
+        "FAKE_LLM_TOKEN_LATENCY": str(token_latency),
+        "FAKE_EMBEDDING_LATENCY": str(embedding_latency),
+        "CHROMADB_PATH": persist_directory,
+        "MEMORY_SQLITE_PATH": os.path.join(state_directory, "sessions.sqlite3"),
+        "ANSWER_CACHE_SQLITE_PATH": os.path.join(state_directory, "answers.sqlite3"),
+        "EMBEDDING_CACHE_PATH": os.path.join(state_directory, "embeddings.sqlite3"),
+        "SLOW_QUERY_MS": "0",
+        **(extra_env or {})
+    }
+    env.pop("GOOGLE_API_KEY", None)
+    log = open(os.path.join(state_directory, f"server-{port}-{workers}.log"), "w")
+    return subprocess.Popen([sys.executable, "main.py"], cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def stop_server(server: subprocess.Popen):
+    server.send_signal(signal.SIGINT)
+    try:
+        server.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        server.kill()
+
+
+def request(connection: http.client.HTTPConnection, method: str, path: str,
+            body: Optional[Dict] = None) -> http.client.HTTPResponse:
+    payload = json.dumps(body).encode("utf-8") if body is not None else None
+    connection.request(method, path, body=payload, headers={"Content-Type": "application/json"})
+    return connection.getresponse()
+
+
+def wait_until_ready(host: str, port: int, workers: int = 1, timeout: float = 120.0):
+    """Poll /readyz until enough consecutive successes that every worker has likely started"""
+    deadline = time.monotonic() + timeout
+    streak = 0
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection(host, port, timeout=5)
+            response = request(connection, "GET", "/readyz")
+            response.read()
+            streak = streak + 1 if response.status == 200 else 0
+            connection.close()
+        except OSError:
+            streak = 0
+        if streak >= workers * 4:
+            return
+        time.sleep(0.25)
+    raise TimeoutError(f"server on {host}:{port} not ready after {timeout:.0f}s")
+
+
+def drive(host: str, port: int, concurrency: int, duration: float, endpoint: str = "/chat",
+          unique_queries: bool = True) -> Dict:
+    """Closed-loop load: each client sends its next request as soon as the last one returns"""
+    latencies: List[float] = []
+    first_bytes: List[float] = []
+    errors: Dict[str, int] = {}
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def client(client_id: int):
+        connection = http.client.HTTPConnection(host, port, timeout=60)
+        sent = 0
+        while time.monotonic() < stop_at:
+            query = QUERIES[(client_id + sent) % len(QUERIES)]
+            if unique_queries:
+                query = f"{query} {client_id}-{sent}"  # Neither answer cache tier can answer it
+            started = time.perf_counter()
+            first_byte = None
+            try:
+                response = request(connection, "POST", endpoint, {"query": query})
+                response.read(1)
+                first_byte = (time.perf_counter() - started) * 1000
+                response.read()
+                status = str(response.status)
+            except (OSError, http.client.HTTPException) as e:
+                connection.close()
+                connection = http.client.HTTPConnection(host, port, timeout=60)
+                status = type(e).__name__
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                if status == "200":
+                    latencies.append(elapsed)
+                    first_bytes.append(first_byte)
+                else:
+                    errors[status] = errors.get(status, 0) + 1
+            sent += 1
+        connection.close()
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    result = {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "duration_seconds": round(elapsed, 3),
+        "requests": len(latencies),
+        "errors": errors,
+        "requests_per_second": round(len(latencies) / elapsed, 2),
+        "latency": summarize(latencies)
+    }
+    if endpoint == "/chat/stream":
+        result["ttfb"] = summarize(first_bytes)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP load test against /chat with fake providers")
+    parser.add_argument("--url", default=None, help="Target a running server instead of starting one")
+    parser.add_argument("--endpoint", default="/chat", choices=["/chat", "/chat/stream"])
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds of load")
+    parser.add_argument("--repeat-queries", action="store_true",
+                        help="Reuse the same question texts so the answer cache can hit")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Fake LLM seconds before the first token")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="Fake LLM seconds per streamed token")
+    parser.add_argument("--embedding-latency", type=float, default=0.05, help="Fake embedding seconds per call")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--persist-directory", default=None,
+                        help="Vector store built with EMBEDDING_PROVIDER=fake (built in a temp dir if omitted)")
+    parser.add_argument("--output", default=None, help="Write the report as JSON to this file")
+    args = parser.parse_args()
+
+    settings = {
+        "workers": args.workers,
+        "llm_latency": args.llm_latency,
+        "token_latency": args.token_latency,
+        "embedding_latency": args.embedding_latency,
+        "unique_queries": not args.repeat_queries
+    }
+
+    if args.url:
+        target = urlparse(args.url)
+        wait_until_ready(target.hostname, target.port or 80)
+        result = drive(target.hostname, target.port or 80, args.concurrency, args.duration,
+                       args.endpoint, unique_queries=not args.repeat_queries)
+        write_report("load", {**result, "settings": {"url": args.url}}, args.output)
+        return
+
+    state_directory = tempfile.mkdtemp(prefix="bench-load-")
+    try:
+        persist_directory = args.persist_directory
+        if persist_directory is None:
+            persist_directory = os.path.join(state_directory, "chroma_db_fake")
+            print(f"📚 Building fake-embedded vector store in {persist_directory}")
+            build_fake_store(persist_directory)
+
+        server = start_server(args.port, persist_directory, state_directory, args.workers,
+                              args.llm_latency, args.token_latency, args.embedding_latency)
+        try:
+            wait_until_ready("127.0.0.1", args.port, args.workers)
+            result = drive("127.0.0.1", args.port, args.concurrency, args.duration,
+                           args.endpoint, unique_queries=not args.repeat_queries)
+        finally:
+            stop_server(server)
+    finally:
+        shutil.rmtree(state_directory, ignore_errors=True)
+
+    write_report("load", {**result, "settings": settings}, args.output)
+
+
+if __name__ == "__main__":
+    main()
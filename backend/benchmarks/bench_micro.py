@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the ingestion text path
+Per-call latency of the normalizers, is_story_content and clean_story_text over the
+shipped PDF pages and chunks, plus chunking throughput of iter_langchain_documents
+"""
+
+import time
+import argparse
+
+from common import load_pdf_pages, load_stored_chunks, summarize, time_each, write_report
+
+from bengali_normalizer import normalize_bengali_text, fix_bengali_encoding
+from story_focused_processor import BengaliTextProcessor, StoryFocusedProcessor
+
+
+def text_benchmark(function, texts, repeat: int) -> dict:
+    latencies = time_each(function, texts, repeat)
+    chars = sum(len(text) for text in texts) * repeat
+    total_seconds = sum(latencies) / 1000
+    return {
+        **summarize(latencies),
+        "mb_per_second": round(chars / total_seconds / 1e6, 3) if total_seconds else None
+    }
+
+
+def chunking_benchmark(pages, repeat: int) -> dict:
+    """Split classified story pages into documents, as ingestion does"""
+    story_chunks = [
+        {"page_number": number, "content": BengaliTextProcessor.clean_story_text(text), "source": "benchmark"}
+        for number, text in enumerate(pages, start=1)
+        if BengaliTextProcessor.is_story_content(text)
+    ]
+    processor = StoryFocusedProcessor()
+    timings = []
+    documents = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        documents = sum(1 for _ in processor.iter_langchain_documents(story_chunks))
+        timings.append((time.perf_counter() - started) * 1000)
+    best_seconds = min(timings) / 1000
+    return {
+        "story_pages": len(story_chunks),
+        "documents": documents,
+        "best_ms": round(min(timings), 3),
+        "documents_per_second": round(documents / best_seconds, 1) if best_seconds else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for normalization, page classification and chunking")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default=None, help="Write the report as JSON to this file")
+    args = parser.parse_args()
+
+    raw_pages = [page for page in load_pdf_pages() if page.strip()]
+    chunks = load_stored_chunks()
+    fixed_pages = [fix_bengali_encoding(page) for page in raw_pages]
+    print(f"📚 {len(raw_pages)} PDF pages, {len(chunks)} stored chunks")
+
+    results = {
+        "fix_bengali_encoding.pages": text_benchmark(fix_bengali_encoding, raw_pages, args.repeat),
+        "normalize_bengali_text.chunks": text_benchmark(normalize_bengali_text, chunks, args.repeat),
+        "is_story_content.pages": text_benchmark(BengaliTextProcessor.is_story_content, fixed_pages, args.repeat),
+        "clean_story_text.pages": text_benchmark(BengaliTextProcessor.clean_story_text, fixed_pages, args.repeat),
+        "chunking": chunking_benchmark(fixed_pages, args.repeat)
+    }
+    write_report("micro", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Golden-output check and micro-benchmark for bengali_normalizer
+Compares the single-pass normalizer byte for byte against the chained str.replace
+implementations it replaced, then times both on the shipped corpus
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import unicodedata
+from typing import List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from bengali_normalizer import normalize_bengali_text, fix_bengali_encoding, to_nfc  # noqa: E402
+from common import load_corpus, write_report  # noqa: E402
+
+
+# Reference implementations, verbatim from BengaliTextProcessor / BengaliTextHelper
+# before they were switched to the shared normalizer
+
+def legacy_fix_bengali_encoding(text: str) -> str:
+    """Fix broken Bengali text encoding comprehensively"""
+
+    # Step 1: Normalize to NFC (Canonical Decomposition + Composition)
+    text = unicodedata.normalize('NFC', text)
+
+    # Step 2: Fix common broken conjuncts and characters
+    # These are the actual broken patterns we see in the PDF
+    conjunct_fixes = {
+        # Fix র্ + অন্য অক্ষর (র্ followed by other characters)
+        'র্ি': 'রি',      # র্ি -> রি
+        'র্ব্': 'র্ব',      # র্ব্ -> র্ব (remove extra halant)
+        'র্ন': 'রন',      # র্ন -> রন
+        'র্ত': 'রত',      # র্ত -> রত
+        'র্চ': 'রচ',      # র্চ -> রচ
+        'র্ক': 'রক',      # র্ক -> রক
+        'র্ম': 'রম',      # র্ম -> রম
+        'র্প': 'রপ',      # র্প -> রপ
+        'র্ল': 'রল',      # র্ল -> রল
+        'র্স': 'রস',      # র্স -> রস
+        'র্গ': 'রগ',      # র্গ -> রগ
+        'র্থ': 'রথ',      # র্থ -> রথ
+        'র্ভ': 'রভ',      # র্ভ -> রভ
+        'র্দ': 'রদ',      # র্দ -> রদ
+        'র্জ': 'রজ',      # র্জ -> রজ
+        'র্য': 'র্য',      # Keep as is (this is correct)
+
+        # Fix ন্ + অন্য অক্ষর patterns
+        'ন্ত': 'ন্ত',     # Keep correct
+        'ন্ধ': 'ন্ধ',     # Keep correct
+        'ন্দ': 'ন্দ',     # Keep correct
+        'ন্ন': 'ন্ন',     # Keep correct
+
+        # Fix ত্ + অন্য অক্ষর patterns
+        'ত্ত': 'ত্ত',     # Keep correct
+        'ত্র': 'ত্র',     # Keep correct
+        'ত্ম': 'ত্ম',     # Keep correct
+
+        # Fix ক্ + অন্য অক্ষর patterns
+        'ক্ত': 'ক্ত',     # Keep correct
+        'ক্র': 'ক্র',     # Keep correct
+        'ক্ষ': 'ক্ষ',     # Keep correct
+
+        # Fix ল্ + অন্য অক্ষর patterns
+        'ল্ল': 'ল্ল',     # Keep correct
+        'ল্প': 'ল্প',     # Keep correct
+        'ল্ট': 'ল্ট',     # Keep correct
+
+        # Fix স্ + অন্য অক্ষর patterns
+        'স্ত': 'স্ত',     # Keep correct
+        'স্থ': 'স্থ',     # Keep correct
+        'স্ব': 'স্ব',     # Keep correct
+        'স্ম': 'স্ম',     # Keep correct
+        'স্ন': 'স্ন',     # Keep correct
+
+        # Clean up zero-width characters
+        '\u200c': '',     # Remove ZWNJ (Zero Width Non-Joiner)
+        '\u200d': '',     # Remove ZWJ (Zero Width Joiner)
+        '\ufeff': '',     # Remove BOM (Byte Order Mark)
+    }
+
+    # Apply fixes
+    for broken, fixed in conjunct_fixes.items():
+        text = text.replace(broken, fixed)
+
+    # Step 3: Fix specific Bengali character issues
+    text = re.sub(r'্([ক-হড়ঢ়য়])', r'\1', text)  # Remove unnecessary halant before consonants
+
+    # Step 4: Normalize whitespace
+    text = re.sub(r'\s+', ' ', text)
+    text = text.strip()
+
+    return text
+
+
+def legacy_normalize_bengali_text(text: str) -> str:
+    """Enhanced Bengali Unicode normalization for story content"""
+    # Normalize Unicode to NFC (Canonical Decomposition, followed by Canonical Composition)
+    text = unicodedata.normalize('NFC', text)
+
+    # Fix broken Bengali conjuncts commonly found in PDFs
+    conjunct_fixes = {
+        # Fix র্ + অন্য অক্ষর (র্ followed by other characters)
+        'র্ি': 'রি',      # র্ি -> রি
+        'র্ব্': 'র্ব',      # র্ব্ -> র্ব (remove extra halant)
+        'র্ন': 'রন',      # র্ন -> রন
+        'র্ত': 'রত',      # র্ত -> রত
+        'র্চ': 'রচ',      # র্চ -> রচ
+        'র্ক': 'রক',      # র্ক -> রক
+        'র্ম': 'রম',      # র্ম -> রম
+        'র্প': 'রপ',      # র্প -> রপ
+        'র্ল': 'রল',      # র্ল -> রল
+        'র্স': 'রস',      # র্স -> রস
+        'র্গ': 'রগ',      # র্গ -> রগ
+        'র্থ': 'রথ',      # র্থ -> রথ
+        'র্ভ': 'রভ',      # র্ভ -> রভ
+        'র্দ': 'রদ',      # র্দ -> রদ
+        'র্জ': 'রজ',      # র্জ -> রজ
+
+        # Clean up zero-width characters
+        '\u200c': '',     # Remove ZWNJ (Zero Width Non-Joiner)
+        '\u200d': '',     # Remove ZWJ (Zero Width Joiner)
+        '\ufeff': '',     # Remove BOM (Byte Order Mark)
+    }
+
+    # Apply fixes
+    for broken, fixed in conjunct_fixes.items():
+        text = text.replace(broken, fixed)
+
+    # Clean up extra whitespace
+    text = re.sub(r'\s+', ' ', text)
+    text = text.strip()
+
+    return text
+
+
+def fuzz_corpus(count: int = 20000, seed: int = 7) -> List[str]:
+    """Random strings dense in the characters the fixes and the fast NFC path care about"""
+    alphabet = [
+        'র', '্', 'ি', 'ব', 'ন', 'ত', 'চ', 'ক', 'য', 'ড', 'ঢ', 'া', 'অ', 'ঁ', 'ৎ', 'ং', 'ে', 'ৗ', '।',
+        '\u09bc', '\u09dc', '\u09dd', '\u09df', '\u09cb', '\u09fe',   # nukta, precomposed ড় ঢ় য়, ো, sandhi mark
+        '\u200c', '\u200d', '\ufeff', '\u2000', '\u00a0',            # zero-width, en quad, nbsp
+        ' ', '\n', '\t', 'a', 'Z', 'é', '\u0301', '✓',
+        'র্ি', 'র্ব্', 'র্ন', 'র্জ', 'র্য', 'র্\u200cন', 'র\u200c্ন', '্\u200cক', '্\u09bc', '্র্ব্ি',
+    ]
+    rng = random.Random(seed)
+    return [''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 40))) for _ in range(count)]
+
+
+def check_golden(texts: List[str]) -> int:
+    mismatches = 0
+    for text in texts:
+        if to_nfc(text) != unicodedata.normalize('NFC', text):
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"❌ to_nfc mismatch for {text[:60]!r}")
+        for new, old in ((fix_bengali_encoding, legacy_fix_bengali_encoding),
+                         (normalize_bengali_text, legacy_normalize_bengali_text)):
+            if new(text) != old(text):
+                mismatches += 1
+                if mismatches <= 5:
+                    print(f"❌ {new.__name__} mismatch for {text[:60]!r}")
+    return mismatches
+
+
+def golden_inputs() -> List[str]:
+    """Corpus excerpts, edge cases and a slice of the fuzz corpus, for the pinned golden fixture"""
+    excerpts = [text[:300] for text in load_corpus()[::3]]
+    edge_cases = [
+        "", " ", "\n\t ", "What kind of person is Anupam?  Who is   Kalyani's father?",
+        "র্ি র্ব্ র্ন র্ত র্চ র্ক র্ম র্প র্ল র্স র্গ র্থ র্ভ র্দ র্জ র্য",
+        "অনু\u200cপম\u200d\ufeff", "ড\u09bc ঢ\u09bc য\u09bc \u09dc\u09dd\u09df",
+        "\u00a0  কল্যাণী\u2000\u2000বাবা  ", "অনুপম\u09c7\u09be", "র্\u200cন র\u200c্ন"
+    ]
+    return excerpts + edge_cases + fuzz_corpus(count=300, seed=11)
+
+
+def write_golden(path: str) -> int:
+    """Pin the legacy outputs for golden_inputs() as the fixture the pytest suite checks"""
+    cases = [{"input": text,
+              "fix_bengali_encoding": legacy_fix_bengali_encoding(text),
+              "normalize_bengali_text": legacy_normalize_bengali_text(text)}
+             for text in golden_inputs()]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(cases, f, ensure_ascii=False, indent=1)
+        f.write("\n")
+    return len(cases)
+
+
+def time_function(function, texts: List[str], repeat: int) -> float:
+    """Best-of-`repeat` seconds for one pass over all texts"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for text in texts:
+            function(text)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Golden check and micro-benchmark for the Bengali normalizer")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", dest="json_path", default=None, help="Write results to this JSON file")
+    parser.add_argument("--write-golden", default=None, metavar="PATH",
+                        help="Write the legacy outputs as the golden test fixture to PATH and exit")
+    args = parser.parse_args()
+
+    if args.write_golden:
+        print(f"📝 Wrote {write_golden(args.write_golden)} golden cases to {args.write_golden}")
+        return
+
+    corpus = load_corpus()
+    english = ["What kind of person is Anupam?  Who is   Kalyani's father?"] * 200
+    fuzz = fuzz_corpus()
+
+    mismatches = check_golden(corpus + english + fuzz)
+    print(f"🔍 Golden check: {len(corpus) + len(english) + len(fuzz)} texts, {mismatches} mismatches")
+
+    results = {"golden_mismatches": mismatches, "timings": {}}
+    corpus_chars = sum(len(text) for text in corpus)
+    for label, texts in (("corpus", corpus), ("english", english)):
+        chars = sum(len(text) for text in texts) or 1
+        for name, new, old in (("fix_bengali_encoding", fix_bengali_encoding, legacy_fix_bengali_encoding),
+                               ("normalize_bengali_text", normalize_bengali_text, legacy_normalize_bengali_text)):
+            old_seconds = time_function(old, texts, args.repeat)
+            new_seconds = time_function(new, texts, args.repeat)
+            results["timings"][f"{label}.{name}"] = {
+                "texts": len(texts),
+                "legacy_ms": round(old_seconds * 1000, 3),
+                "single_pass_ms": round(new_seconds * 1000, 3),
+                "speedup": round(old_seconds / new_seconds, 2) if new_seconds else None,
+                "single_pass_mb_per_sec": round(chars / new_seconds / 1e6, 2) if new_seconds else None
+            }
+            print(f"⏱️  {label:8s} {name:24s} legacy {old_seconds * 1000:8.2f} ms  "
+                  f"single-pass {new_seconds * 1000:8.2f} ms  ({old_seconds / new_seconds:.1f}x)")
+    results["corpus_chars"] = corpus_chars
+
+    write_report("normalizer", results, args.json_path)
+
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Precision/recall and throughput of the story-vs-MCQ page classifier
+Scores page_classifier against the substring-scan classifier it replaced, on
+hand-labelled pages of the shipped PDF (story = kept for retrieval). The shipped
+weights are a least-squares fit on the odd-numbered pages, so only the
+even-numbered pages are held out; the all-pages numbers are in-sample.
+--fit refits on the tuning pages and prints the weights to ship
+"""
+
+import json
+import time
+import argparse
+
+import numpy as np
+
+from common import load_pdf_pages, summarize, time_each, write_report
+
+from bengali_normalizer import fix_bengali_encoding
+from page_classifier import (FEATURE_WEIGHTS, FEATURES, SCAN_BACKEND, THRESHOLD, classify_pages, is_story_page,
+                             page_features)
+
+# 1-based page numbers of the shipped PDF that are not story: the cover, MCQ pages
+# (page 2's options lost their opening parenthesis) and the answer-key grid on page 41.
+# Everything else is the story, glossary, author notes or written-answer pages
+NON_STORY_PAGES = {1, 2, 20, 41} | set(range(23, 41))
+
+
+def legacy_is_story_content(text: str) -> bool:
+    """The previous BengaliTextProcessor.is_story_content, kept as the baseline"""
+    story_indicators = [
+        'গল্প', 'কাহিনী', 'চরিত্র', 'নায়ক', 'নায়িকা',
+        'বিয়ে', 'বিবাহ', 'অনুপম', 'কল্যাণী', 'শম্ভুনাথ',
+        'মামা', 'বাবা', 'মা', 'পিতা', 'মাতা',
+        'ঘটনা', 'পরিস্থিতি', 'সংলাপ', 'কথোপকথন',
+        'স্টেশন', 'গাড়ি', 'ট্রেন', 'রেল', 'প্ল্যাটফর্ম',
+        'যাত্রা', 'ভ্রমণ', 'স্টেশন-মাস্টার', 'টিকিট'
+    ]
+    mcq_indicators = [
+        'প্রশ্ন', 'উত্তর:', '(ক)', '(খ)', '(গ)', '(ঘ)',
+        'সঠিক', 'ভুল', 'নিচের কোনটি', 'কোন সালে'
+    ]
+    if len(text.strip()) < 50:
+        return False
+    story_count = sum(1 for indicator in story_indicators if indicator in text)
+    mcq_count = sum(1 for indicator in mcq_indicators if indicator in text)
+    if mcq_count > 0 and '(ক)' in text:
+        return False
+    transportation_indicators = ['স্টেশন', 'গাড়ি', 'ট্রেন', 'রেল', 'প্ল্যাটফর্ম', 'যাত্রা']
+    has_transportation = any(indicator in text for indicator in transportation_indicators)
+    return story_count > 0 or len(text.strip()) > 200 or has_transportation
+
+
+def accuracy(predictions: list, labels: list) -> dict:
+    """Precision/recall of the story class, plus the misclassified page numbers"""
+    true_positive = sum(1 for predicted, label in zip(predictions, labels) if predicted and label)
+    predicted_story = sum(predictions)
+    actual_story = sum(labels)
+    return {
+        "precision": round(true_positive / predicted_story, 4) if predicted_story else None,
+        "recall": round(true_positive / actual_story, 4) if actual_story else None,
+        "misclassified_pages": [number for number, (predicted, label) in enumerate(zip(predictions, labels), start=1)
+                                if predicted != label]
+    }
+
+
+def throughput(function, pages, repeat: int) -> dict:
+    latencies = time_each(function, pages, repeat)
+    total_seconds = sum(latencies) / 1000
+    return {**summarize(latencies), "pages_per_second": round(len(latencies) / total_seconds, 1) if total_seconds else None}
+
+
+def is_tuning_page(number: int) -> bool:
+    """Odd-numbered pages tune the weights; both splits hold MCQ and story pages"""
+    return number % 2 == 1
+
+
+def fit_weights(pages: list, labels: list) -> dict:
+    """Least-squares weights (story = 1, other = -1) over the tuning pages, rounded as shipped"""
+    rows = [index for index in range(len(pages)) if is_tuning_page(index + 1)]
+    matrix = np.vstack([page_features(pages[index]) for index in rows])
+    targets = np.array([1.0 if labels[index] else -1.0 for index in rows])
+    weights, *_ = np.linalg.lstsq(matrix, targets, rcond=None)
+    return {feature: round(float(weight), 2) + 0.0 for feature, weight in zip(FEATURES, weights)}
+
+
+def split_accuracy(predictions: list, labels: list, held_out: bool) -> dict:
+    """accuracy() over one split only, with page numbers still counted over the whole PDF"""
+    numbers = [number for number in range(1, len(labels) + 1) if is_tuning_page(number) != held_out]
+    result = accuracy([predictions[number - 1] for number in numbers], [labels[number - 1] for number in numbers])
+    result["misclassified_pages"] = [numbers[position - 1] for position in result["misclassified_pages"]]
+    return {"pages": len(numbers), **result}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the page classifier against the legacy substring scans")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--fit", action="store_true", help="Print the weights fit on the tuning pages and exit")
+    parser.add_argument("--output", default=None, help="Write the report as JSON to this file")
+    args = parser.parse_args()
+
+    pages = [fix_bengali_encoding(page) for page in load_pdf_pages()]
+    labels = [number not in NON_STORY_PAGES for number in range(1, len(pages) + 1)]
+    print(f"📚 {len(pages)} labelled pages, {sum(labels)} story")
+    if args.fit:
+        print(json.dumps(fit_weights(pages, labels), indent=2))
+        return
+    if fit_weights(pages, labels) != FEATURE_WEIGHTS:
+        print("⚠️  FEATURE_WEIGHTS differ from the fit on the tuning pages (--fit)")
+
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        batch = classify_pages(pages)
+    batch_seconds = (time.perf_counter() - started) / args.repeat
+
+    legacy = [legacy_is_story_content(page) for page in pages]
+    classified = [is_story_page(page) for page in pages]
+    # The weights alone, without the length and option-set rules
+    scored = [result["score"] > THRESHOLD for result in batch]
+    results = {
+        "scan_backend": SCAN_BACKEND,
+        "held_out": {
+            "legacy": split_accuracy(legacy, labels, held_out=True),
+            "page_classifier": split_accuracy(classified, labels, held_out=True),
+            "page_classifier_score_only": split_accuracy(scored, labels, held_out=True)
+        },
+        # Includes the pages the weights were fit on
+        "in_sample": {
+            "legacy": accuracy(legacy, labels),
+            "page_classifier": accuracy(classified, labels),
+            "page_classifier_batch": accuracy([result["is_story"] for result in batch], labels)
+        },
+        "legacy": throughput(legacy_is_story_content, pages, args.repeat),
+        "page_classifier": throughput(is_story_page, pages, args.repeat),
+        "page_classifier_batch": {
+            "batch_ms": round(batch_seconds * 1000, 3),
+            "pages_per_second": round(len(pages) / batch_seconds, 1) if batch_seconds else None
+        }
+    }
+    # The legacy function exits early on exam pages, so time each class on its own too
+    for name, subset in (("story", [page for page, label in zip(pages, labels) if label]),
+                         ("non_story", [page for page, label in zip(pages, labels) if not label])):
+        results[f"{name}_pages_per_second"] = {
+            "legacy": throughput(legacy_is_story_content, subset, args.repeat)["pages_per_second"],
+            "page_classifier": throughput(is_story_page, subset, args.repeat)["pages_per_second"]
+        }
+    write_report("page_classifier", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Retrieval benchmark against a Chroma store (the shipped one by default)
+Times query embedding, BM25 keyword search, vector search on each backend and the
+full hybrid retrieve, and how post-processing (dedup, MMR, neighbour expansion)
+changes the chunks and context tokens reaching the prompt. Uses the configured embedding provider, or the fake one when
+EMBEDDING_PROVIDER is unset
+"""
+
+import os
+import argparse
+
+from common import QUERIES, SHIPPED_STORE, summarize, time_each, write_report
+
+os.environ.setdefault("EMBEDDING_PROVIDER", "fake")
+
+from langchain_community.vectorstores import Chroma
+
+from providers import create_embeddings, embedding_model_id
+from hybrid_retrieval import create_hybrid_retriever
+from vector_index import InMemoryVectorIndex
+from context_packing import ContextPacker
+
+
+def postprocessing_benchmark(retriever) -> dict:
+    """Chunks and packed context tokens per query, without and with the retrieval post-processor"""
+    packer = ContextPacker()
+    postprocessor = retriever.postprocessor
+    totals = {}
+    for label, active in (("raw", None), ("postprocessed", postprocessor)):
+        retriever.postprocessor = active
+        chunks = tokens = 0
+        for query in QUERIES:
+            docs, _ = retriever.retrieve(query)
+            packed, stats = packer.pack(docs)
+            chunks += len(docs)
+            tokens += stats["context_tokens"]
+        totals[label] = {"chunks_per_query": round(chunks / len(QUERIES), 2),
+                         "context_tokens_per_query": round(tokens / len(QUERIES), 1)}
+    retriever.postprocessor = postprocessor
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the retrieval stages against a Chroma store")
+    parser.add_argument("--persist-directory", default=SHIPPED_STORE)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--k", type=int, default=None, help="Override RETRIEVAL_K")
+    parser.add_argument("--output", default=None, help="Write the report as JSON to this file")
+    args = parser.parse_args()
+    if args.k is not None:
+        os.environ["RETRIEVAL_K"] = str(args.k)
+
+    embeddings = create_embeddings(task="query")
+    vectorstore = Chroma(persist_directory=args.persist_directory, embedding_function=create_embeddings())
+    retriever = create_hybrid_retriever(vectorstore)
+    numpy_retriever = create_hybrid_retriever(vectorstore, InMemoryVectorIndex(vectorstore._collection))
+    print(f"📚 {vectorstore._collection.count()} chunks, embeddings from {embedding_model_id()}")
+
+    query_embeddings = {query: embeddings.embed_query(query) for query in QUERIES}
+    vectors = list(query_embeddings.values())
+
+    # Warm Chroma's HNSW index before timing it
+    retriever._vector_search(vectors[0])
+
+    results = {
+        "embedding": summarize(time_each(embeddings.embed_query, QUERIES, max(1, args.repeat // 4))),
+        "keyword_search": summarize(time_each(retriever._keyword_search, QUERIES, args.repeat)),
+        "vector_search.chroma": summarize(time_each(retriever._vector_search, vectors, args.repeat)),
+        "vector_search.numpy": summarize(time_each(numpy_retriever._vector_search, vectors, args.repeat)),
+        "batch_vector_search.chroma": summarize(time_each(retriever._vector_search_many, [vectors], args.repeat)),
+        "hybrid_retrieve": summarize(time_each(retriever.retrieve, QUERIES, args.repeat)),
+        "postprocessing": postprocessing_benchmark(retriever) if retriever.postprocessor else None,
+        "settings": {
+            "mode": retriever.mode,
+            "k": retriever.k,
+            "score_threshold": retriever.score_threshold,
+            "chunks": len(retriever.keyword_index)
+        }
+    }
+    write_report("retrieval", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Chroma similarity search versus the NumPy vector indexes
+Queries are stored chunk vectors plus noise, so no embedding API is needed. Reports
+per-query latency, top-k agreement with Chroma and the matrix size per backend
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from langchain_community.vectorstores import Chroma  # noqa: E402
+
+from vector_index import (INDEX_DIRNAME, INDEX_DTYPES, InMemoryVectorIndex, MmapVectorIndex,  # noqa: E402
+                          export_vector_index)
+
+
+def time_per_query(search, queries: np.ndarray, repeat: int) -> float:
+    """Median milliseconds for one query over `repeat` passes"""
+    samples = []
+    for _ in range(repeat):
+        for query in queries:
+            started = time.perf_counter()
+            search(query)
+            samples.append((time.perf_counter() - started) * 1000)
+    return round(float(np.median(samples)), 4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Chroma against the NumPy vector indexes")
+    parser.add_argument("--persist-directory", default=os.path.join(BACKEND_DIR, "chroma_db_story_focused"))
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=8)
+    parser.add_argument("--noise", type=float, default=0.05, help="Gaussian noise added to stored vectors")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # Work on a copy: the mmap backend writes its export next to the store
+    work_directory = tempfile.mkdtemp(prefix="bench-vector-index-")
+    persist_directory = os.path.join(work_directory, "store")
+    shutil.copytree(args.persist_directory, persist_directory)
+    try:
+        collection = Chroma(persist_directory=persist_directory)._collection
+        stored = np.asarray(collection.get(include=["embeddings"])["embeddings"], dtype=np.float32)
+        rng = np.random.default_rng(0)
+        rows = rng.integers(0, len(stored), size=args.queries)
+        queries = stored[rows] + rng.normal(0, args.noise, size=(args.queries, stored.shape[1])).astype(np.float32)
+        k = min(args.k, len(stored))
+
+        def chroma_search(query):
+            return collection.query(query_embeddings=[query.tolist()], n_results=k, include=["distances"])
+
+        # Chroma's answer is the reference ranking
+        reference = [
+            collection.query(query_embeddings=[query.tolist()], n_results=k, include=[])["ids"][0]
+            for query in queries
+        ]
+        report = {
+            "chunks": len(stored),
+            "dimensions": stored.shape[1],
+            "k": k,
+            "chroma": {"ms_per_query": time_per_query(chroma_search, queries, args.repeat)}
+        }
+
+        export_vector_index(collection, persist_directory, "benchmark")
+        indexes = {"mmap": MmapVectorIndex(os.path.join(persist_directory, INDEX_DIRNAME))}
+        for dtype in INDEX_DTYPES:
+            indexes[f"numpy_{dtype}"] = InMemoryVectorIndex(collection, dtype=dtype)
+
+        for name, index in indexes.items():
+            overlap = np.mean([
+                len(set(expected) & {index.ids[row] for row, _ in hits}) / k
+                for expected, hits in zip(reference, index.search(queries, k))
+            ])
+            report[name] = {
+                "ms_per_query": time_per_query(lambda query: index.search(query, k), queries, args.repeat),
+                "overlap_with_chroma": round(float(overlap), 4),
+                "matrix_bytes": int(index.matrix.nbytes)
+            }
+            report[name]["speedup"] = round(report["chroma"]["ms_per_query"] / report[name]["ms_per_query"], 2)
+    finally:
+        shutil.rmtree(work_directory, ignore_errors=True)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
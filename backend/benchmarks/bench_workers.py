@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Throughput of the API with 1..N uvicorn workers on the fake providers
+Starts `python main.py` with WORKERS=N against a fake-embedded vector store, drives
+/chat for a fixed time and reports requests/sec and latency percentiles per
+worker count
+"""
+
+import os
+import shutil
+import argparse
+import tempfile
+
+from common import write_report
+from bench_load import build_fake_store, start_server, stop_server, wait_until_ready, drive
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure API throughput scaling across uvicorn workers")
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated worker counts")
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds of load per worker count")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent clients")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Injected seconds per fake LLM call")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--persist-directory", default=None,
+                        help="Vector store built with EMBEDDING_PROVIDER=fake (built in a temp dir if omitted)")
+    parser.add_argument("--output", default=None, help="Write the report as JSON to this file")
+    args = parser.parse_args()
+
+    state_directory = tempfile.mkdtemp(prefix="bench-workers-")
+    persist_directory = args.persist_directory
+    if persist_directory is None:
+        persist_directory = os.path.join(state_directory, "chroma_db_fake")
+        print(f"📚 Building fake-embedded vector store in {persist_directory}")
+        build_fake_store(persist_directory)
+
+    results = []
+    try:
+        for workers in [int(value) for value in args.workers.split(",")]:
+            # No answer cache, so every request does the full retrieval and generation work
+            server = start_server(args.port, persist_directory, state_directory, workers, args.llm_latency,
+                                  extra_env={"VECTOR_BACKEND": "mmap", "MEMORY_BACKEND": "sqlite",
+                                             "ANSWER_CACHE_ENABLED": "false"})
+            try:
+                wait_until_ready("127.0.0.1", args.port, workers)
+                drive("127.0.0.1", args.port, min(args.concurrency, 4), 2.0)  # Warm every worker
+                result = {"workers": workers, **drive("127.0.0.1", args.port, args.concurrency, args.duration)}
+            finally:
+                stop_server(server)
+            baseline = results[0]["requests_per_second"] if results else result["requests_per_second"]
+            result["speedup"] = round(result["requests_per_second"] / max(baseline, 1e-9), 2)
+            results.append(result)
+            print(f"⚙️  {workers} worker(s): {result['requests_per_second']} req/s, "
+                  f"p50 {result['latency'].get('p50_ms')} ms, p95 {result['latency'].get('p95_ms')} ms")
+    finally:
+        shutil.rmtree(state_directory, ignore_errors=True)
+
+    write_report("workers", {"concurrency": args.concurrency, "runs": results}, args.output)
+
+
+if __name__ == "__main__":
+    main()
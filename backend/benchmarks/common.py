@@ -0,0 +1,126 @@
+"""
+Shared helpers for the benchmark scripts
+Corpus loading, latency summaries and JSON reports tagged with the git commit,
+so results from two commits can be compared with compare.py
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import platform
+import subprocess
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+SHIPPED_PDF = os.path.join(BACKEND_DIR, "documents", "HSC26-Bangla1st-Paper.pdf")
+SHIPPED_STORE = os.path.join(BACKEND_DIR, "chroma_db_story_focused")
+
+QUERIES = [
+    "অনুপমের মামা কে?",
+    "কল্যাণীর বাবার নাম কী?",
+    "বিয়ের সময় কল্যাণীর বয়স কত ছিল?",
+    "অনুপম কাকে ভাগ্য দেবতা বলেছে?",
+    "শম্ভুনাথ সেন কেন বিয়ে ভেঙে দিলেন?",
+    "Who is Anupam's uncle?",
+    "What did Kalyani do after the wedding was cancelled?",
+    "হরিশ কোথায় কাজ করে?",
+]
+
+
+def load_pdf_pages(pdf_path: str = SHIPPED_PDF) -> List[str]:
+    """Raw page texts of a PDF, as the ingestion extractor reads them (empty without PyMuPDF)"""
+    try:
+        import fitz
+        with fitz.open(pdf_path) as pdf_document:
+            return [
+                page.get_text(flags=fitz.TEXT_PRESERVE_LIGATURES | fitz.TEXT_PRESERVE_WHITESPACE)
+                for page in pdf_document
+            ]
+    except (ImportError, RuntimeError) as e:
+        print(f"⚠️  PDF pages unavailable ({e})")
+        return []
+
+
+def load_stored_chunks(persist_directory: str = SHIPPED_STORE) -> List[str]:
+    """Chunk texts straight from a Chroma store's SQLite file, without opening Chroma"""
+    sqlite_path = os.path.join(persist_directory, "chroma.sqlite3")
+    if not os.path.exists(sqlite_path):
+        return []
+    conn = sqlite3.connect(f"file:{sqlite_path}?mode=ro", uri=True)
+    rows = conn.execute(
+        "SELECT string_value FROM embedding_metadata WHERE key = 'chroma:document'"
+    ).fetchall()
+    conn.close()
+    return [row[0] for row in rows if row[0]]
+
+
+def load_corpus() -> List[str]:
+    """Page texts from the shipped PDF and chunk texts from the shipped Chroma store"""
+    return load_pdf_pages() + load_stored_chunks()
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summarize(latencies_ms: List[float]) -> Dict:
+    """Count, mean and p50/p95/p99/max of a list of millisecond latencies"""
+    if not latencies_ms:
+        return {"count": 0}
+    return {
+        "count": len(latencies_ms),
+        "mean_ms": round(sum(latencies_ms) / len(latencies_ms), 4),
+        "p50_ms": round(percentile(latencies_ms, 0.50), 4),
+        "p95_ms": round(percentile(latencies_ms, 0.95), 4),
+        "p99_ms": round(percentile(latencies_ms, 0.99), 4),
+        "max_ms": round(max(latencies_ms), 4)
+    }
+
+
+def time_each(function: Callable, items: Iterable, repeat: int = 1) -> List[float]:
+    """Milliseconds per call of function(item), over `repeat` passes"""
+    items = list(items)
+    latencies = []
+    for _ in range(repeat):
+        for item in items:
+            started = time.perf_counter()
+            function(item)
+            latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_report(name: str, results: Dict, output: Optional[str] = None) -> Dict:
+    """Print a benchmark report and optionally write it as JSON"""
+    report = {
+        "benchmark": name,
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "results": results
+    }
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if output:
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2, ensure_ascii=False)
+    return report
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Diff two benchmark reports (or two run_all.py result directories)
+Latencies (*_ms) should go down and rates (*per_second*, speedup) up; changes beyond
+--threshold in the wrong direction are flagged as regressions
+"""
+
+import os
+import sys
+import json
+import argparse
+from typing import Dict, Optional
+
+
+def flatten(value, prefix: str = "") -> Dict[str, float]:
+    """Numeric leaves of a report keyed by their dotted path"""
+    if isinstance(value, dict):
+        flat = {}
+        for key, child in value.items():
+            flat.update(flatten(child, f"{prefix}.{key}" if prefix else str(key)))
+        return flat
+    if isinstance(value, list):
+        flat = {}
+        for index, child in enumerate(value):
+            flat.update(flatten(child, f"{prefix}[{index}]"))
+        return flat
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return {prefix: float(value)}
+    return {}
+
+
+def direction(key: str) -> Optional[int]:
+    """+1 when higher is better, -1 when lower is better, None for informational values"""
+    leaf = key.rsplit(".", 1)[-1]
+    if "per_second" in leaf or leaf in ("speedup", "overlap_with_chroma"):
+        return 1
+    if leaf.endswith("_ms") or leaf.endswith("_seconds"):
+        return -1
+    return None
+
+
+def load_reports(path: str) -> Dict[str, Dict]:
+    if os.path.isdir(path):
+        reports = {}
+        for name in sorted(os.listdir(path)):
+            if name.endswith(".json"):
+                with open(os.path.join(path, name), "r", encoding="utf-8") as handle:
+                    reports[name[:-5]] = json.load(handle)
+        return reports
+    with open(path, "r", encoding="utf-8") as handle:
+        report = json.load(handle)
+    return {report.get("benchmark", os.path.basename(path)): report}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark reports")
+    parser.add_argument("baseline", help="Report file or results directory")
+    parser.add_argument("candidate", help="Report file or results directory")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Percent change flagged as a regression")
+    parser.add_argument("--all", action="store_true", help="Also list unchanged and informational values")
+    args = parser.parse_args()
+
+    baseline, candidate = load_reports(args.baseline), load_reports(args.candidate)
+    regressions = 0
+    for name in sorted(set(baseline) & set(candidate)):
+        before = flatten(baseline[name].get("results", baseline[name]))
+        after = flatten(candidate[name].get("results", candidate[name]))
+        print(f"\n📊 {name}: {baseline[name].get('commit')} -> {candidate[name].get('commit')}")
+        for key in sorted(set(before) & set(after)):
+            better = direction(key)
+            if before[key] == 0:
+                continue
+            change = (after[key] - before[key]) / abs(before[key]) * 100
+            regressed = better is not None and change * better < -args.threshold
+            improved = better is not None and change * better > args.threshold
+            if not (args.all or regressed or improved):
+                continue
+            marker = "❌" if regressed else ("✅" if improved else "  ")
+            print(f"{marker} {key:55s} {before[key]:>12.4f} -> {after[key]:>12.4f} ({change:+.1f}%)")
+            regressions += regressed
+
+    print(f"\n{regressions} regression(s) beyond {args.threshold:.0f}%")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Run every benchmark and write one JSON report per benchmark into a results directory
+Compare two runs (e.g. before and after a change) with compare.py
+"""
+
+import os
+import sys
+import argparse
+import subprocess
+
+from common import git_commit
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the benchmark suite")
+    parser.add_argument("--output-dir", default=None,
+                        help="Directory for the JSON reports (default: benchmarks/results/<commit>)")
+    parser.add_argument("--persist-directory", default=None,
+                        help="Vector store for the retrieval benchmark (default: the shipped one)")
+    parser.add_argument("--quick", action="store_true", help="Shorter runs, for a smoke test")
+    parser.add_argument("--skip", default="", help="Comma-separated benchmarks to skip (micro,normalizer,retrieval,load)")
+    args = parser.parse_args()
+
+    output_dir = args.output_dir or os.path.join(BENCHMARKS_DIR, "results", git_commit() or "unknown")
+    os.makedirs(output_dir, exist_ok=True)
+    repeat = "2" if args.quick else "5"
+    duration = "5" if args.quick else "20"
+
+    retrieval_args = ["--repeat", "5" if args.quick else "20"]
+    if args.persist_directory:
+        retrieval_args += ["--persist-directory", args.persist_directory]
+
+    suite = {
+        "micro": ["bench_micro.py", "--repeat", repeat],
+        "normalizer": ["bench_normalizer.py", "--repeat", repeat, "--json"],
+        "retrieval": ["bench_retrieval.py", *retrieval_args],
+        "load": ["bench_load.py", "--duration", duration],
+    }
+    skipped = {name.strip() for name in args.skip.split(",") if name.strip()}
+
+    failed = []
+    for name, command in suite.items():
+        if name in skipped:
+            continue
+        output = os.path.join(output_dir, f"{name}.json")
+        if command[-1] != "--json":
+            command = command + ["--output"]
+        print(f"🏁 {name} -> {output}")
+        completed = subprocess.run([sys.executable, *command, output], cwd=BENCHMARKS_DIR,
+                                   stdout=subprocess.DEVNULL)
+        if completed.returncode != 0:
+            failed.append(name)
+            print(f"❌ {name} failed (exit code {completed.returncode})")
+
+    print(f"📊 Reports in {output_dir}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
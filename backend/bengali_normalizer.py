@@ -0,0 +1,144 @@
+"""
+Shared Bengali text normalizer
+Used by ingestion (BengaliTextProcessor) and serving (BengaliTextHelper), so the
+two code paths can no longer drift apart
+"""
+
+import re
+import unicodedata
+
+# Zero-width characters removed everywhere (ZWNJ, ZWJ, BOM)
+ZERO_WIDTH_CHARS = '\u200c\u200d\ufeff'
+
+# Fix broken র্ + অন্য অক্ষর conjuncts commonly found in PDFs
+RA_CONJUNCT_FIXES = {
+    'র্ি': 'রি',      # র্ি -> রি
+    'র্ব্': 'র্ব',      # র্ব্ -> র্ব (remove extra halant)
+    'র্ন': 'রন',      # র্ন -> রন
+    'র্ত': 'রত',      # র্ত -> রত
+    'র্চ': 'রচ',      # র্চ -> রচ
+    'র্ক': 'রক',      # র্ক -> রক
+    'র্ম': 'রম',      # র্ম -> রম
+    'র্প': 'রপ',      # র্প -> রপ
+    'র্ল': 'রল',      # র্ল -> রল
+    'র্স': 'রস',      # র্স -> রস
+    'র্গ': 'রগ',      # র্গ -> রগ
+    'র্থ': 'রথ',      # র্থ -> রথ
+    'র্ভ': 'রভ',      # র্ভ -> রভ
+    'র্দ': 'রদ',      # র্দ -> রদ
+    'র্জ': 'রজ',      # র্জ -> রজ
+}
+
+# All fixes share the র্ prefix, which lets the regex engine skip straight to candidates.
+# No fix can create or hide another one, so one left-to-right scan gives the same result
+# as applying the fixes one after another.
+_RA_PREFIX = 'র্'
+_RA_PATTERN = re.compile(
+    re.escape(_RA_PREFIX) + '(?:' + '|'.join(
+        re.escape(key[len(_RA_PREFIX):]) for key in sorted(RA_CONJUNCT_FIXES, key=len, reverse=True)
+    ) + ')'
+)
+
+_ZERO_WIDTH_PATTERN = re.compile('[' + ZERO_WIDTH_CHARS + ']')
+_ZERO_WIDTH_TABLE = str.maketrans(dict.fromkeys(ZERO_WIDTH_CHARS))
+
+# Ingestion also drops every halant before a consonant (ক-হ) or nukta. That rule subsumes
+# the র্ + consonant fixes, so only র্ি and র্ব্ need their own rewrite first.
+_HALANT_PATTERN = re.compile('\u09cd(?=[\u0995-\u09b9\u09bc])')
+
+# unicodedata.normalize dominates the cost of normalizing Bengali text, because vowel
+# signs like া force its slow path. For text made only of Latin, Bengali and common
+# punctuation, NFC reduces to a handful of Bengali-specific rewrites:
+#   ড় ঢ় য় (U+09DC/09DD/09DF) decompose to base + nukta (they never recompose),
+#   ে + া -> ো and ে + ৗ -> ৌ compose,
+#   nukta (ccc 7) is reordered before halant (ccc 9) inside a run of the two.
+_FAST_NFC_RANGES = [
+    (0x0000, 0x024F),  # ASCII, Latin-1, Latin Extended-A/B
+    (0x0964, 0x0965),  # Danda, double danda
+    (0x0980, 0x09FF),  # Bengali
+    (0x2000, 0x206F),  # General punctuation
+    (0x20A0, 0x20CF),  # Currency symbols
+    (0x2190, 0x27BF),  # Arrows, symbols, dingbats (✓)
+    (0xFEFF, 0xFEFF),  # BOM
+]
+_FAST_NFC_REWRITES = [
+    ('\u09dc', '\u09a1\u09bc'),  # ড়
+    ('\u09dd', '\u09a2\u09bc'),  # ঢ়
+    ('\u09df', '\u09af\u09bc'),  # য়
+    ('\u09c7\u09be', '\u09cb'),  # ো
+    ('\u09c7\u09d7', '\u09cc'),  # ৌ
+]
+_NUKTA_HALANT_RUN = re.compile('[\u09bc\u09cd]{2,}')
+
+
+def _build_fast_nfc_guard():
+    """Regex matching any character the fast NFC path cannot handle"""
+    handled = set('\u09bc\u09be\u09cd\u09d7\u09dc\u09dd\u09df')
+    safe = [
+        cp for start, end in _FAST_NFC_RANGES for cp in range(start, end + 1)
+        if chr(cp) in handled
+        or (unicodedata.normalize('NFC', chr(cp)) == chr(cp) and unicodedata.combining(chr(cp)) == 0)
+    ]
+    # Compress code points into ranges for the character class
+    spans = []
+    for cp in safe:
+        if spans and spans[-1][1] == cp - 1:
+            spans[-1][1] = cp
+        else:
+            spans.append([cp, cp])
+    body = ''.join(re.escape(chr(a)) if a == b else f'{re.escape(chr(a))}-{re.escape(chr(b))}' for a, b in spans)
+    return re.compile(f'[^{body}]')
+
+
+_FAST_NFC_GUARD = _build_fast_nfc_guard()
+
+
+def to_nfc(text: str) -> str:
+    """unicodedata.normalize('NFC', text) with a fast path for Bengali/Latin text"""
+    if _FAST_NFC_GUARD.search(text) is not None:
+        return unicodedata.normalize('NFC', text)
+
+    for source, target in _FAST_NFC_REWRITES:
+        text = text.replace(source, target)
+    if '\u09cd\u09bc' in text:
+        # Canonical ordering: stable sort of each nukta/halant run by combining class
+        text = _NUKTA_HALANT_RUN.sub(lambda match: ''.join(sorted(match.group(0), key=unicodedata.combining)), text)
+    return text
+
+
+def _fix_ra_conjuncts(text: str) -> str:
+    return _RA_PATTERN.sub(lambda match: RA_CONJUNCT_FIXES[match.group(0)], text)
+
+
+def _strip_zero_width(text: str) -> str:
+    if _ZERO_WIDTH_PATTERN.search(text) is None:
+        return text
+    return text.translate(_ZERO_WIDTH_TABLE)
+
+
+def _collapse_whitespace(text: str) -> str:
+    # Same result as re.sub(r'\s+', ' ', text).strip(): both use str.isspace semantics
+    return ' '.join(text.split())
+
+
+def normalize_bengali_text(text: str) -> str:
+    """NFC-normalize, fix broken র conjuncts, strip zero-width chars and collapse whitespace"""
+    if text.isascii():
+        return _collapse_whitespace(text)
+
+    text = to_nfc(text)
+    text = _fix_ra_conjuncts(text)
+    text = _strip_zero_width(text)
+    return _collapse_whitespace(text)
+
+
+def fix_bengali_encoding(text: str) -> str:
+    """Ingestion variant of normalize_bengali_text that also removes halant before consonants"""
+    if text.isascii():
+        return _collapse_whitespace(text)
+
+    text = to_nfc(text)
+    text = text.replace('র্ি', 'রি').replace('র্ব্', 'র্ব')
+    text = _strip_zero_width(text)
+    text = _HALANT_PATTERN.sub('', text)
+    return _collapse_whitespace(text)
@@ -0,0 +1,159 @@
+"""
+Bounded concurrency and backpressure for LLM and embedding calls
+Each limiter lets `limit` calls run at once and queues at most `max_queue` more. A
+full queue or a queue wait longer than `queue_timeout` raises Overloaded, which the
+API answers with 429/503 and Retry-After instead of piling a burst onto a
+rate-limited provider.
+"""
+
+import os
+import math
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+import metrics
+
+
+class Overloaded(Exception):
+    """A limiter refused a call; reason is "queue_full" (429) or "queue_timeout" (503)"""
+
+    def __init__(self, limiter: str, reason: str, retry_after: int):
+        super().__init__(f"{limiter} capacity exhausted ({reason.replace('_', ' ')}), retry in {retry_after}s")
+        self.limiter = limiter
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def status_code(self) -> int:
+        return 429 if self.reason == "queue_full" else 503
+
+
+class ConcurrencyLimiter:
+    """Semaphore with a bounded wait queue, queue-depth gauges and wait-time histograms"""
+
+    def __init__(self, name: str, limit: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max(limit, 1))
+        self.active = 0
+        self.waiting = 0
+        # Moving average of how long a call holds its slot, for Retry-After
+        self._hold_seconds = 1.0
+        self.counters = {"admitted": 0, "rejected_queue_full": 0, "rejected_queue_timeout": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.limit > 0
+
+    def retry_after(self) -> int:
+        """Seconds until the current queue has likely drained"""
+        return max(1, math.ceil(self._hold_seconds * (self.waiting + 1) / max(self.limit, 1)))
+
+    def _reject(self, reason: str):
+        self.counters[f"rejected_{reason}"] += 1
+        metrics.LIMITER_REJECTIONS.inc(limiter=self.name, reason=reason)
+        raise Overloaded(self.name, reason, self.retry_after())
+
+    def _publish(self):
+        metrics.LIMITER_ACTIVE.set(self.active, limiter=self.name)
+        metrics.LIMITER_QUEUE_DEPTH.set(self.waiting, limiter=self.name)
+
+    def check_capacity(self):
+        """Raise Overloaded now if a new call would be refused for a full queue"""
+        if self.enabled and self.waiting >= self.max_queue and self._semaphore.locked():
+            self._reject("queue_full")
+
+    async def _acquire(self):
+        self.check_capacity()
+        self.waiting += 1
+        self._publish()
+        started = time.perf_counter()
+        acquire = asyncio.ensure_future(self._semaphore.acquire())
+        try:
+            await asyncio.wait_for(asyncio.shield(acquire), self.queue_timeout)
+        except BaseException as e:
+            # Timed out, or the request itself was cancelled: give back a slot won in the meantime
+            acquire.cancel()
+            if acquire.done() and not acquire.cancelled():
+                self._semaphore.release()
+            if isinstance(e, asyncio.TimeoutError):
+                self._reject("queue_timeout")
+            raise
+        finally:
+            self.waiting -= 1
+            metrics.LIMITER_WAIT.observe(time.perf_counter() - started, limiter=self.name)
+        self.active += 1
+        self.counters["admitted"] += 1
+        self._publish()
+
+    def _release(self, held: float):
+        self.active -= 1
+        self._hold_seconds = 0.8 * self._hold_seconds + 0.2 * held
+        self._semaphore.release()
+        self._publish()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one slot for the duration of the block (a no-op when the limit is 0)"""
+        if not self.enabled:
+            yield
+            return
+        await self._acquire()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._release(time.perf_counter() - started)
+
+    def stats(self) -> Dict:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_queue": self.max_queue,
+            **self.counters
+        }
+
+
+class LimitedEmbeddings(Embeddings):
+    """Passes async embedding calls through a limiter (sync calls are left to their own executor)"""
+
+    def __init__(self, base: Embeddings, limiter: ConcurrencyLimiter):
+        self.base = base
+        self.limiter = limiter
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.base.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.base.embed_query(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        async with self.limiter.slot():
+            return await self.base.aembed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        async with self.limiter.slot():
+            return await self.base.aembed_query(text)
+
+
+def create_limiter(name: str, env_prefix: str, limit: int, max_queue: int, queue_timeout: float) -> ConcurrencyLimiter:
+    """Build a limiter from <PREFIX>_MAX_CONCURRENCY, _MAX_QUEUE and _QUEUE_TIMEOUT (0 concurrency = unlimited)"""
+    return ConcurrencyLimiter(
+        name,
+        limit=int(os.getenv(f"{env_prefix}_MAX_CONCURRENCY", str(limit))),
+        max_queue=int(os.getenv(f"{env_prefix}_MAX_QUEUE", str(max_queue))),
+        queue_timeout=float(os.getenv(f"{env_prefix}_QUEUE_TIMEOUT", str(queue_timeout)))
+    )
+
+
+def request_timeout() -> Optional[float]:
+    """Seconds a /chat request may take end to end (REQUEST_TIMEOUT_SECONDS, 0 = no limit)"""
+    seconds = float(os.getenv("REQUEST_TIMEOUT_SECONDS", "60"))
+    return seconds if seconds > 0 else None
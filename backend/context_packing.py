@@ -0,0 +1,180 @@
+"""
+Token-budgeted context assembly for the story prompt
+Adjacent chunks of the same page are merged without their splitter overlap, the
+result is packed by retrieval score into a token budget, and older conversation
+turns are shortened before the history goes into the prompt
+"""
+
+import os
+import re
+from typing import Dict, List, Tuple
+
+from langchain.schema import Document
+
+from metrics import estimate_tokens
+from retrieval_postprocessing import chunk_position, retrieval_score
+
+# Shortest suffix/prefix match treated as splitter overlap rather than a coincidence
+MIN_OVERLAP_CHARS = 20
+MAX_OVERLAP_CHARS = 400
+
+_SENTENCE_END = re.compile(r'[।.!?]\s')
+
+
+def overlap_length(first: str, second: str) -> int:
+    """Length of the longest suffix of `first` that is also a prefix of `second`"""
+    longest = min(len(first), len(second), MAX_OVERLAP_CHARS)
+    for length in range(longest, MIN_OVERLAP_CHARS - 1, -1):
+        if first.endswith(second[:length]):
+            return length
+    return 0
+
+
+def merge_adjacent_chunks(docs: List[Document]) -> List[Document]:
+    """Merge consecutive chunk_ids of the same page, dropping the text they share
+
+    Merged chunks keep the best score and list their parts in "merged_chunk_ids".
+    Chunks without a parseable chunk_id are passed through unchanged.
+    """
+    positioned = []
+    merged: List[Document] = []
+    for doc in docs:
+        position = chunk_position(doc.metadata)
+        if position is None:
+            merged.append(doc)
+        else:
+            positioned.append((position, doc))
+
+    run: List[Tuple[Tuple[str, int, int], Document]] = []
+
+    def flush():
+        if not run:
+            return
+        if len(run) == 1:
+            merged.append(run[0][1])
+            return
+        text = run[0][1].page_content
+        for _, doc in run[1:]:
+            shared = overlap_length(text, doc.page_content)
+            text += doc.page_content[shared:] if shared else "\n" + doc.page_content
+        best = max((doc for _, doc in run), key=retrieval_score)
+        metadata = {**best.metadata, "merged_chunk_ids": [doc.metadata["chunk_id"] for _, doc in run]}
+        merged.append(Document(page_content=text, metadata=metadata))
+
+    # Duplicates (the same chunk from two searches) collapse onto one position
+    unique = {position: doc for position, doc in sorted(positioned, key=lambda item: item[0])}
+    for position, doc in unique.items():
+        if run and (position[:2] != run[-1][0][:2] or position[2] != run[-1][0][2] + 1):
+            flush()
+            run = []
+        run.append((position, doc))
+    flush()
+    return merged
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Longest prefix within max_tokens, cut back to a sentence end or space when possible"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens(text[:middle]) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    prefix = text[:low]
+    ends = [match.end() for match in _SENTENCE_END.finditer(prefix)]
+    if ends and ends[-1] > low // 2:
+        return prefix[:ends[-1]].rstrip()
+    space = prefix.rfind(" ")
+    return (prefix[:space] if space > low // 2 else prefix).rstrip() + " …"
+
+
+class ContextPacker:
+    """Builds the prompt context and conversation history within token budgets"""
+
+    def __init__(self, enabled: bool = True, token_budget: int = 2000, history_token_budget: int = 300,
+                 history_turns: int = 3, recent_turns: int = 1, summary_chars: int = 160):
+        self.enabled = enabled
+        self.token_budget = token_budget
+        self.history_token_budget = history_token_budget
+        self.history_turns = history_turns
+        self.recent_turns = recent_turns
+        self.summary_chars = summary_chars
+
+    def pack(self, docs: List[Document]) -> Tuple[List[Document], Dict]:
+        """Merge, rank and budget the retrieved chunks; returns (chunks for the prompt, stats)"""
+        if not self.enabled:
+            return docs, {"enabled": False, "retrieved_chunks": len(docs), "packed_chunks": len(docs),
+                          "context_tokens": sum(estimate_tokens(doc.page_content) for doc in docs)}
+
+        merged = merge_adjacent_chunks(docs)
+        ranked = sorted(merged, key=retrieval_score, reverse=True)
+
+        packed: List[Document] = []
+        used = 0
+        truncated = 0
+        for doc in ranked:
+            tokens = estimate_tokens(doc.page_content)
+            if used + tokens <= self.token_budget:
+                packed.append(doc)
+                used += tokens
+            elif not packed:
+                # Never send an empty context because the best chunk alone is over budget
+                text = truncate_to_tokens(doc.page_content, self.token_budget)
+                packed.append(Document(page_content=text, metadata=doc.metadata))
+                used += estimate_tokens(text)
+                truncated += 1
+
+        return packed, {
+            "enabled": True,
+            "retrieved_chunks": len(docs),
+            "merged_chunks": len(merged),
+            "packed_chunks": len(packed),
+            "dropped_chunks": len(merged) - len(packed),
+            "truncated_chunks": truncated,
+            "context_tokens": used,
+            "token_budget": self.token_budget
+        }
+
+    def _summarize_answer(self, answer: str) -> str:
+        """First sentence of an older answer, capped at summary_chars"""
+        match = _SENTENCE_END.search(answer)
+        summary = answer[:match.end()].strip() if match else answer
+        if len(summary) > self.summary_chars:
+            summary = summary[:self.summary_chars].rstrip() + " …"
+        return summary
+
+    def format_history(self, history: List[Dict]) -> str:
+        """Conversation history for the prompt: recent turns verbatim, older answers shortened"""
+        if not history:
+            return ""
+        turns = history[-self.history_turns:]
+        if not self.enabled:
+            return "Previous conversation:\n" + "".join(
+                f"Q: {turn['query']}\nA: {turn['answer']}\n\n" for turn in turns
+            )
+
+        lines = []
+        for position, turn in enumerate(turns):
+            recent = position >= len(turns) - self.recent_turns
+            answer = turn["answer"] if recent else self._summarize_answer(turn["answer"])
+            lines.append(f"Q: {turn['query']}\nA: {answer}\n")
+
+        # Oldest turns go first when the history is over budget; the latest is truncated last
+        while len(lines) > 1 and estimate_tokens("".join(lines)) > self.history_token_budget:
+            lines.pop(0)
+        text = truncate_to_tokens("".join(lines), self.history_token_budget)
+        return f"Previous conversation:\n{text}\n"
+
+
+def create_context_packer() -> ContextPacker:
+    """Build the context packer from environment configuration"""
+    return ContextPacker(
+        enabled=os.getenv("CONTEXT_PACKING_ENABLED", "true").lower() == "true",
+        token_budget=int(os.getenv("CONTEXT_TOKEN_BUDGET", "2000")),
+        history_token_budget=int(os.getenv("HISTORY_TOKEN_BUDGET", "300")),
+        history_turns=int(os.getenv("HISTORY_TURNS", "3")),
+        recent_turns=int(os.getenv("HISTORY_RECENT_TURNS", "1"))
+    )
@@ -0,0 +1,229 @@
+"""
+Caching wrapper for embedding models
+In-memory LRU tier in front of a persistent SQLite store, so warm restarts
+do not pay for embeddings again
+"""
+
+import os
+import time
+import asyncio
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Optional
+
+import numpy as np
+from langchain.schema.embeddings import Embeddings
+
+from bengali_normalizer import to_nfc
+
+
+def _normalize_key_text(text: str) -> str:
+    """Normalization applied before hashing, so trivially different inputs share a cache entry"""
+    return ' '.join(to_nfc(text).split())
+
+
+class EmbeddingStore:
+    """Persistent float32 vector store keyed by cache key"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY,"
+            " model TEXT NOT NULL,"
+            " dim INTEGER NOT NULL,"
+            " vector BLOB NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+        return found
+
+    def put_many(self, model: str, items: Dict[str, List[float]]):
+        rows = [
+            (key, model, len(vector), np.asarray(vector, dtype=np.float32).tobytes())
+            for key, vector in items.items()
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, model, dim, vector) VALUES (?, ?, ?, ?)", rows
+            )
+            self._conn.commit()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that serves repeated texts from memory or disk"""
+
+    def __init__(self, base: Embeddings, model_name: str, store: Optional[EmbeddingStore] = None,
+                 max_memory_entries: int = 10000, query_batch: Optional[Embeddings] = None,
+                 max_batch_size: int = 100):
+        self.base = base
+        self.model_name = model_name
+        self.store = store
+        self.max_memory_entries = max_memory_entries
+        # Same model configured for query embeddings, so many queries fit in one embed_documents call
+        self.query_batch = query_batch
+        self.max_batch_size = max_batch_size
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "miss_seconds": 0.0
+        }
+
+    def _key(self, text: str, kind: str) -> str:
+        # Query and document embeddings use different task types, so they never share entries
+        raw = f"{self.model_name}\x00{kind}\x00{_normalize_key_text(text)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, vector: List[float]):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _lookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Resolve keys from the memory tier, then the disk tier"""
+        found = {}
+        with self._lock:
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+            self.counters["memory_hits"] += len(found)
+
+        remaining = [key for key in dict.fromkeys(keys) if key not in found]
+        if remaining and self.store is not None:
+            from_disk = self.store.get_many(remaining)
+            with self._lock:
+                for key, vector in from_disk.items():
+                    self._remember(key, vector)
+                self.counters["disk_hits"] += len(from_disk)
+            found.update(from_disk)
+        return found
+
+    def _record_misses(self, keys: List[str], vectors: List[List[float]], elapsed: float):
+        with self._lock:
+            for key, vector in zip(keys, vectors):
+                self._remember(key, vector)
+            self.counters["misses"] += len(keys)
+            self.counters["miss_seconds"] += elapsed
+        if self.store is not None:
+            self.store.put_many(self.model_name, dict(zip(keys, vectors)))
+
+    def _pending(self, texts: List[str], kind: str):
+        keys = [self._key(text, kind) for text in texts]
+        found = self._lookup(keys)
+        missing = {}
+        for text, key in zip(texts, keys):
+            if key not in found and key not in missing:
+                missing[key] = text
+        return keys, found, missing
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, found, missing = self._pending(texts, "document")
+        if missing:
+            started = time.perf_counter()
+            vectors = self.base.embed_documents(list(missing.values()))
+            self._record_misses(list(missing.keys()), vectors, time.perf_counter() - started)
+            found.update(zip(missing.keys(), vectors))
+        return [found[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        keys, found, missing = self._pending([text], "query")
+        if missing:
+            started = time.perf_counter()
+            vector = self.base.embed_query(text)
+            self._record_misses(keys, [vector], time.perf_counter() - started)
+            return vector
+        return found[keys[0]]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, found, missing = self._pending(texts, "document")
+        if missing:
+            started = time.perf_counter()
+            vectors = await self.base.aembed_documents(list(missing.values()))
+            self._record_misses(list(missing.keys()), vectors, time.perf_counter() - started)
+            found.update(zip(missing.keys(), vectors))
+        return [found[key] for key in keys]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        keys, found, missing = self._pending([text], "query")
+        if missing:
+            started = time.perf_counter()
+            vector = await self.base.aembed_query(text)
+            self._record_misses(keys, [vector], time.perf_counter() - started)
+            return vector
+        return found[keys[0]]
+
+    async def aembed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed many queries, sending all cache misses to the model in as few calls as possible"""
+        keys, found, missing = self._pending(texts, "query")
+        if missing:
+            started = time.perf_counter()
+            pending = list(missing.values())
+            if self.query_batch is not None:
+                vectors = []
+                for start in range(0, len(pending), self.max_batch_size):
+                    vectors.extend(await self.query_batch.aembed_documents(pending[start:start + self.max_batch_size]))
+            else:
+                vectors = await asyncio.gather(*(self.base.aembed_query(text) for text in pending))
+            self._record_misses(list(missing.keys()), list(vectors), time.perf_counter() - started)
+            found.update(zip(missing.keys(), vectors))
+        return [found[key] for key in keys]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            hits = self.counters["memory_hits"] + self.counters["disk_hits"]
+            lookups = hits + self.counters["misses"]
+            avg_miss_ms = 1000 * self.counters["miss_seconds"] / self.counters["misses"] if self.counters["misses"] else 0.0
+            return {
+                "model": self.model_name,
+                "memory_hits": self.counters["memory_hits"],
+                "disk_hits": self.counters["disk_hits"],
+                "misses": self.counters["misses"],
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "avg_miss_latency_ms": round(avg_miss_ms, 2),
+                # Every hit avoided one embedding round trip of average miss latency
+                "estimated_latency_saved_ms": round(hits * avg_miss_ms, 2),
+                "memory_entries": len(self._memory)
+            }
+
+
+def create_cached_embeddings(base: Embeddings, model_name: str, query_batch: Optional[Embeddings] = None) -> Embeddings:
+    """Wrap an embedding model with the cache configured in the environment"""
+    if os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() != "true":
+        return base
+
+    db_path = os.getenv("EMBEDDING_CACHE_PATH", "./embedding_cache.sqlite3")
+    store = EmbeddingStore(db_path) if db_path else None
+    return CachedEmbeddings(
+        base,
+        model_name=model_name,
+        store=store,
+        max_memory_entries=int(os.getenv("EMBEDDING_CACHE_MEMORY_ENTRIES", "10000")),
+        query_batch=query_batch
+    )
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Batched, concurrent embedding stage for ingestion
+Token-bucket rate limiting, exponential backoff on 429s, 5xx and timeouts, and a
+resumable checkpoint
+"""
+
+import os
+import json
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Dict, Iterator, Optional, Tuple
+
+from langchain.schema.embeddings import Embeddings
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0):
+        """Block until `tokens` are available"""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait_time = (tokens - self._tokens) / self.rate
+            time.sleep(wait_time)
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Recognise provider throttling errors (HTTP 429 / ResourceExhausted)"""
+    message = str(error).lower()
+    return (
+        "429" in message
+        or "resource has been exhausted" in message
+        or "rate limit" in message
+        or type(error).__name__ in ("ResourceExhausted", "TooManyRequests", "FakeRateLimitError")
+    )
+
+
+# Provider/HTTP client error types for server errors and timeouts that carry no status code
+TRANSIENT_ERROR_NAMES = ("InternalServerError", "BadGateway", "ServiceUnavailable", "GatewayTimeout",
+                         "DeadlineExceeded", "ReadTimeout", "ConnectTimeout")
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    """HTTP status of a provider error (google.api_core `code`, HTTP clients' `status_code`)"""
+    for value in (getattr(error, "code", None), getattr(error, "status_code", None),
+                  getattr(getattr(error, "response", None), "status_code", None)):
+        if isinstance(value, int) and not isinstance(value, bool):
+            return int(value)
+    return None
+
+
+def is_transient_error(error: Exception) -> bool:
+    """Throttling, 5xx server errors and timeouts: worth retrying, unlike bad requests or auth errors"""
+    if is_rate_limit_error(error) or isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    status = _status_code(error)
+    if status is not None:
+        return 500 <= status < 600
+    return type(error).__name__ in TRANSIENT_ERROR_NAMES
+
+
+class EmbeddingCheckpoint:
+    """Append-only JSONL log of finished batches so a crashed run can resume"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def load(self) -> Dict[str, List[float]]:
+        done = {}
+        if not os.path.exists(self.path):
+            return done
+        with open(self.path, "r", encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    break  # Torn final line from a crash
+                done.update(zip(record["ids"], record["vectors"]))
+        return done
+
+    def append(self, ids: List[str], vectors: List[List[float]]):
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as handle:
+                handle.write(json.dumps({"ids": ids, "vectors": vectors}) + "\n")
+                handle.flush()
+                os.fsync(handle.fileno())
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class EmbeddingPipeline:
+    """Embed texts in fixed-size batches across a bounded thread pool"""
+
+    def __init__(self, embeddings: Embeddings, batch_size: int = 32, concurrency: int = 4,
+                 requests_per_second: float = 0.0, max_retries: int = 6,
+                 base_delay: float = 1.0, max_delay: float = 60.0,
+                 checkpoint_path: Optional[str] = None, report_every: float = 5.0):
+        self.embeddings = embeddings
+        self.batch_size = max(1, batch_size)
+        self.concurrency = max(1, concurrency)
+        self.bucket = TokenBucket(requests_per_second)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.checkpoint = EmbeddingCheckpoint(checkpoint_path) if checkpoint_path else None
+        self.report_every = report_every
+        self._stats_lock = threading.Lock()
+        self._resume: Optional[Dict[str, List[float]]] = None  # Loaded lazily from the checkpoint
+        self._elapsed = 0.0
+        self.stats = {"total": 0, "resumed": 0, "embedded": 0, "batches": 0,
+                      "rate_limited": 0, "errors": 0, "backoff_seconds": 0.0}
+
+    @classmethod
+    def from_env(cls, embeddings: Embeddings, checkpoint_path: Optional[str] = None) -> "EmbeddingPipeline":
+        """Build a pipeline from INGEST_* environment settings"""
+        return cls(
+            embeddings,
+            batch_size=int(os.getenv("INGEST_BATCH_SIZE", "32")),
+            concurrency=int(os.getenv("INGEST_CONCURRENCY", "4")),
+            requests_per_second=float(os.getenv("INGEST_REQUESTS_PER_SECOND", "0")),
+            max_retries=int(os.getenv("INGEST_MAX_RETRIES", "6")),
+            checkpoint_path=checkpoint_path
+        )
+
+    def _bump(self, key: str, amount: float = 1):
+        with self._stats_lock:
+            self.stats[key] = self.stats.get(key, 0) + amount
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed one batch, backing off exponentially on throttling and transient errors
+
+        Any other error (bad request, auth, a bug) is raised at once: retrying cannot fix it.
+        """
+        attempt = 0
+        while True:
+            self.bucket.acquire()
+            try:
+                return self.embeddings.embed_documents(texts)
+            except Exception as e:
+                attempt += 1
+                rate_limited = is_rate_limit_error(e)
+                self._bump("rate_limited" if rate_limited else "errors")
+                if attempt > self.max_retries or not (rate_limited or is_transient_error(e)):
+                    raise
+                delay = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+                delay *= 0.5 + random.random()  # Jitter so workers don't retry in lockstep
+                self._bump("backoff_seconds", delay)
+                time.sleep(delay)
+
+    def run(self, ids: List[str], texts: List[str]) -> Iterator[Tuple[List[str], List[List[float]]]]:
+        """Yield (ids, vectors) per finished batch, in completion order
+
+        Batches recorded in the checkpoint are yielded first without calling the model.
+        May be called repeatedly on successive groups; stats accumulate across calls.
+        """
+        self._bump("total", len(ids))
+
+        if self._resume is None:
+            self._resume = self.checkpoint.load() if self.checkpoint else {}
+            if self._resume:
+                print(f"♻️  Resuming: {len(self._resume)} embeddings available from checkpoint")
+
+        resumed_ids = [doc_id for doc_id in ids if doc_id in self._resume]
+        if resumed_ids:
+            self._bump("resumed", len(resumed_ids))
+            for start in range(0, len(resumed_ids), self.batch_size):
+                batch_ids = resumed_ids[start:start + self.batch_size]
+                yield batch_ids, [self._resume.pop(doc_id) for doc_id in batch_ids]
+
+        resumed = set(resumed_ids)
+        pending = [(doc_id, text) for doc_id, text in zip(ids, texts) if doc_id not in resumed]
+        batches = [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+        if not batches:
+            return
+
+        started = time.perf_counter() - self._elapsed
+        last_report = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            queue = iter(batches)
+            in_flight = {}
+
+            def submit_next() -> bool:
+                batch = next(queue, None)
+                if batch is None:
+                    return False
+                future = executor.submit(self._embed_batch, [text for _, text in batch])
+                in_flight[future] = [doc_id for doc_id, _ in batch]
+                return True
+
+            # Keep at most 2x concurrency batches queued so memory stays bounded
+            for _ in range(self.concurrency * 2):
+                if not submit_next():
+                    break
+
+            while in_flight:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    batch_ids = in_flight.pop(future)
+                    vectors = future.result()
+                    if self.checkpoint:
+                        self.checkpoint.append(batch_ids, vectors)
+                    self._bump("embedded", len(batch_ids))
+                    self._bump("batches")
+                    submit_next()
+                    yield batch_ids, vectors
+
+                now = time.perf_counter()
+                if now - last_report >= self.report_every:
+                    last_report = now
+                    self._print_progress(now - started)
+
+        self._elapsed = time.perf_counter() - started
+        self._print_progress(self._elapsed)
+
+    def throughput(self, elapsed: float) -> float:
+        return self.stats["embedded"] / elapsed if elapsed > 0 else 0.0
+
+    def _print_progress(self, elapsed: float):
+        done = self.stats["embedded"] + self.stats["resumed"]
+        self.stats["elapsed_seconds"] = round(elapsed, 3)
+        self.stats["chunks_per_second"] = round(self.throughput(elapsed), 2)
+        print(f"   ⏱️  {done}/{self.stats['total']} chunks embedded "
+              f"({self.stats['chunks_per_second']} chunks/sec, "
+              f"{self.stats['rate_limited']} rate-limited, {self.stats['errors']} errors)")
+
+    def clear_checkpoint(self):
+        if self.checkpoint:
+            self.checkpoint.clear()
+
+
+def main():
+    """Exercise the pipeline against the local fake embedder"""
+    import argparse
+    from fakes import FakeEmbeddings
+
+    parser = argparse.ArgumentParser(description="Run the ingestion embedding stage against a fake embedder")
+    parser.add_argument("--chunks", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rps", type=float, default=0.0, help="Request rate limit (0 = unlimited)")
+    parser.add_argument("--latency", type=float, default=0.05, help="Injected seconds per embedding call")
+    parser.add_argument("--error-rate", type=float, default=0.1, help="Fraction of calls that fail with a 429")
+    parser.add_argument("--checkpoint", default=None)
+    args = parser.parse_args()
+
+    fake = FakeEmbeddings(latency=args.latency, error_rate=args.error_rate)
+    pipeline = EmbeddingPipeline(
+        fake,
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        requests_per_second=args.rps,
+        base_delay=0.05,
+        max_delay=1.0,
+        checkpoint_path=args.checkpoint,
+        report_every=1.0
+    )
+
+    ids = [f"chunk-{i}" for i in range(args.chunks)]
+    texts = [f"অনুপম কল্যাণী chunk {i}" for i in range(args.chunks)]
+    received = 0
+    for batch_ids, vectors in pipeline.run(ids, texts):
+        received += len(batch_ids)
+
+    print(json.dumps({**pipeline.stats, "received": received, "model_calls": fake.calls}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
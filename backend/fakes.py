@@ -0,0 +1,115 @@
+"""
+Deterministic local stand-ins for the Google models
+Used for benchmarks, load tests and running the pipeline without an API key
+"""
+
+import time
+import random
+import asyncio
+import hashlib
+import threading
+from typing import Any, List, Optional, Iterator, AsyncIterator
+
+import numpy as np
+from langchain.schema.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+class FakeRateLimitError(Exception):
+    """Mimics the provider's 429 / ResourceExhausted error"""
+
+    def __init__(self, message: str = "429 Resource has been exhausted (e.g. check quota)."):
+        super().__init__(message)
+
+
+class FakeEmbeddings(Embeddings):
+    """Hash-seeded unit vectors with optional injected latency and 429 errors"""
+
+    def __init__(self, dimensions: int = 768, latency: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        self.dimensions = dimensions
+        self.latency = latency
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.texts_embedded = 0
+
+    def _vector(self, text: str) -> List[float]:
+        digest = hashlib.sha256(text.encode("utf-8")).digest()
+        rng = np.random.default_rng(int.from_bytes(digest[:8], "little"))
+        vector = rng.standard_normal(self.dimensions).astype(np.float32)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def _call(self, count: int):
+        with self._lock:
+            self.calls += 1
+            fail = self.error_rate > 0 and self._random.random() < self.error_rate
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            raise FakeRateLimitError()
+        with self._lock:
+            self.texts_embedded += count
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self._call(len(texts))
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self._call(1)
+        return self._vector(text)
+
+
+class FakeChatModel(BaseChatModel):
+    """Deterministic chat model that answers with the start of the prompt's story context
+
+    `latency` is spent before the first token and `token_latency` between streamed words,
+    so load tests see a realistic time-to-first-token and generation time.
+    """
+
+    latency: float = 0.0
+    token_latency: float = 0.0
+    max_words: int = 40
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    def _words(self, messages: List[BaseMessage]) -> List[str]:
+        self.calls += 1
+        prompt = str(messages[-1].content)
+        context = prompt.split("Context from story:", 1)[-1].split("Question:", 1)[0]
+        return context.split()[:self.max_words] or ["তথ্যে", "এই", "উত্তর", "পাওয়া", "যায়নি।"]
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        words = self._words(messages)
+        time.sleep(self.latency + self.token_latency * len(words))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=" ".join(words)))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        words = self._words(messages)
+        await asyncio.sleep(self.latency + self.token_latency * len(words))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=" ".join(words)))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        words = self._words(messages)
+        time.sleep(self.latency)
+        for index, word in enumerate(words):
+            if index:
+                time.sleep(self.token_latency)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word if index == 0 else " " + word))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        words = self._words(messages)
+        await asyncio.sleep(self.latency)
+        for index, word in enumerate(words):
+            if index:
+                await asyncio.sleep(self.token_latency)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word if index == 0 else " " + word))
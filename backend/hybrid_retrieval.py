@@ -0,0 +1,423 @@
+"""
+Hybrid retrieval for the RAG API
+A local BM25 keyword index over the stored chunks runs next to Chroma vector
+search, and the two ranked lists are merged with reciprocal rank fusion
+"""
+
+import os
+import re
+import math
+import time
+import asyncio
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, List, Dict, Optional, Tuple
+
+from langchain.schema import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.callbacks import CallbackManagerForRetrieverRun, AsyncCallbackManagerForRetrieverRun
+
+from bengali_normalizer import normalize_bengali_text
+from concurrency import Overloaded
+from retrieval_postprocessing import create_retrieval_postprocessor
+
+# Bengali words (letters, signs, digits) or ASCII words
+_TOKEN_PATTERN = re.compile(r'[\u0980-\u09ff]+|[a-z0-9]+')
+
+# Common inflections, longest first, so "অনুপমের" also matches "অনুপম"
+BENGALI_SUFFIXES = ('দের', 'টির', 'গুলো', 'এর', 'ের', 'কে', 'তে', 'টি', 'টা', 'রা', 'র', 'ে')
+_MIN_STEM_LENGTH = 2
+
+# Question and function words carry no evidence of relevance: a question that only shares
+# these with a chunk must not pull it into the context
+STOPWORDS = frozenset(normalize_bengali_text(word) for word in (
+    'কী', 'কি', 'কে', 'কেন', 'কত', 'কোন', 'কোথায়', 'কবে', 'কখন', 'কেমন', 'কীভাবে', 'কাকে', 'কার',
+    'এবং', 'ও', 'আর', 'বা', 'না', 'নয়', 'এই', 'সেই', 'ওই', 'যে', 'যা', 'তা', 'তার', 'সে', 'তিনি',
+    'আমি', 'আমার', 'তুমি', 'তোমার', 'আপনি', 'আপনার', 'হয়', 'ছিল', 'ছিলেন', 'করে', 'করেন', 'হবে',
+    'থেকে', 'জন্য', 'দিয়ে', 'সঙ্গে', 'সাথে', 'একটি', 'এক',
+    'the', 'a', 'an', 'is', 'are', 'was', 'were', 'of', 'to', 'in', 'on', 'and', 'or', 'what', 'who',
+    'whom', 'why', 'how', 'when', 'where', 'which', 'do', 'does', 'did'
+))
+
+
+def tokenize(text: str) -> List[str]:
+    """Normalize text and split it into lowercase terms without stopwords, adding the stem of inflected Bengali words"""
+    terms = []
+    for token in _TOKEN_PATTERN.findall(normalize_bengali_text(text).lower()):
+        if token in STOPWORDS:
+            continue
+        terms.append(token)
+        if token[0] >= '\u0980':
+            for suffix in BENGALI_SUFFIXES:
+                if token.endswith(suffix) and len(token) - len(suffix) >= _MIN_STEM_LENGTH:
+                    terms.append(token[:-len(suffix)])
+                    break
+    return terms
+
+
+class BM25Index:
+    """In-memory inverted index with Okapi BM25 scoring"""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.documents: List[Document] = []
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}  # term -> [(doc index, term frequency)]
+        self._idf: Dict[str, float] = {}
+        self._length_norm: List[float] = []
+
+    def build(self, documents: List[Document]) -> "BM25Index":
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        lengths = []
+        for index, doc in enumerate(documents):
+            counts = Counter(tokenize(doc.page_content))
+            lengths.append(sum(counts.values()))
+            for term, frequency in counts.items():
+                postings.setdefault(term, []).append((index, frequency))
+
+        total = len(documents)
+        average_length = sum(lengths) / total if total else 0.0
+        self.documents = list(documents)
+        self._postings = postings
+        self._idf = {
+            term: math.log(1 + (total - len(entries) + 0.5) / (len(entries) + 0.5))
+            for term, entries in postings.items()
+        }
+        # Precompute k1 * (1 - b + b * |d| / avgdl) once per document
+        self._length_norm = [
+            self.k1 * (1 - self.b + self.b * length / average_length) if average_length else self.k1
+            for length in lengths
+        ]
+        return self
+
+    @classmethod
+    def from_vectorstore(cls, vectorstore: Any) -> "BM25Index":
+        """Index every chunk currently stored in a Chroma collection"""
+        stored = vectorstore._collection.get(include=["documents", "metadatas"])
+        documents = [
+            Document(page_content=text or "", metadata=metadata or {})
+            for text, metadata in zip(stored["documents"], stored["metadatas"])
+        ]
+        return cls().build(documents)
+
+    def search(self, query: str, k: int = 8) -> List[Tuple[Document, float]]:
+        """Return up to k (document, BM25 score) pairs with a positive score"""
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            entries = self._postings.get(term)
+            if not entries:
+                continue
+            idf = self._idf[term]
+            for index, frequency in entries:
+                scores[index] = scores.get(index, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + self._length_norm[index])
+
+        best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(self.documents[index], score) for index, score in best]
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+
+def fusion_key(doc: Document) -> Tuple[str, str]:
+    """Identity of a chunk across result lists: the same text from two sources stays two chunks"""
+    return str(doc.metadata.get("source", "")), doc.page_content
+
+
+def reciprocal_rank_fusion(ranked_lists: List[List[Document]], rrf_k: int = 60) -> List[Tuple[Document, float]]:
+    """Merge ranked lists by summing 1 / (rrf_k + rank); documents are matched on their source and content"""
+    fused: Dict[Tuple[str, str], float] = {}
+    first_seen: Dict[Tuple[str, str], Document] = {}
+    for ranked in ranked_lists:
+        for rank, doc in enumerate(ranked, start=1):
+            key = fusion_key(doc)
+            fused[key] = fused.get(key, 0.0) + 1.0 / (rrf_k + rank)
+            first_seen.setdefault(key, doc)
+    return [(first_seen[key], score) for key, score in sorted(fused.items(), key=lambda item: item[1], reverse=True)]
+
+
+class VectorSearchHealth:
+    """Tracks embedding failures and skips vector search for a cooldown after one"""
+
+    def __init__(self, cooldown_seconds: float = 30.0):
+        self.cooldown_seconds = cooldown_seconds
+        self._lock = threading.Lock()
+        self._unavailable_until = 0.0
+        self.counters = {"hybrid": 0, "vector": 0, "keyword": 0, "keyword_fallback": 0, "vector_failures": 0}
+
+    def available(self) -> bool:
+        return time.monotonic() >= self._unavailable_until
+
+    def record_failure(self):
+        with self._lock:
+            self.counters["vector_failures"] += 1
+            self._unavailable_until = time.monotonic() + self.cooldown_seconds
+
+    def record_mode(self, mode: str):
+        with self._lock:
+            self.counters[mode] += 1
+
+
+# Sync callers get the same embedding timeout as the async path
+_sync_embedding_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="retrieval-embed")
+
+
+class HybridRetriever(BaseRetriever):
+    """Fuses Chroma similarity search with BM25 keyword search, falling back to keywords alone"""
+
+    vectorstore: Any
+    keyword_index: BM25Index
+    vector_index: Optional[Any] = None  # NumPy VectorIndex searched instead of Chroma when set
+    postprocessor: Optional[Any] = None  # RetrievalPostProcessor applied to the fused results when set
+    mode: str = "hybrid"  # "hybrid", "vector" or "keyword"
+    k: int = 8
+    score_threshold: float = 0.3
+    rrf_k: int = 60
+    keyword_min_score: float = 1.0  # BM25 hits below this never reach fusion
+    embedding_timeout: float = 3.0
+    health: VectorSearchHealth
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def _vector_search_many(self, embeddings: List[List[float]]) -> List[List[Document]]:
+        """One Chroma query for any number of embeddings, keeping the relevance threshold of the old retriever"""
+        relevance = self.vectorstore._select_relevance_score_fn()
+        if self.vector_index is not None:
+            return self._index_search_many(embeddings, relevance)
+        results = self.vectorstore._collection.query(
+            query_embeddings=embeddings,
+            n_results=self.k,
+            include=["documents", "metadatas", "distances"]
+        )
+        ranked_lists = []
+        for texts, metadatas, distances in zip(results["documents"], results["metadatas"], results["distances"]):
+            docs = []
+            for text, metadata, distance in zip(texts, metadatas, distances):
+                score = relevance(distance)
+                if score >= self.score_threshold:
+                    docs.append(Document(page_content=text, metadata={**(metadata or {}), "vector_score": round(score, 4)}))
+            ranked_lists.append(docs)
+        return ranked_lists
+
+    def _index_search_many(self, embeddings: List[List[float]], relevance: Any) -> List[List[Document]]:
+        index = self.vector_index
+        ranked_lists = []
+        for hits in index.search(embeddings, self.k):
+            docs = []
+            for row, distance in hits:
+                score = relevance(distance)
+                if score >= self.score_threshold:
+                    metadata = {**(index.metadatas[row] or {}), "vector_score": round(score, 4)}
+                    docs.append(Document(page_content=index.documents[row], metadata=metadata))
+            ranked_lists.append(docs)
+        return ranked_lists
+
+    def _vector_search(self, embedding: List[float]) -> List[Document]:
+        return self._vector_search_many([embedding])[0]
+
+    def _keyword_search(self, query: str) -> List[Document]:
+        return [
+            Document(page_content=doc.page_content, metadata={**doc.metadata, "bm25_score": round(score, 4)})
+            for doc, score in self.keyword_index.search(query, k=self.k)
+            if score >= self.keyword_min_score
+        ]
+
+    def _fuse(self, vector_docs: List[Document], keyword_docs: List[Document], mode: str,
+              timings: Dict[str, float]) -> List[Document]:
+        started = time.perf_counter()
+        if mode == "hybrid":
+            docs = []
+            keyword_by_key = {fusion_key(doc): doc for doc in keyword_docs}
+            for doc, score in reciprocal_rank_fusion([vector_docs, keyword_docs], self.rrf_k)[:self.k]:
+                # Keep both component scores when a chunk was found by both searches
+                metadata = {**keyword_by_key.get(fusion_key(doc), doc).metadata, **doc.metadata}
+                metadata["rrf_score"] = round(score, 6)
+                docs.append(Document(page_content=doc.page_content, metadata=metadata))
+        else:
+            docs = (vector_docs if mode == "vector" else keyword_docs)[:self.k]
+        timings["fusion_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        return docs
+
+    def _plan(self) -> Tuple[bool, bool]:
+        """Which searches to run: (vector, keyword)"""
+        use_vector = self.mode != "keyword" and self.health.available()
+        use_keyword = self.mode != "vector" or not use_vector
+        return use_vector, use_keyword
+
+    def _finish(self, vector_docs: Optional[List[Document]], keyword_docs: List[Document],
+                fallback_reason: Optional[str], timings: Dict[str, float]) -> Tuple[List[Document], Dict]:
+        if vector_docs is None:
+            mode = "keyword" if self.mode == "keyword" else "keyword_fallback"
+            docs = self._fuse([], keyword_docs, "keyword", timings)
+        else:
+            mode = self.mode
+            docs = self._fuse(vector_docs, keyword_docs, mode, timings)
+        self.health.record_mode(mode)
+
+        postprocessing = None
+        if self.postprocessor is not None and docs:
+            docs, postprocessing = self.postprocessor.process(docs)
+            timings["postprocess_ms"] = postprocessing.pop("postprocess_ms")
+
+        for doc in docs:
+            doc.metadata["retrieval_mode"] = mode
+        info = {"mode": mode, "timings_ms": timings}
+        if postprocessing:
+            info["postprocessing"] = postprocessing
+        if fallback_reason:
+            info["fallback_reason"] = fallback_reason
+        return docs, info
+
+    async def aretrieve(self, query: str) -> Tuple[List[Document], Dict]:
+        """Return (documents, info) where info holds the retrieval mode and per-stage timings"""
+        timings: Dict[str, float] = {}
+        use_vector, use_keyword = self._plan()
+        fallback_reason = None if use_vector or self.mode == "keyword" else "vector_search_cooling_down"
+
+        embedding_task = None
+        if use_vector:
+            embedding_started = time.perf_counter()
+            embedding_task = asyncio.ensure_future(self.vectorstore.embeddings.aembed_query(query))
+
+        vector_docs = None
+        try:
+            # BM25 runs while the embedding request is in flight. Searches and post-processing
+            # run in worker threads so concurrent requests are not queued behind them
+            keyword_docs = []
+            if use_keyword:
+                started = time.perf_counter()
+                keyword_docs = await asyncio.to_thread(self._keyword_search, query)
+                timings["keyword_search_ms"] = round((time.perf_counter() - started) * 1000, 3)
+
+            if embedding_task is not None:
+                try:
+                    remaining = max(0.0, self.embedding_timeout - (time.perf_counter() - embedding_started))
+                    embedding = await asyncio.wait_for(embedding_task, timeout=remaining)
+                    timings["embedding_ms"] = round((time.perf_counter() - embedding_started) * 1000, 3)
+                    started = time.perf_counter()
+                    vector_docs = await asyncio.to_thread(self._vector_search, embedding)
+                    timings["vector_search_ms"] = round((time.perf_counter() - started) * 1000, 3)
+                except Overloaded:
+                    # Our own embedding limiter is saturated: degrade this query only, without a cooldown
+                    fallback_reason = "embedding_overloaded"
+                    if not use_keyword:
+                        keyword_docs = await asyncio.to_thread(self._keyword_search, query)
+                except Exception as e:
+                    fallback_reason = "embedding_timeout" if isinstance(e, asyncio.TimeoutError) else f"vector_search_error: {e}"
+                    self.health.record_failure()
+                    if not use_keyword:
+                        keyword_docs = await asyncio.to_thread(self._keyword_search, query)
+        finally:
+            # A failed keyword search or a cancelled request must not leave the embedding call
+            # running, or its exception unretrieved
+            if embedding_task is not None:
+                if not embedding_task.done():
+                    embedding_task.cancel()
+                elif not embedding_task.cancelled():
+                    embedding_task.exception()
+
+        return await asyncio.to_thread(self._finish, vector_docs, keyword_docs, fallback_reason, timings)
+
+    def retrieve(self, query: str) -> Tuple[List[Document], Dict]:
+        """Synchronous version of aretrieve"""
+        timings: Dict[str, float] = {}
+        use_vector, use_keyword = self._plan()
+        fallback_reason = None if use_vector or self.mode == "keyword" else "vector_search_cooling_down"
+
+        embedding_future = None
+        if use_vector:
+            embedding_started = time.perf_counter()
+            embedding_future = _sync_embedding_executor.submit(self.vectorstore.embeddings.embed_query, query)
+
+        keyword_docs = []
+        if use_keyword:
+            started = time.perf_counter()
+            keyword_docs = self._keyword_search(query)
+            timings["keyword_search_ms"] = round((time.perf_counter() - started) * 1000, 3)
+
+        vector_docs = None
+        if embedding_future is not None:
+            try:
+                remaining = max(0.0, self.embedding_timeout - (time.perf_counter() - embedding_started))
+                embedding = embedding_future.result(timeout=remaining)
+                timings["embedding_ms"] = round((time.perf_counter() - embedding_started) * 1000, 3)
+                started = time.perf_counter()
+                vector_docs = self._vector_search(embedding)
+                timings["vector_search_ms"] = round((time.perf_counter() - started) * 1000, 3)
+            except Exception as e:
+                fallback_reason = "embedding_timeout" if isinstance(e, FutureTimeoutError) else f"vector_search_error: {e}"
+                self.health.record_failure()
+                if not use_keyword:
+                    keyword_docs = self._keyword_search(query)
+
+        return self._finish(vector_docs, keyword_docs, fallback_reason, timings)
+
+    def retrieve_many(self, queries: List[str],
+                      embeddings: Optional[List[List[float]]]) -> List[Tuple[List[Document], Dict]]:
+        """Retrieve for many queries with precomputed embeddings (None when embedding them failed)"""
+        use_vector, use_keyword = self._plan()
+        fallback_reason = None if use_vector or self.mode == "keyword" else "vector_search_cooling_down"
+
+        vector_results = None
+        batch_timings: Dict[str, float] = {}
+        if use_vector and embeddings is None:
+            fallback_reason = "embedding_failed"
+            self.health.record_failure()
+        elif use_vector:
+            try:
+                started = time.perf_counter()
+                vector_results = self._vector_search_many(embeddings)
+                batch_timings["batch_vector_search_ms"] = round((time.perf_counter() - started) * 1000, 3)
+            except Exception as e:
+                fallback_reason = f"vector_search_error: {e}"
+                self.health.record_failure()
+
+        results = []
+        for index, query in enumerate(queries):
+            timings = dict(batch_timings)
+            keyword_docs = []
+            if use_keyword or vector_results is None:
+                started = time.perf_counter()
+                keyword_docs = self._keyword_search(query)
+                timings["keyword_search_ms"] = round((time.perf_counter() - started) * 1000, 3)
+            vector_docs = vector_results[index] if vector_results is not None else None
+            results.append(self._finish(vector_docs, keyword_docs, fallback_reason, timings))
+        return results
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self.retrieve(query)[0]
+
+    async def _aget_relevant_documents(self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun) -> List[Document]:
+        return (await self.aretrieve(query))[0]
+
+    def stats(self) -> Dict:
+        return {
+            "mode": self.mode,
+            "keyword_index_chunks": len(self.keyword_index),
+            "vector_backend": self.vector_index.backend if self.vector_index is not None else "chroma",
+            "vector_search_available": self.health.available(),
+            **self.health.counters,
+            **{f"postprocess_{key}": value for key, value in (self.postprocessor.stats() if self.postprocessor else {}).items()}
+        }
+
+
+def create_hybrid_retriever(vectorstore: Any, vector_index: Optional[Any] = None) -> HybridRetriever:
+    """Build the retriever and its keyword index from environment configuration"""
+    mode = os.getenv("RETRIEVAL_MODE", "hybrid").lower()
+    if mode not in ("hybrid", "vector", "keyword"):
+        raise ValueError(f"Unknown RETRIEVAL_MODE: {mode}")
+
+    return HybridRetriever(
+        vectorstore=vectorstore,
+        keyword_index=BM25Index.from_vectorstore(vectorstore),
+        vector_index=vector_index,
+        postprocessor=create_retrieval_postprocessor(vectorstore._collection, vector_index),
+        mode=mode,
+        k=int(os.getenv("RETRIEVAL_K", "8")),
+        score_threshold=float(os.getenv("RETRIEVAL_SCORE_THRESHOLD", "0.3")),
+        rrf_k=int(os.getenv("RETRIEVAL_RRF_K", "60")),
+        keyword_min_score=float(os.getenv("RETRIEVAL_MIN_BM25_SCORE", "1.0")),
+        embedding_timeout=float(os.getenv("RETRIEVAL_EMBEDDING_TIMEOUT", "3.0")),
+        health=VectorSearchHealth(float(os.getenv("RETRIEVAL_VECTOR_COOLDOWN", "30")))
+    )
@@ -0,0 +1,187 @@
+"""
+Query language detection and routing
+Bengali script is recognised by codepoint range in one regex pass, and romanized
+Bengali ("Banglish") by its function words, so detection never builds per-call
+character sets. The detected language decides how a query is prepared: whether
+it goes through Bengali normalization, which words are transliterated into
+Bengali script before searching the Bengali-only index, whether it may be
+translated by the LLM first, and which prompt template answers it
+"""
+
+import os
+import re
+import threading
+from typing import Dict, Tuple
+
+from bengali_normalizer import normalize_bengali_text
+
+LANGUAGES = ("bn", "en", "banglish")
+
+# Share of Bengali-block characters (U+0980-U+09FF) above which a query is Bengali;
+# the same 10% of the whole text the previous detector used
+BENGALI_SHARE = 0.1
+_NON_BENGALI = re.compile('[^ঀ-৿]+')
+_LATIN_WORD = re.compile('[A-Za-z]+')
+
+# Words that only occur in romanized Bengali, mostly question words, pronouns and
+# verb forms (spelling variants included). Common English words such as "to", "a",
+# "so" or "me" are left out because they would misfire on English questions
+BANGLISH_MARKERS = frozenset({
+    'ki', 'kii', 'ke', 'kake', 'keno', 'kno', 'kon', 'konta', 'koto', 'kto', 'kobe', 'kothay', 'kothai', 'kivabe',
+    'kemon', 'kar', 'kader', 'er', 'ar', 'ebong', 'kintu', 'na', 'nai', 'nei', 'ache', 'ase', 'achhe', 'chilo',
+    'silo', 'chhilo', 'chile', 'hoy', 'hoi', 'hoyeche', 'hoyechilo', 'holo', 'hobe', 'bole', 'bolo', 'bolen',
+    'bolechilo', 'boleche', 'bolechen', 'koren', 'kore', 'korechilo', 'koreche', 'korte', 'dilen', 'dilo',
+    'diyechilo', 'gelo', 'jabe', 'tar', 'tara', 'tader', 'tini', 'amar', 'ami', 'tumi',
+    'apni', 'apnar', 'tomar', 'eta', 'ota', 'oi', 'ei', 'shei', 'sei', 'keu', 'kichu', 'shomoy', 'somoy', 'nam',
+    'naam', 'boyos', 'boyosh', 'boyes', 'biye', 'bie', 'biya', 'golpo', 'golper', 'bhanga', 'venge', 'bhenge'
+})
+ENGLISH_MARKERS = frozenset({
+    'what', 'who', 'whom', 'whose', 'which', 'why', 'when', 'where', 'how', 'is', 'are', 'was', 'were', 'do',
+    'does', 'did', 'the', 'of', 'in', 'on', 'at', 'to', 'for', 'with', 'from', 'by', 'about', 'after', 'before',
+    'and', 'or', 'not', 'his', 'her', 'their', 'he', 'she', 'they', 'this', 'that', 'story', 'name', 'age',
+    'father', 'mother', 'uncle', 'wedding', 'marriage', 'called', 'say', 'said', 'tell', 'explain'
+})
+
+# Character names and story words as they are usually romanized, for searching the
+# Bengali chunks. Names are transliterated in English questions too
+STORY_NAMES = {
+    'anupam': 'অনুপম', 'anupom': 'অনুপম', 'onupam': 'অনুপম', 'onupom': 'অনুপম',
+    'kalyani': 'কল্যাণী', 'kallyani': 'কল্যাণী', 'kollyani': 'কল্যাণী', 'kolyani': 'কল্যাণী',
+    'shombhunath': 'শম্ভুনাথ', 'shambhunath': 'শম্ভুনাথ', 'sombhunath': 'শম্ভুনাথ', 'shambunath': 'শম্ভুনাথ',
+    'harish': 'হরিশ', 'horish': 'হরিশ', 'binu': 'বিনু', 'binudada': 'বিনুদাদা', 'binuda': 'বিনুদা',
+    'oporichita': 'অপরিচিতা', 'aparichita': 'অপরিচিতা', 'rabindranath': 'রবীন্দ্রনাথ', 'kanpur': 'কানপুর'
+}
+BANGLISH_WORDS = {
+    'mama': 'মামা', 'ma': 'মা', 'baba': 'বাবা', 'babar': 'বাবার', 'mamar': 'মামার', 'biye': 'বিয়ে', 'bie': 'বিয়ে',
+    'biyer': 'বিয়ের', 'boyos': 'বয়স', 'boyosh': 'বয়স', 'boyes': 'বয়স', 'golpo': 'গল্প', 'golper': 'গল্পের',
+    'nam': 'নাম', 'naam': 'নাম', 'er': 'এর', 'ke': 'কে', 'ki': 'কী', 'kii': 'কী', 'kake': 'কাকে', 'keno': 'কেন', 'kno': 'কেন',
+    'kon': 'কোন', 'koto': 'কত', 'kto': 'কত', 'kobe': 'কবে', 'kothay': 'কোথায়', 'kothai': 'কোথায়',
+    'kivabe': 'কীভাবে', 'kemon': 'কেমন', 'chilo': 'ছিল', 'silo': 'ছিল', 'chhilo': 'ছিল', 'ache': 'আছে',
+    'bole': 'বলে', 'bolechilo': 'বলেছিল', 'boleche': 'বলেছে', 'bolechen': 'বলেছেন', 'shomoy': 'সময়',
+    'somoy': 'সময়', 'bhagyo': 'ভাগ্য', 'bhaggo': 'ভাগ্য', 'vaggo': 'ভাগ্য', 'debota': 'দেবতা', 'devota': 'দেবতা',
+    'shupurush': 'সুপুরুষ', 'supurush': 'সুপুরুষ', 'joutuk': 'যৌতুক', 'jotuk': 'যৌতুক', 'gohona': 'গহনা',
+    'gohonar': 'গহনার', 'station': 'স্টেশন', 'tren': 'ট্রেন', 'train': 'ট্রেন', 'bhanga': 'ভাঙা',
+    'bhenge': 'ভেঙে', 'venge': 'ভেঙে', 'meye': 'মেয়ে', 'chele': 'ছেলে', 'bondhu': 'বন্ধু', 'lekhok': 'লেখক'
+}
+_BANGLISH_LEXICON = {**BANGLISH_WORDS, **STORY_NAMES}
+
+# Prompt wording per language; None is used when routing is disabled
+LANGUAGE_INSTRUCTIONS = {
+    None: (
+        "- If the question is in Bengali, respond in Bengali\n"
+        "- If the question is in English, respond in English\n"
+        "- Match the language of your response to the language of the question"
+    ),
+    "bn": "- The question is in Bengali: respond in Bengali",
+    "en": (
+        "- The question is in English: respond in English\n"
+        "- The story context is in Bengali: translate what you use, and write character names as in the list below"
+    ),
+    "banglish": (
+        "- The question is Bengali written in Latin letters (Banglish): respond in Bengali script\n"
+        "- Read romanized names and words as their Bengali originals (e.g. \"Anupam er mama\" = \"অনুপমের মামা\")"
+    )
+}
+
+TRANSLATION_PROMPT = """Translate this question about Rabindranath Tagore's Bengali story "Oporichita" into Bengali script, for searching the Bengali text of the story. The question is {language_name}. Reply with the translated question only.
+
+Question: {question}
+
+Bengali:"""
+_LANGUAGE_NAMES = {"en": "in English", "banglish": "Bengali written in Latin letters (Banglish)"}
+
+
+def detect_language(text: str) -> str:
+    """"bn" for Bengali script, "banglish" for romanized Bengali, otherwise "en" """
+    if not text.isascii():
+        bengali_chars = len(_NON_BENGALI.sub('', text))
+        if bengali_chars > len(text) * BENGALI_SHARE:
+            return "bn"
+    words = [word.lower() for word in _LATIN_WORD.findall(text)]
+    banglish = sum(1 for word in words if word in BANGLISH_MARKERS)
+    return "banglish" if banglish and banglish > sum(1 for word in words if word in ENGLISH_MARKERS) else "en"
+
+
+def transliterate(text: str, lexicon: Dict[str, str]) -> Tuple[str, int]:
+    """Replace romanized words found in lexicon with Bengali script; returns (text, words replaced)"""
+    replaced = 0
+
+    def replace(match) -> str:
+        nonlocal replaced
+        bengali = lexicon.get(match.group(0).lower())
+        if bengali is None:
+            return match.group(0)
+        replaced += 1
+        return bengali
+
+    return _LATIN_WORD.sub(replace, text), replaced
+
+
+class LanguageRouter:
+    """Detects a query's language and prepares it for the matching path"""
+
+    def __init__(self, enabled: bool = True, transliteration: bool = True, translation: bool = False):
+        self.enabled = enabled
+        self.transliteration = transliteration
+        self.translation = translation
+        self._lock = threading.Lock()
+        self.counters = {f"{language}_queries": 0 for language in LANGUAGES}
+        self.counters.update({"transliterated_queries": 0, "normalization_skipped": 0})
+
+    def route(self, query: str, language: str = "auto") -> Dict:
+        """Decide how to handle one query
+
+        Returns the query to answer ("query"), the text to search with ("search_text"),
+        the language, and the routing decisions for the response metadata.
+        """
+        if language not in LANGUAGES:
+            language = detect_language(query)
+        if not self.enabled:
+            query = normalize_bengali_text(query)
+            return {"language": language, "query": query, "search_text": query,
+                    "prompt": None, "question_bank": True, "translate": False, "decisions": {"routing": False}}
+
+        # Only text with Bengali script needs the Bengali normalizer; other queries just
+        # get their whitespace collapsed
+        normalize = language == "bn" or not query.isascii()
+        query = normalize_bengali_text(query) if normalize else " ".join(query.split())
+
+        search_text, transliterated = query, 0
+        if self.transliteration and language != "bn":
+            search_text, transliterated = transliterate(query, STORY_NAMES if language == "en" else _BANGLISH_LEXICON)
+
+        with self._lock:
+            self.counters[f"{language}_queries"] += 1
+            self.counters["transliterated_queries"] += transliterated > 0
+            self.counters["normalization_skipped"] += not normalize
+        return {
+            "language": language,
+            "query": query,
+            "search_text": search_text,
+            "prompt": language,
+            # The question bank only holds Bengali questions
+            "question_bank": language == "bn",
+            "translate": self.translation and language != "bn",
+            "decisions": {
+                "normalized": normalize,
+                "transliterated_words": transliterated,
+                "prompt": language
+            }
+        }
+
+    @staticmethod
+    def translation_prompt(query: str, language: str) -> str:
+        return TRANSLATION_PROMPT.format(language_name=_LANGUAGE_NAMES.get(language, "in English"), question=query)
+
+    def stats(self) -> Dict:
+        return {"enabled": self.enabled, "transliteration": self.transliteration,
+                "translation": self.translation, **self.counters}
+
+
+def create_language_router() -> LanguageRouter:
+    """Build the router from environment configuration"""
+    return LanguageRouter(
+        enabled=os.getenv("LANGUAGE_ROUTING_ENABLED", "true").lower() == "true",
+        transliteration=os.getenv("QUERY_TRANSLITERATION_ENABLED", "true").lower() == "true",
+        translation=os.getenv("QUERY_TRANSLATION_ENABLED", "false").lower() == "true"
+    )
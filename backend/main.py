@@ -1,19 +1,34 @@
 import os
 import json
-import re
-import unicodedata
-from typing import List, Dict, Optional
-from fastapi import FastAPI, HTTPException
+import asyncio
+from contextlib import asynccontextmanager, contextmanager
+from typing import List, Dict, Optional, Tuple, AsyncIterator
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, JSONResponse, PlainTextResponse
 from pydantic import BaseModel
-from langchain_google_genai import GoogleGenerativeAIEmbeddings, ChatGoogleGenerativeAI
 from langchain_community.vectorstores import Chroma
-from langchain.chains import RetrievalQA
 from langchain.prompts import PromptTemplate
 from langchain.schema import Document
 from dotenv import load_dotenv
 import logging
+import time
 from datetime import datetime
+from session_memory import ConversationMemory, create_memory_store
+from answer_cache import create_answer_cache
+from embedding_cache import CachedEmbeddings, create_cached_embeddings
+from hybrid_retrieval import create_hybrid_retriever
+from vector_index import create_vector_index
+from vector_snapshot import load_snapshot_store
+from context_packing import create_context_packer
+from single_flight import create_single_flight
+from question_bank import create_question_bank, format_answer, format_context, format_question
+from language_routing import LANGUAGE_INSTRUCTIONS, create_language_router, detect_language
+from concurrency import LimitedEmbeddings, Overloaded, create_limiter, request_timeout
+from providers import (create_embeddings, create_llm, embedding_model_id, llm_settings,
+                       recorded_embedding_model)
+import bengali_normalizer
+import metrics
 
 # Load environment variables
 load_dotenv()
@@ -28,44 +43,9 @@ class BengaliTextHelper:
     @staticmethod
     def normalize_bengali_text(text: str) -> str:
         """Enhanced Bengali Unicode normalization for story content"""
-        # Normalize Unicode to NFC (Canonical Decomposition, followed by Canonical Composition)
-        text = unicodedata.normalize('NFC', text)
-        
-        # Fix broken Bengali conjuncts commonly found in PDFs
-        conjunct_fixes = {
-            # Fix র্ + অন্য অক্ষর (র্ followed by other characters)
-            'র্ি': 'রি',      # র্ি -> রি  
-            'র্ব্': 'র্ব',      # র্ব্ -> র্ব (remove extra halant)
-            'র্ন': 'রন',      # র্ন -> রন
-            'র্ত': 'রত',      # র্ত -> রত
-            'র্চ': 'রচ',      # র্চ -> রচ
-            'র্ক': 'রক',      # র্ক -> রক
-            'র্ম': 'রম',      # র্ম -> রম
-            'র্প': 'রপ',      # র্প -> রপ
-            'র্ল': 'রল',      # র্ল -> রল
-            'র্স': 'রস',      # র্স -> রস
-            'র্গ': 'রগ',      # র্গ -> রগ
-            'র্থ': 'রথ',      # র্থ -> রথ
-            'র্ভ': 'রভ',      # র্ভ -> রভ
-            'র্দ': 'রদ',      # র্দ -> রদ
-            'র্জ': 'রজ',      # র্জ -> রজ
-            
-            # Clean up zero-width characters
-            '\u200c': '',     # Remove ZWNJ (Zero Width Non-Joiner)
-            '\u200d': '',     # Remove ZWJ (Zero Width Joiner)
-            '\ufeff': '',     # Remove BOM (Byte Order Mark)
-        }
-        
-        # Apply fixes
-        for broken, fixed in conjunct_fixes.items():
-            text = text.replace(broken, fixed)
-        
-        # Clean up extra whitespace
-        text = re.sub(r'\s+', ' ', text)
-        text = text.strip()
-        
-        return text
-    
+        return bengali_normalizer.normalize_bengali_text(text)
+
+
     @staticmethod
     def extract_character_info(context: str, character_name: str) -> str:
         """Extract information about a specific character from story context"""
@@ -76,7 +56,8 @@ class BengaliTextHelper:
 # Pydantic models
 class QueryRequest(BaseModel):
     query: str
-    language: Optional[str] = "auto"  # "en", "bn", or "auto"
+    language: Optional[str] = "auto"  # "en", "bn", "banglish" or "auto"
+    session_id: Optional[str] = None  # Keeps conversation history per student
 
 class QueryResponse(BaseModel):
     answer: str
@@ -84,109 +65,191 @@ class QueryResponse(BaseModel):
     confidence_score: Optional[float] = None
     metadata: Dict
 
-class ConversationMemory:
-    """Simple conversation memory to maintain short-term context"""
-    
-    def __init__(self, max_history: int = 5):
-        self.max_history = max_history
-        self.history = []
-    
-    def add_exchange(self, query: str, answer: str):
-        """Add a query-answer pair to history"""
-        self.history.append({
-            "query": query,
-            "answer": answer,
-            "timestamp": datetime.now().isoformat()
-        })
-        
-        # Keep only recent history
-        if len(self.history) > self.max_history:
-            self.history = self.history[-self.max_history:]
-    
-    def get_context(self) -> str:
-        """Get formatted conversation history"""
-        if not self.history:
-            return ""
-        
-        context = "Previous conversation:\n"
-        for exchange in self.history[-3:]:  # Last 3 exchanges
-            context += f"Q: {exchange['query']}\nA: {exchange['answer']}\n\n"
-        
-        return context
+class BatchQueryRequest(BaseModel):
+    queries: List[QueryRequest]
+    stream: Optional[bool] = False  # Stream results as NDJSON lines instead of one JSON body
+
+class BatchItemResult(BaseModel):
+    index: int
+    response: Optional[QueryResponse] = None
+    error: Optional[str] = None
+
+class BatchQueryResponse(BaseModel):
+    results: List[BatchItemResult]
+    metadata: Dict
 
 class RAGSystem:
     """Main RAG system with multilingual support"""
     
     def __init__(self):
-        self.google_api_key = os.getenv("GOOGLE_API_KEY")
         self.persist_directory = os.getenv("CHROMADB_PATH", "./chroma_db_story_focused")  # Use story-focused vector store
+        # The concrete store version the live path (a symlink after ingestion) named at load time
+        self.store_directory = self.persist_directory
+        # A single-file snapshot (vector_snapshot.py) replaces the Chroma directory when set
+        self.snapshot_path = os.getenv("VECTOR_SNAPSHOT_PATH") or None
+        self.startup_timings: Dict[str, float] = {}  # Milliseconds per component, reported by /readyz
         
-        if not self.google_api_key:
-            raise ValueError("GOOGLE_API_KEY not found in environment variables")
+        # Initialize components from the configured providers (query embeddings are cached in memory and on disk)
+        self.embedding_model_id = embedding_model_id()
+        self.llm_provider, self.llm_model = llm_settings()
         
-        # Initialize components
-        self.embeddings = GoogleGenerativeAIEmbeddings(
-            model="models/text-embedding-004",
-            google_api_key=self.google_api_key
-        )
+        # Bounded provider concurrency: a burst queues briefly, then gets 429/503 instead of
+        # every request hitting the provider's rate limit at once
+        self.llm_limiter = create_limiter("llm", "LLM", limit=8, max_queue=64, queue_timeout=10.0)
+        self.embedding_limiter = create_limiter("embedding", "EMBEDDING", limit=16, max_queue=128, queue_timeout=5.0)
+        self.request_timeout = request_timeout()
         
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-1.5-flash",
-            google_api_key=self.google_api_key,
-            temperature=0.7,  # Increased for more creative reasoning
-            max_tokens=2048,  # Allow longer responses
-            top_p=0.9  # Better diversity in responses
-        )
+        with self._timed("embeddings"):
+            # The query-task copy embeds many queries in one call for /chat/batch
+            # (cache hits never take an embedding slot: the limiter sits below the cache)
+            self.query_batch_embeddings = LimitedEmbeddings(create_embeddings(task="query"), self.embedding_limiter)
+            self.embeddings = create_cached_embeddings(
+                LimitedEmbeddings(create_embeddings(), self.embedding_limiter),
+                model_name=self.embedding_model_id,
+                query_batch=self.query_batch_embeddings
+            )
+        self.batch_concurrency = int(os.getenv("BATCH_CONCURRENCY", "8"))
         
-        # Load vector store
-        self.vectorstore = self._load_vector_store()
-        self.retriever = self.vectorstore.as_retriever(
-            search_type="similarity_score_threshold",
-            search_kwargs={
-                "k": 8,  # Get more context for story content
-                "score_threshold": 0.3  # Adjusted for story content
-            }
-        )
+        with self._timed("llm"):
+            self.llm = create_llm(self.llm_provider, self.llm_model)
         
-        # Conversation memory
-        self.memory = ConversationMemory()
+        # Load vector store, fused with a local BM25 keyword index over the same chunks
+        with self._timed("vector_store"):
+            self.vectorstore = self._load_vector_store()
+        # Optional NumPy index searched instead of Chroma's HNSW (memory-mapped or in-memory)
+        with self._timed("vector_index"):
+            if self.snapshot_path:
+                self.vector_index = self.vectorstore.index
+            else:
+                self.vector_index = create_vector_index(
+                    self.vectorstore._collection, self.store_directory, self.embedding_model_id
+                )
+        if self.vector_index is not None:
+            logger.info(f"{type(self.vector_index).__name__} loaded ({len(self.vector_index)} vectors)")
+        with self._timed("keyword_index"):
+            self.retriever = create_hybrid_retriever(self.vectorstore, self.vector_index)
+        logger.info(f"Keyword index built over {len(self.retriever.keyword_index)} chunks ({self.retriever.mode} retrieval)")
         
-        # Create prompt template
-        self.prompt_template = self._create_prompt_template()
+        # Exam questions extracted at ingestion, answered without retrieval or the LLM
+        with self._timed("question_bank"):
+            self.question_bank = create_question_bank(
+                self.store_directory,
+                self.vector_index.extras.get("question_bank") if self.snapshot_path else None
+            )
+        if self.question_bank is not None:
+            logger.info(f"Question bank loaded ({len(self.question_bank)} questions)")
         
-        # Create QA chain
-        self.qa_chain = RetrievalQA.from_chain_type(
-            llm=self.llm,
-            chain_type="stuff",
-            retriever=self.retriever,
-            return_source_documents=True,
-            chain_type_kwargs={"prompt": self.prompt_template}
-        )
+        # Per-session conversation memory
+        with self._timed("memory_store"):
+            self.memory_store = create_memory_store()
+        
+        # Answer cache for repeated questions (invalidated when the vector store changes)
+        with self._timed("answer_cache"):
+            self.answer_cache = create_answer_cache()
+        
+        # Detected query language picks the normalization, search text and prompt template
+        self.language_router = create_language_router()
+        logger.info(f"Language routing {'enabled' if self.language_router.enabled else 'disabled'} "
+                    f"(transliteration: {self.language_router.transliteration}, translation: {self.language_router.translation})")
+        
+        # Prompt template per language (filled per query, so answers can be generated or streamed)
+        self.prompt_templates = {
+            language: self._create_prompt_template(language) for language in LANGUAGE_INSTRUCTIONS
+        }
+        
+        # Merges, ranks and budgets retrieved chunks and shortens older history turns
+        self.context_packer = create_context_packer()
+        
+        # Concurrent identical questions without session history share one answer
+        self.single_flight = create_single_flight()
+        
+        # Per-stage breakdown of queries slower than SLOW_QUERY_MS
+        self.slow_query_log = metrics.create_slow_query_log()
+    
+    @contextmanager
+    def _timed(self, component: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.startup_timings[component] = round((time.perf_counter() - started) * 1000, 3)
+    
+    async def warm_up(self) -> List[str]:
+        """Load the Chroma collection and HNSW index and issue one embedding; returns warnings"""
+        warnings = []
+        with self._timed("warmup_collection"):
+            await asyncio.to_thread(self.vectorstore._collection.count)
+        
+        try:
+            with self._timed("warmup_embedding"):
+                embedding = await asyncio.wait_for(
+                    self.embeddings.aembed_query("অনুপম"),
+                    timeout=float(os.getenv("STARTUP_WARMUP_TIMEOUT", "10"))
+                )
+            # The first query loads the HNSW index from disk
+            with self._timed("warmup_vector_search"):
+                await asyncio.to_thread(self.retriever._vector_search, embedding)
+        except Exception as e:
+            # Keyword retrieval still answers, so a slow embedding service does not block readiness
+            warnings.append(f"embedding warm-up failed: {str(e) or type(e).__name__}")
+        return warnings
     
     def _load_vector_store(self) -> Chroma:
         """Load the vector store"""
-        if not os.path.exists(self.persist_directory):
+        store_path = self.snapshot_path or self.persist_directory
+        if not os.path.exists(store_path):
             raise FileNotFoundError(
-                f"Vector store not found at {self.persist_directory}. "
+                f"Vector store not found at {store_path}. "
                 "Please run the ingestion script first."
             )
         
-        vectorstore = Chroma(
-            persist_directory=self.persist_directory,
-            embedding_function=self.embeddings
-        )
+        if self.snapshot_path:
+            vectorstore = load_snapshot_store(self.snapshot_path, self.embeddings)
+            recorded_model = vectorstore.index.embedding_model
+        else:
+            # Pinned to one version: ingestion swaps the symlink, and Chroma opens its SQLite
+            # connections lazily, so going through the link could pair new data with this index
+            self.store_directory = os.path.realpath(self.persist_directory)
+            vectorstore = Chroma(
+                persist_directory=self.store_directory,
+                embedding_function=self.embeddings
+            )
+            recorded_model = recorded_embedding_model(vectorstore._collection)
+        
+        # Vectors from a different embedding model would silently return unrelated chunks
+        if recorded_model is None:
+            logger.warning(
+                f"⚠️ Vector store does not record its embedding model, assuming {self.embedding_model_id}. "
+                "Re-run ingestion to record it."
+            )
+        elif recorded_model != self.embedding_model_id:
+            raise ValueError(
+                f"Vector store at {store_path} was built with {recorded_model} but the server is "
+                f"configured for {self.embedding_model_id}. Set EMBEDDING_PROVIDER and its model (e.g. GOOGLE_EMBEDDING_MODEL) to match "
+                "or re-run ingestion."
+            )
         
-        logger.info("Vector store loaded successfully")
+        logger.info(f"Vector store loaded successfully from {self.snapshot_path or self.store_directory} ({self.embedding_model_id})")
         return vectorstore
     
-    def _create_prompt_template(self) -> PromptTemplate:
-        """Create a prompt template focused on story comprehension and character analysis"""
+    def _vector_store_fingerprint(self) -> str:
+        """Cheap identity of the on-disk vector store, changes whenever it is rebuilt"""
+        store_file = self.snapshot_path or os.path.join(self.persist_directory, "chroma.sqlite3")
+        try:
+            stat = os.stat(store_file)
+            return f"{stat.st_ino}:{stat.st_mtime_ns}:{stat.st_size}"
+        except OSError:
+            return "missing"
+    
+    def _create_prompt_template(self, language: Optional[str] = None) -> PromptTemplate:
+        """Create a prompt template focused on story comprehension and character analysis
+        
+        The language instruction is worded for the detected language (None: any language).
+        """
         template = """You are an intelligent AI assistant for Bengali literature, specifically expert in Rabindranath Tagore's "Oporichita" (The Stranger) story. Your job is to answer questions based on the story content.
 
 **IMPORTANT LANGUAGE INSTRUCTION:**
-- If the question is in Bengali, respond in Bengali
-- If the question is in English, respond in English
-- Match the language of your response to the language of the question
+{language_instruction}
 
 Your expertise includes:
 1. **Story Analysis**: Characters, events, situations from the story
@@ -209,6 +272,8 @@ Response Guidelines:
 ✓ Give clear and concise answers in the appropriate language
 ✓ Provide story examples when needed
 ✓ If information is not available, say "This information is not clear in the story"
+✓ If the context starts with an exam question from the book, answer with its marked option, written
+  correctly (the extracted option text may be misspelled)
 
 Context from story:
 {context}
@@ -219,91 +284,669 @@ Answer:"""
 
         return PromptTemplate(
             template=template,
-            input_variables=["context", "question"]
+            input_variables=["context", "question"],
+            partial_variables={"language_instruction": LANGUAGE_INSTRUCTIONS[language]}
         )
     
     def detect_language(self, text: str) -> str:
-        """Simple language detection"""
-        bengali_chars = set('অআইঈউঊঋএঐওঔকখগঘঙচছজঝঞটঠডঢণতথদধনপফবভমযরলশষসহড়ঢ়য়ৎংঃঁািীুূৃেৈোৌ্')
-        bengali_count = sum(1 for char in text if char in bengali_chars)
+        """"bn", "en" or "banglish" (romanized Bengali)"""
+        return detect_language(text)
+    
+    def _load_request(self, query_text: str, language: str, session_id: Optional[str],
+                      query_embedding: Optional[List[float]] = None, route: Optional[Dict] = None) -> Dict:
+        """Route the query by language and load the session history into a fresh request state"""
+        timings: Dict[str, float] = {}
+        
+        # Each request works on its own copy of the session history
+        started = time.perf_counter()
+        memory = self.memory_store.get(session_id)
+        timings["memory_load_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        
+        # Detect the language (if auto) and normalize or transliterate the query for it
+        started = time.perf_counter()
+        route = route or self._route(query_text, language)
+        query_text, language = route["query"], route["language"]
+        timings["normalization_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        
+        # Known exam question: answered from the bank when close enough, else pinned into the prompt
+        entry = None
+        if self.question_bank is not None and route["question_bank"]:
+            started = time.perf_counter()
+            entry = self.question_bank.lookup(query_text)
+            timings["question_bank_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        
+        # Get conversation context (older turns shortened to fit the history budget)
+        context_history = self.context_packer.format_history(memory.history)
+        
+        state = {
+            "memory": memory,
+            "query_text": query_text,
+            "language": language,
+            "route": route,
+            # What the indexes are searched with: transliterated (or later translated) for non-Bengali queries
+            "search_text": route["search_text"],
+            "session_id": session_id,
+            # Answers only depend on the question itself when there is no session history
+            "has_history": bool(context_history),
+            "use_cache": self.answer_cache is not None and not context_history,
+            "query_embedding": query_embedding,
+            "cached_response": None,
+            "question_bank_entry": entry,
+            "timings": timings
+        }
+        
+        # Modify the query input to include conversation history
+        state["history_prefix"] = f"{context_history}\nCurrent question: " if context_history else ""
+        state["enhanced_query"] = state["history_prefix"] + query_text
+        state["retrieval_query"] = state["history_prefix"] + state["search_text"]
         
-        if bengali_count > len(text) * 0.1:  # More than 10% Bengali characters
-            return "bn"
-        return "en"
+        return state
     
-    async def query(self, query_text: str, language: str = "auto") -> QueryResponse:
-        """Process a query and return response with intelligent reasoning"""
+    def _route(self, query_text: str, language: str) -> Dict:
+        route = self.language_router.route(query_text, language)
+        decisions = route["decisions"]
+        metrics.LANGUAGE_ROUTES.inc(
+            language=route["language"],
+            normalized=str(decisions.get("normalized", True)).lower(),
+            transliterated=str(decisions.get("transliterated_words", 0) > 0).lower()
+        )
+        logger.debug(f"Routed {route['language']} query: {decisions}")
+        return route
+    
+    async def _translate_for_retrieval(self, state: Dict):
+        """Translate a non-Bengali question into Bengali for searching, when the route asks for it
+        
+        The answer is still generated for the original question; on failure the
+        transliterated text is searched instead.
+        """
+        if not state["route"]["translate"]:
+            return
+        started = time.perf_counter()
         try:
-            # Normalize Bengali text in query
-            query_text = BengaliTextHelper.normalize_bengali_text(query_text)
-            
-            # Detect language if auto
-            if language == "auto":
-                language = self.detect_language(query_text)
-            
-            # Get conversation context
-            context_history = self.memory.get_context()
-            
-            # Modify the query input to include conversation history
-            enhanced_query = query_text
-            if context_history:
-                enhanced_query = f"{context_history}\nCurrent question: {query_text}"
-            
-            # Get response from QA chain
-            result = await self.qa_chain.ainvoke({
-                "query": enhanced_query
-            })
-            
-            answer = result["result"]
-            source_docs = result["source_documents"]
-            
-            # Normalize Bengali text in answer and context chunks
-            answer = BengaliTextHelper.normalize_bengali_text(answer)
-            
-            # Extract and normalize context chunks
-            context_chunks = []
-            for doc in source_docs:
-                normalized_chunk = BengaliTextHelper.normalize_bengali_text(doc.page_content)
-                context_chunks.append(normalized_chunk)
-            
-            # Let Gemini do the reasoning instead of rigid MCQ extraction
-            # Only do basic cleanup
-            if answer.strip() == "" or len(answer.strip()) < 5:
-                answer = "তথ্যে এই উত্তর পাওয়া যায়নি।"
-            
-            # Calculate confidence based on answer quality and source relevance
-            confidence = 0.8 if len(source_docs) >= 3 and "তথ্যে এই উত্তর পাওয়া যায়নি" not in answer else 0.3
-            
-            # Prepare metadata
-            metadata = {
-                "detected_language": language,
-                "num_sources": len(source_docs),
-                "timestamp": datetime.now().isoformat(),
-                "source_pages": [doc.metadata.get("page", "unknown") for doc in source_docs],
-                "reasoning_mode": True,
-                "gemini_processing": True
-            }
-            
-            # Add to conversation memory
-            self.memory.add_exchange(query_text, answer)
-            
-            return QueryResponse(
-                answer=answer,
-                context_chunks=context_chunks,
-                confidence_score=confidence,
-                metadata=metadata
+            async with self.llm_limiter.slot():
+                result = await self.llm.ainvoke(
+                    self.language_router.translation_prompt(state["query_text"], state["language"])
+                )
+            translation = BengaliTextHelper.normalize_bengali_text(result.content)
+            if translation:
+                state["search_text"] = translation
+                state["retrieval_query"] = state["history_prefix"] + translation
+                state["route"]["decisions"]["translated"] = True
+        except Overloaded:
+            raise
+        except Exception as e:
+            logger.warning(f"Query translation failed, searching the transliterated text: {str(e)}")
+        state["timings"]["translation_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    
+    async def _check_answer_cache(self, state: Dict, semantic_lookup: bool = True):
+        """Set state["cached_response"] when either answer cache tier has this question"""
+        if not state["use_cache"]:
+            return
+        started = time.perf_counter()
+        query_text, language = state["query_text"], state["language"]
+        self.answer_cache.check_store(self._vector_store_fingerprint())
+        cached = self.answer_cache.get_exact(query_text, language)
+        cache_tier = "exact"
+        if cached is None and self.answer_cache.semantic_enabled and semantic_lookup:
+            try:
+                if state["query_embedding"] is None:
+                    # Same text retrieval embeds, so a miss reuses this embedding from the cache
+                    state["query_embedding"] = await self.embeddings.aembed_query(state["search_text"])
+                semantic_hit = self.answer_cache.get_semantic(state["query_embedding"], language)
+            except Overloaded:
+                semantic_hit = None  # Skip the semantic tier rather than fail while embeddings are saturated
+            if semantic_hit is not None:
+                cached, _ = semantic_hit
+                cache_tier = "semantic"
+        state["timings"]["cache_lookup_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        if cached is not None:
+            state["cached_response"] = self._response_from_cache(
+                cached, cache_tier, query_text, state["session_id"], state["memory"]
             )
-            
+            state["cache_tier"] = cache_tier
+            return
+        self.answer_cache.record_miss()
+    
+    def _build_prompt(self, state: Dict, source_docs: List[Document]) -> str:
+        """Fill the story prompt with the packed chunks, joined like the stuff-documents chain does"""
+        started = time.perf_counter()
+        # A matched exam question always goes first, outside the packing budget
+        pinned = [doc for doc in source_docs if doc.metadata.get("question_bank")]
+        packed_docs, state["context_packing"] = self.context_packer.pack(
+            [doc for doc in source_docs if not doc.metadata.get("question_bank")]
+        )
+        context = "\n\n".join(doc.page_content for doc in pinned + packed_docs)
+        template = self.prompt_templates[state["route"]["prompt"]]
+        state["prompt"] = template.format(context=context, question=state["enhanced_query"])
+        state["prompt_tokens"] = metrics.estimate_tokens(state["prompt"])
+        state["timings"]["prompt_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        return state["prompt"]
+    
+    def _finalize(self, state: Dict, answer: str, source_docs: List[Document],
+                  retrieval_info: Dict, timings: Dict, endpoint: str, started: float) -> QueryResponse:
+        """Normalize the answer, score it, update memory and the answer cache, record metrics"""
+        postprocess_started = time.perf_counter()
+        
+        # Normalize Bengali text in answer and context chunks
+        answer = BengaliTextHelper.normalize_bengali_text(answer)
+        
+        # Extract and normalize context chunks
+        context_chunks = []
+        for doc in source_docs:
+            normalized_chunk = BengaliTextHelper.normalize_bengali_text(doc.page_content)
+            context_chunks.append(normalized_chunk)
+        
+        # Let Gemini do the reasoning instead of rigid MCQ extraction
+        # Only do basic cleanup
+        if answer.strip() == "" or len(answer.strip()) < 5:
+            answer = "তথ্যে এই উত্তর পাওয়া যায়নি।"
+        
+        # Calculate confidence based on answer quality and source relevance
+        confidence = 0.8 if len(source_docs) >= 3 and "তথ্যে এই উত্তর পাওয়া যায়নি" not in answer else 0.3
+        
+        # Prepare metadata
+        metadata = {
+            **self._retrieval_metadata(state, source_docs, retrieval_info),
+            "timestamp": datetime.now().isoformat(),
+            "reasoning_mode": True,
+            "gemini_processing": True,
+            "session_id": state["session_id"],
+            "prompt_tokens": state.get("prompt_tokens"),
+            "context_packing": state.get("context_packing")
+        }
+        
+        # Add to conversation memory
+        state["memory"].add_exchange(state["query_text"], answer)
+        self.memory_store.save(state["session_id"], state["memory"])
+        
+        response = QueryResponse(
+            answer=answer,
+            context_chunks=context_chunks,
+            confidence_score=confidence,
+            metadata=metadata
+        )
+        
+        # Only cache answers that were actually found in the story
+        if state["use_cache"] and confidence >= 0.8:
+            self.answer_cache.put(state["query_text"], state["language"], state["query_embedding"], response.model_dump())
+        
+        timings = {
+            **metadata["timings_ms"],
+            **state["timings"],
+            **timings,
+            "postprocess_ms": round((time.perf_counter() - postprocess_started) * 1000, 3),
+            "total_ms": round((time.perf_counter() - started) * 1000, 3)
+        }
+        response.metadata["timings_ms"] = timings
+        
+        metrics.observe_query(endpoint, "answered" if confidence >= 0.8 else "not_found", timings)
+        metrics.observe_prompt(state.get("prompt", ""), answer)
+        metrics.RETRIEVALS.inc(mode=retrieval_info["mode"])
+        self.slow_query_log.record(
+            endpoint, state["query_text"], timings,
+            retrieval_mode=retrieval_info["mode"], num_sources=len(source_docs), session_id=state["session_id"],
+            language=state["language"], language_routing=state["route"]["decisions"]
+        )
+        return response
+    
+    @staticmethod
+    def _observe_cached(endpoint: str, state: Dict, started: float):
+        timings = {**state["timings"], "total_ms": round((time.perf_counter() - started) * 1000, 3)}
+        metrics.observe_query(endpoint, f"cache_{state['cache_tier']}", timings)
+    
+    @staticmethod
+    def _retrieval_metadata(state: Dict, source_docs: List[Document], retrieval_info: Dict) -> Dict:
+        metadata = {
+            "detected_language": state["language"],
+            "language_routing": state["route"]["decisions"],
+            "num_sources": len(source_docs),
+            "source_pages": [doc.metadata.get("page", "unknown") for doc in source_docs],
+            "retrieval_mode": retrieval_info["mode"],
+            "timings_ms": dict(retrieval_info["timings_ms"])
+        }
+        if "fallback_reason" in retrieval_info:
+            metadata["fallback_reason"] = retrieval_info["fallback_reason"]
+        if "postprocessing" in retrieval_info:
+            metadata["retrieval_postprocessing"] = retrieval_info["postprocessing"]
+        entry = state.get("question_bank_entry")
+        if entry is not None:
+            metadata["question_bank"] = {
+                "question": entry["question"],
+                "similarity": entry["similarity"],
+                "marked_option": format_answer(entry)
+            }
+        return metadata
+    
+    async def query(self, query_text: str, language: str = "auto", session_id: Optional[str] = None) -> QueryResponse:
+        """Process a query and return response with intelligent reasoning"""
+        try:
+            # Cancelled at the deadline; a coalesced leader keeps running for its followers
+            return await asyncio.wait_for(self._query(query_text, language, session_id), self.request_timeout)
+        except Overloaded as e:
+            metrics.ERRORS.inc(endpoint="chat", error=f"overloaded_{e.reason}")
+            raise
+        except asyncio.TimeoutError:
+            metrics.ERRORS.inc(endpoint="chat", error="TimeoutError")
+            logger.error(f"Query timed out after {self.request_timeout}s")
+            raise HTTPException(status_code=504, detail=f"Query timed out after {self.request_timeout:g}s")
         except Exception as e:
+            metrics.ERRORS.inc(endpoint="chat", error=type(e).__name__)
             logger.error(f"Error processing query: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
+    
+    async def _query(self, query_text: str, language: str, session_id: Optional[str]) -> QueryResponse:
+        started = time.perf_counter()
+        
+        state = self._load_request(query_text, language, session_id)
+        if self.single_flight is None or state["has_history"]:
+            return await self._answer(state, started)
+        
+        # Identical questions already in flight share one cache lookup, retrieval and generation
+        key = (state["query_text"], state["language"])
+        response, leader = await self.single_flight.do(key, lambda: self._answer(state, started))
+        if leader:
+            return response
+        shared = self._reuse_response(
+            response.model_dump(), state["query_text"], session_id, state["memory"], coalesced=True
+        )
+        metrics.observe_query("chat", "coalesced", {"total_ms": round((time.perf_counter() - started) * 1000, 3)})
+        return shared
+    
+    def _answer_from_question_bank(self, state: Dict, endpoint: str, started: float) -> Optional[QueryResponse]:
+        """Answer a known exam question with its stored answer, or None unless the match is confident"""
+        entry = state["question_bank_entry"]
+        if entry is None or not self.question_bank.answers_directly(entry):
+            return None
+        
+        answer = format_answer(entry)
+        state["memory"].add_exchange(state["query_text"], answer)
+        self.memory_store.save(state["session_id"], state["memory"])
+        
+        timings = {**state["timings"], "total_ms": round((time.perf_counter() - started) * 1000, 3)}
+        metrics.observe_query(endpoint, "question_bank", timings)
+        return QueryResponse(
+            answer=answer,
+            context_chunks=[BengaliTextHelper.normalize_bengali_text(format_question(entry))],
+            confidence_score=entry["similarity"],
+            metadata={
+                "detected_language": state["language"],
+                "language_routing": state["route"]["decisions"],
+                "num_sources": 1,
+                "source_pages": [entry["page"]],
+                "retrieval_mode": "question_bank",
+                "question_bank": {"question": entry["question"], "similarity": entry["similarity"]},
+                "timestamp": datetime.now().isoformat(),
+                "session_id": state["session_id"],
+                "timings_ms": timings
+            }
+        )
+    
+    def _pin_question_bank(self, state: Dict, source_docs: List[Document]) -> List[Document]:
+        """Put a fuzzily matched exam question ahead of the retrieved chunks
+        
+        Its option text comes straight from the PDF extractor and may belong to a
+        slightly different question, so it is given to the LLM as context only.
+        """
+        entry = state["question_bank_entry"]
+        if entry is None:
+            return source_docs
+        pinned = Document(page_content=format_context(entry), metadata={
+            "page": entry["page"], "source": entry["source"], "question_bank": True,
+            "question_bank_similarity": entry["similarity"]
+        })
+        return [pinned] + source_docs
+    
+    async def _answer(self, state: Dict, started: float, endpoint: str = "chat") -> QueryResponse:
+        """Answer from the question bank or the cache, or retrieve and generate for a loaded request"""
+        answered = self._answer_from_question_bank(state, endpoint, started)
+        if answered is not None:
+            return answered
+        await self._check_answer_cache(state)
+        if state["cached_response"] is not None:
+            self._observe_cached(endpoint, state, started)
+            return state["cached_response"]
+        
+        # Retrieve with per-stage timings, then generate the answer from the filled prompt
+        await self._translate_for_retrieval(state)
+        retrieval_started = time.perf_counter()
+        source_docs, retrieval_info = await self.retriever.aretrieve(state["retrieval_query"])
+        state["timings"]["retrieval_ms"] = round((time.perf_counter() - retrieval_started) * 1000, 3)
+        source_docs = self._pin_question_bank(state, source_docs)
+        
+        prompt = self._build_prompt(state, source_docs)
+        queued = time.perf_counter()
+        async with self.llm_limiter.slot():
+            generation_started = time.perf_counter()
+            result = await self.llm.ainvoke(prompt)
+        timings = {
+            "llm_queue_ms": round((generation_started - queued) * 1000, 3),
+            "generation_ms": round((time.perf_counter() - generation_started) * 1000, 3)
+        }
+        
+        return self._finalize(state, result.content, source_docs, retrieval_info, timings, endpoint, started)
+    
+    async def stream_query(self, query_text: str, language: str = "auto",
+                           session_id: Optional[str] = None) -> AsyncIterator[Tuple[str, Dict]]:
+        """Yield ("context", ...) after retrieval, ("token", ...) per generated chunk, then ("done", response)
+        
+        Raises asyncio.TimeoutError once the request has run longer than request_timeout.
+        """
+        started = time.perf_counter()
+        deadline = None if self.request_timeout is None else time.monotonic() + self.request_timeout
+        
+        state = self._load_request(query_text, language, session_id)
+        answered = self._answer_from_question_bank(state, "chat_stream", started)
+        if answered is None:
+            await self._check_answer_cache(state)
+            answered = state["cached_response"]
+            if answered is not None:
+                self._observe_cached("chat_stream", state, started)
+        if answered is not None:
+            yield "context", {"context_chunks": answered.context_chunks, "metadata": answered.metadata}
+            yield "token", {"text": answered.answer}
+            yield "done", answered.model_dump()
+            return
+        
+        await asyncio.wait_for(self._translate_for_retrieval(state), self._remaining(deadline))
+        retrieval_started = time.perf_counter()
+        source_docs, retrieval_info = await asyncio.wait_for(
+            self.retriever.aretrieve(state["retrieval_query"]), self._remaining(deadline)
+        )
+        state["timings"]["retrieval_ms"] = round((time.perf_counter() - retrieval_started) * 1000, 3)
+        source_docs = self._pin_question_bank(state, source_docs)
+        yield "context", {
+            "context_chunks": [BengaliTextHelper.normalize_bengali_text(doc.page_content) for doc in source_docs],
+            "metadata": self._retrieval_metadata(state, source_docs, retrieval_info)
+        }
+        
+        prompt = self._build_prompt(state, source_docs)
+        queued = time.perf_counter()
+        first_token_ms = None
+        parts = []
+        async with self.llm_limiter.slot():
+            generation_started = time.perf_counter()
+            chunks = self.llm.astream(prompt).__aiter__()
+            try:
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), self._remaining(deadline))
+                    except StopAsyncIteration:
+                        break
+                    if not chunk.content:
+                        continue
+                    if first_token_ms is None:
+                        first_token_ms = round((time.perf_counter() - started) * 1000, 3)
+                    parts.append(chunk.content)
+                    yield "token", {"text": chunk.content}
+            finally:
+                await chunks.aclose()
+        
+        timings = {
+            "llm_queue_ms": round((generation_started - queued) * 1000, 3),
+            "first_token_ms": first_token_ms,
+            "generation_ms": round((time.perf_counter() - generation_started) * 1000, 3)
+        }
+        response = self._finalize(state, "".join(parts), source_docs, retrieval_info, timings, "chat_stream", started)
+        yield "done", response.model_dump()
+
+    @staticmethod
+    def _remaining(deadline: Optional[float]) -> Optional[float]:
+        return None if deadline is None else max(0.0, deadline - time.monotonic())
+    
+    async def _embed_queries(self, texts: List[str]) -> List[List[float]]:
+        if isinstance(self.embeddings, CachedEmbeddings):
+            return await self.embeddings.aembed_queries(texts)
+        return await self.query_batch_embeddings.aembed_documents(texts)
+    
+    async def batch_query(self, requests: List[QueryRequest]) -> AsyncIterator[Tuple[int, Optional[QueryResponse], Optional[str]]]:
+        """Answer many queries, yielding (index, response, error) in request order
+        
+        All queries are embedded in one batched call and looked up in Chroma together;
+        only the LLM calls run per item, at most batch_concurrency at a time, each within
+        request_timeout. Later questions of a session already in the batch are answered
+        one after another, once the previous one is in the session history.
+        """
+        started = time.perf_counter()
+        errors: Dict[int, str] = {}
+        valid = [index for index, request in enumerate(requests) if request.query.strip()]
+        for index in set(range(len(requests))) - set(valid):
+            errors[index] = "Query cannot be empty"
+        
+        # Only the first question of each session takes part in the batched steps
+        batched: List[int] = []
+        follows: Dict[int, int] = {}  # Index -> previous index of the same session
+        last_of_session: Dict[str, int] = {}
+        for index in valid:
+            session_id = requests[index].session_id
+            if session_id is not None and session_id in last_of_session:
+                follows[index] = last_of_session[session_id]
+            else:
+                batched.append(index)
+            if session_id is not None:
+                last_of_session[session_id] = index
+        
+        # Session memory and question bank per item; known exam questions are answered here
+        # and skip the batched steps
+        routes = {index: self._route(requests[index].query, requests[index].language) for index in batched}
+        states: Dict[int, Dict] = {}
+        answered: Dict[int, QueryResponse] = {}
+        for index in batched:
+            request = requests[index]
+            # Queries are not translated here, which would cost an LLM call each before retrieval
+            routes[index]["translate"] = False
+            try:
+                states[index] = self._load_request(request.query, request.language, request.session_id,
+                                                   route=routes[index])
+                response = self._answer_from_question_bank(states[index], "chat_batch", started)
+                if response is not None:
+                    answered[index] = response
+            except Exception as e:
+                errors[index] = str(e)
+        batched = [index for index in batched if index in states and index not in answered]
+        
+        # 1. One embedding call for every remaining question (None if the embedding service fails)
+        search_texts = [routes[index]["search_text"] for index in batched]
+        embeddings = None
+        embedding_started = time.perf_counter()
+        try:
+            embeddings = await self._embed_queries(search_texts) if search_texts else []
+        except Exception as e:
+            logger.warning(f"Batch embedding failed, using keyword retrieval: {str(e)}")
+        embedding_ms = round((time.perf_counter() - embedding_started) * 1000, 3)
+        
+        # 2. Answer cache per item
+        for position, index in enumerate(batched):
+            state = states[index]
+            state["query_embedding"] = embeddings[position] if embeddings is not None else None
+            try:
+                await self._check_answer_cache(state, semantic_lookup=embeddings is not None)
+            except Exception as e:
+                errors[index] = str(e)
+        
+        # 3. One Chroma lookup for every question that still needs an answer
+        pending = [index for index in batched if index not in errors and states[index]["cached_response"] is None]
+        retrieval_texts = [states[index]["retrieval_query"] for index in pending]
+        retrieval_embeddings = None
+        if embeddings is not None and pending:
+            by_index = dict(zip(batched, embeddings))
+            retrieval_embeddings = [by_index[index] for index in pending]
+            # Questions with session history are retrieved with their history-enhanced text
+            with_history = [position for position, index in enumerate(pending)
+                            if states[index]["retrieval_query"] != states[index]["search_text"]]
+            if with_history:
+                try:
+                    extra = await self._embed_queries([retrieval_texts[position] for position in with_history])
+                    for position, vector in zip(with_history, extra):
+                        retrieval_embeddings[position] = vector
+                except Exception as e:
+                    logger.warning(f"Batch embedding failed, using keyword retrieval: {str(e)}")
+                    retrieval_embeddings = None
+        retrieved = {}
+        if pending:
+            # Up to BATCH_MAX_QUERIES searches: keep the event loop serving other requests meanwhile
+            results = await asyncio.to_thread(self.retriever.retrieve_many, retrieval_texts, retrieval_embeddings)
+            retrieved = dict(zip(pending, results))
+        
+        # 4. LLM calls with bounded concurrency
+        semaphore = asyncio.Semaphore(self.batch_concurrency)
+        
+        async def answer(index: int) -> QueryResponse:
+            if index in answered:
+                return answered[index]
+            state = states[index]
+            if state["cached_response"] is not None:
+                self._observe_cached("chat_batch", state, started)
+                return state["cached_response"]
+            source_docs, retrieval_info = retrieved[index]
+            # Loosely matched exam questions are pinned like on /chat
+            source_docs = self._pin_question_bank(state, source_docs)
+            prompt = self._build_prompt(state, source_docs)
+            async with semaphore, self.llm_limiter.slot():
+                generation_started = time.perf_counter()
+                result = await self.llm.ainvoke(prompt)
+            timings = {
+                "batch_embedding_ms": embedding_ms,
+                "generation_ms": round((time.perf_counter() - generation_started) * 1000, 3)
+            }
+            return self._finalize(state, result.content, source_docs, retrieval_info, timings, "chat_batch", started)
+        
+        async def answer_after(index: int, previous: int) -> QueryResponse:
+            # The previous question of the session must be in the history first, whatever its outcome
+            if previous in tasks:
+                await asyncio.wait([tasks[previous]])
+            request = requests[index]
+            item_started = time.perf_counter()
+            state = self._load_request(request.query, request.language, request.session_id)
+            return await asyncio.wait_for(self._answer(state, item_started, "chat_batch"), self.request_timeout)
+        
+        tasks: Dict[int, asyncio.Future] = {}
+        for index in valid:
+            if index in follows:
+                tasks[index] = asyncio.ensure_future(answer_after(index, follows[index]))
+            elif index in states and index not in errors:
+                tasks[index] = asyncio.ensure_future(asyncio.wait_for(answer(index), self.request_timeout))
+        try:
+            for index in range(len(requests)):
+                if index in errors:
+                    yield index, None, errors[index]
+                    continue
+                try:
+                    yield index, await tasks[index], None
+                except asyncio.TimeoutError:
+                    metrics.ERRORS.inc(endpoint="chat_batch", error="TimeoutError")
+                    logger.error(f"Batch item {index} timed out after {self.request_timeout}s")
+                    yield index, None, f"Query timed out after {self.request_timeout:g}s"
+                except Exception as e:
+                    metrics.ERRORS.inc(endpoint="chat_batch", error=type(e).__name__)
+                    logger.error(f"Batch item {index} failed: {str(e)}")
+                    yield index, None, str(e)
+        finally:
+            # A client that disconnects mid-stream should not leave LLM calls running
+            for task in tasks.values():
+                task.cancel()
+    
+    def _response_from_cache(self, cached: Dict, cache_tier: str, query_text: str,
+                             session_id: Optional[str], memory: ConversationMemory) -> QueryResponse:
+        """Rebuild a response from a cached answer with fresh per-request metadata"""
+        return self._reuse_response(cached, query_text, session_id, memory, answer_cache=cache_tier)
+    
+    def _reuse_response(self, shared: Dict, query_text: str, session_id: Optional[str],
+                        memory: ConversationMemory, **labels) -> QueryResponse:
+        """Copy a response computed for another request, recording it in this request's session"""
+        metadata = dict(shared["metadata"])
+        metadata.pop("timings_ms", None)  # Timings of the original request do not apply to this one
+        metadata.update({
+            "timestamp": datetime.now().isoformat(),
+            "session_id": session_id,
+            **labels
+        })
+        
+        memory.add_exchange(query_text, shared["answer"])
+        self.memory_store.save(session_id, memory)
+        
+        return QueryResponse(
+            answer=shared["answer"],
+            context_chunks=shared["context_chunks"],
+            confidence_score=shared["confidence_score"],
+            metadata=metadata
+        )
+
+# The RAG system is built in the background after the server starts accepting connections:
+# /livez answers immediately, /readyz only once every component is loaded and warmed up
+rag_system: Optional[RAGSystem] = None
+startup_state = {
+    "status": "starting",  # "starting", "ready" or "failed"
+    "error": None,
+    "warnings": [],
+    "attempts": 0,
+    "timings_ms": {}
+}
+
+async def initialize_rag_system():
+    """Build and warm up the RAG system, retrying on failure (e.g. before the first ingestion)"""
+    global rag_system
+    retry_seconds = float(os.getenv("STARTUP_RETRY_SECONDS", "30"))
+    
+    while True:
+        startup_state["attempts"] += 1
+        started = time.perf_counter()
+        try:
+            # Client construction, Chroma and the keyword index are blocking: keep the event loop free
+            system = await asyncio.to_thread(RAGSystem)
+            startup_state["warnings"] = await system.warm_up()
+            startup_state["timings_ms"] = {
+                **system.startup_timings,
+                "total": round((time.perf_counter() - started) * 1000, 3)
+            }
+            rag_system = system
+            startup_state.update(status="ready", error=None)
+            breakdown = ", ".join(f"{name} {ms:.0f} ms" for name, ms in startup_state["timings_ms"].items())
+            logger.info(f"✅ RAG system initialized successfully ({breakdown})")
+            for warning in startup_state["warnings"]:
+                logger.warning(f"⚠️ {warning}")
+            return
+        except Exception as e:
+            startup_state.update(status="failed", error=str(e))
+            logger.error(f"❌ Failed to initialize RAG system: {str(e)}")
+            if retry_seconds <= 0:
+                return
+            logger.info(f"Retrying RAG system initialization in {retry_seconds:.0f}s")
+            await asyncio.sleep(retry_seconds)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    startup_task = asyncio.create_task(initialize_rag_system())
+    yield
+    startup_task.cancel()
+
+async def overloaded_response(request: Request, exc: Overloaded) -> JSONResponse:
+    """429 when the queue is full, 503 when the wait in it ran out; both with Retry-After"""
+    return JSONResponse(
+        {"detail": str(exc), "limiter": exc.limiter, "reason": exc.reason},
+        status_code=exc.status_code,
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+def require_rag_system() -> RAGSystem:
+    """The ready RAG system, or a 503 that says why it is unavailable"""
+    if rag_system is not None:
+        return rag_system
+    if startup_state["status"] == "starting":
+        raise HTTPException(status_code=503, detail="RAG system is starting up", headers={"Retry-After": "5"})
+    raise HTTPException(
+        status_code=503,
+        detail=f"RAG system failed to initialize ({startup_state['error']}). Please check logs and run ingestion first.",
+        headers={"Retry-After": "30"}
+    )
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Multilingual RAG System",
     description="A RAG system that can handle queries in Bengali and English",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
+app.add_exception_handler(Overloaded, overloaded_response)
 
 # Health check endpoint
 @app.get("/health")
@@ -311,9 +954,10 @@ async def health_check():
     return {
         "status": "healthy", 
         "message": "RAG system is running", 
+        "startup": startup_state["status"],
         "models": {
-            "llm": "Google Gemini 1.5-flash",
-            "embeddings": "Google text-embedding-004"
+            "llm": f"{rag_system.llm_provider}:{rag_system.llm_model}" if rag_system else None,
+            "embeddings": rag_system.embedding_model_id if rag_system else None
         },
         "vector_db": "ChromaDB",
         "documents": "HSC Bangla Literature"
@@ -328,13 +972,40 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize RAG system
-try:
-    rag_system = RAGSystem()
-    logger.info("✅ RAG system initialized successfully")
-except Exception as e:
-    logger.error(f"❌ Failed to initialize RAG system: {str(e)}")
-    rag_system = None
+@app.middleware("http")
+async def record_http_metrics(request: Request, call_next):
+    """Count requests and time them per route (streaming responses are timed until headers are sent)"""
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # The route template, not the raw URL, keeps the label set small
+        route = request.scope.get("route")
+        path = route.path if route is not None else "unmatched"
+        metrics.HTTP_REQUESTS.inc(method=request.method, path=path, status=str(status))
+        metrics.HTTP_LATENCY.observe(time.perf_counter() - started, method=request.method, path=path)
+
+@app.get("/livez")
+async def livez():
+    """Liveness probe: the process is up and serving requests"""
+    return {"status": "alive"}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness probe: 200 only once the RAG system is loaded and warmed up"""
+    body = {
+        "status": startup_state["status"],
+        "attempts": startup_state["attempts"],
+        "startup_timings_ms": startup_state["timings_ms"]
+    }
+    if startup_state["error"]:
+        body["error"] = startup_state["error"]
+    if startup_state["warnings"]:
+        body["warnings"] = startup_state["warnings"]
+    return JSONResponse(body, status_code=200 if rag_system is not None else 503)
 
 @app.get("/")
 async def root():
@@ -348,22 +1019,91 @@ async def root():
 @app.post("/chat", response_model=QueryResponse)
 async def chat(request: QueryRequest):
     """Main chat endpoint for querying the RAG system"""
-    if not rag_system:
-        raise HTTPException(
-            status_code=503, 
-            detail="RAG system not initialized. Please check logs and run ingestion first."
-        )
+    require_rag_system()
     
     if not request.query.strip():
         raise HTTPException(status_code=400, detail="Query cannot be empty")
     
     try:
-        response = await rag_system.query(request.query, request.language)
+        response = await rag_system.query(request.query, request.language, request.session_id)
         return response
+    except (HTTPException, Overloaded):
+        raise
     except Exception as e:
         logger.error(f"Chat error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _sse(event: str, data: Dict) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.post("/chat/stream")
+async def chat_stream(request: QueryRequest):
+    """Streaming chat endpoint: context chunks, then answer tokens, then the final response as SSE"""
+    require_rag_system()
+    
+    if not request.query.strip():
+        raise HTTPException(status_code=400, detail="Query cannot be empty")
+    # Refuse before the stream starts when the LLM queue is already full
+    rag_system.llm_limiter.check_capacity()
+    
+    async def events():
+        started = time.perf_counter()
+        ttfb_ms = None
+        try:
+            async for event, data in rag_system.stream_query(request.query, request.language, request.session_id):
+                if ttfb_ms is None:
+                    ttfb_ms = round((time.perf_counter() - started) * 1000, 3)
+                if event == "done":
+                    data["metadata"].setdefault("timings_ms", {})["ttfb_ms"] = ttfb_ms
+                yield _sse(event, data)
+        except Exception as e:
+            metrics.ERRORS.inc(endpoint="chat_stream", error=type(e).__name__)
+            detail = "Query timed out" if isinstance(e, asyncio.TimeoutError) else str(e)
+            logger.error(f"Stream error: {detail}")
+            yield _sse("error", {"detail": detail})
+        total_ms = (time.perf_counter() - started) * 1000
+        logger.info(f"⏱️ /chat/stream TTFB {ttfb_ms} ms, total {total_ms:.1f} ms")
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/chat/batch")
+async def chat_batch(request: BatchQueryRequest):
+    """Answer a list of queries in one call; results keep the request order with per-item errors"""
+    require_rag_system()
+    
+    max_queries = int(os.getenv("BATCH_MAX_QUERIES", "200"))
+    if not request.queries:
+        raise HTTPException(status_code=400, detail="Batch cannot be empty")
+    if len(request.queries) > max_queries:
+        raise HTTPException(status_code=400, detail=f"Batch is limited to {max_queries} queries")
+    
+    if request.stream:
+        async def lines():
+            async for index, response, error in rag_system.batch_query(request.queries):
+                item = BatchItemResult(index=index, response=response, error=error)
+                yield json.dumps(item.model_dump(), ensure_ascii=False) + "\n"
+        
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+    
+    started = time.perf_counter()
+    results = [
+        BatchItemResult(index=index, response=response, error=error)
+        async for index, response, error in rag_system.batch_query(request.queries)
+    ]
+    return BatchQueryResponse(
+        results=results,
+        metadata={
+            "total": len(results),
+            "failed": sum(1 for result in results if result.error is not None),
+            "total_ms": round((time.perf_counter() - started) * 1000, 3)
+        }
+    )
+
 @app.get("/health")
 async def health_check():
     """Detailed health check"""
@@ -390,21 +1130,56 @@ async def health_check():
 @app.get("/stats")
 async def get_stats():
     """Get system statistics"""
-    if not rag_system:
-        raise HTTPException(status_code=503, detail="RAG system not initialized")
+    require_rag_system()
     
     try:
         collection_count = rag_system.vectorstore._collection.count()
         
         return {
             "total_documents": collection_count,
-            "memory_history_length": len(rag_system.memory.history),
-            "last_query_time": rag_system.memory.history[-1]["timestamp"] if rag_system.memory.history else None
+            "active_sessions": rag_system.memory_store.active_sessions(),
+            "last_query_time": rag_system.memory_store.last_activity(),
+            "answer_cache": rag_system.answer_cache.stats() if rag_system.answer_cache else None,
+            "embedding_cache": rag_system.embeddings.stats() if isinstance(rag_system.embeddings, CachedEmbeddings) else None,
+            "retrieval": rag_system.retriever.stats(),
+            "coalescing": rag_system.single_flight.stats() if rag_system.single_flight else None,
+            "question_bank": rag_system.question_bank.stats() if rag_system.question_bank else None,
+            "language_routing": rag_system.language_router.stats(),
+            "concurrency": {
+                "llm": rag_system.llm_limiter.stats(),
+                "embedding": rag_system.embedding_limiter.stats()
+            }
         }
     except Exception as e:
         logger.error(f"Stats error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus text-format metrics for this worker process"""
+    metrics.READY.set(1 if rag_system is not None else 0)
+    if rag_system is not None:
+        if rag_system.answer_cache:
+            metrics.set_stats(metrics.CACHE_STATS, rag_system.answer_cache.stats(), cache="answer")
+        if isinstance(rag_system.embeddings, CachedEmbeddings):
+            metrics.set_stats(metrics.CACHE_STATS, rag_system.embeddings.stats(), cache="embedding")
+        metrics.set_stats(metrics.RETRIEVAL_STATS, rag_system.retriever.stats())
+        if rag_system.single_flight:
+            metrics.set_stats(metrics.COALESCING_STATS, rag_system.single_flight.stats())
+        if rag_system.question_bank:
+            metrics.set_stats(metrics.CACHE_STATS, rag_system.question_bank.stats(), cache="question_bank")
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    workers = int(os.getenv("WORKERS", "1"))
+    if workers > 1:
+        # Each worker is its own process: share the vector index pages, sessions and cached answers
+        shared_backends = {"VECTOR_BACKEND": "mmap", "MEMORY_BACKEND": "sqlite", "ANSWER_CACHE_BACKEND": "sqlite"}
+        for name, shared in shared_backends.items():
+            value = os.environ.setdefault(name, shared)
+            if value.lower() != shared:
+                logger.warning(f"⚠️ {name}={value} with {workers} workers: each worker keeps its own copy")
+        uvicorn.run("main:app", host="0.0.0.0", port=int(os.getenv("PORT", "8000")), workers=workers)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("PORT", "8000")))
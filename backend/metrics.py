@@ -0,0 +1,242 @@
+"""
+Latency histograms, counters and gauges rendered in the Prometheus text format
+Kept dependency-free; values are per process, so with several workers each one
+reports its own series (scrape them separately or aggregate in Prometheus)
+"""
+
+import os
+import json
+import math
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+
+
+def _format_labels(labelnames: Tuple[str, ...], labelvalues: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    """A named family of series, one per combination of label values"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], object] = {}
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            for key, value in sorted(self._series.items()):
+                lines.extend(self._render_series(key, value))
+        return lines
+
+    def _render_series(self, key: Tuple[str, ...], value) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._series.get(self._key(labels), 0.0)
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._series[self._key(labels)] = float(value)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][index] += 1
+                    break
+            series["sum"] += value
+            series["count"] += 1
+
+    def _render_series(self, key: Tuple[str, ...], series) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, series["counts"]):
+            cumulative += count
+            labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(series['sum'])}")
+        lines.append(f"{self.name}_count{labels} {series['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds every metric and renders them for /metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: Metric) -> Metric:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Iterable[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# Serving
+HTTP_REQUESTS = REGISTRY.counter("rag_http_requests_total", "HTTP requests by route and status", ["method", "path", "status"])
+HTTP_LATENCY = REGISTRY.histogram("rag_http_request_duration_seconds", "HTTP request latency", ["method", "path"])
+QUERIES = REGISTRY.counter("rag_queries_total", "Answered queries by endpoint and outcome", ["endpoint", "outcome"])
+QUERY_LATENCY = REGISTRY.histogram("rag_query_duration_seconds", "End-to-end query latency", ["endpoint", "outcome"])
+STAGE_LATENCY = REGISTRY.histogram("rag_stage_duration_seconds", "Latency of each query stage", ["stage"])
+ERRORS = REGISTRY.counter("rag_errors_total", "Failed queries by endpoint and exception type", ["endpoint", "error"])
+RETRIEVALS = REGISTRY.counter("rag_retrievals_total", "Retrievals by mode, including keyword fallbacks", ["mode"])
+LANGUAGE_ROUTES = REGISTRY.counter("rag_language_routes_total", "Queries by detected language and how they were prepared",
+                                  ["language", "normalized", "transliterated"])
+PROMPT_CHARS = REGISTRY.histogram("rag_prompt_chars", "Characters in the prompt sent to the LLM", buckets=SIZE_BUCKETS)
+PROMPT_TOKENS = REGISTRY.histogram("rag_prompt_tokens", "Estimated tokens in the prompt sent to the LLM",
+                                   buckets=tuple(size // 2 for size in SIZE_BUCKETS))
+LLM_TOKENS = REGISTRY.counter("rag_llm_tokens_total", "Estimated LLM tokens", ["kind"])
+SLOW_QUERIES = REGISTRY.counter("rag_slow_queries_total", "Queries slower than SLOW_QUERY_MS", ["endpoint"])
+CACHE_STATS = REGISTRY.gauge("rag_cache_stat", "Answer and embedding cache counters and hit rates", ["cache", "stat"])
+READY = REGISTRY.gauge("rag_ready", "1 once the RAG system is loaded and warmed up")
+RETRIEVAL_STATS = REGISTRY.gauge("rag_retrieval_stat", "Retriever counters", ["stat"])
+COALESCING_STATS = REGISTRY.gauge("rag_coalescing_stat", "Identical in-flight /chat queries sharing one answer", ["stat"])
+LIMITER_ACTIVE = REGISTRY.gauge("rag_limiter_active", "LLM/embedding calls currently running", ["limiter"])
+LIMITER_QUEUE_DEPTH = REGISTRY.gauge("rag_limiter_queue_depth", "LLM/embedding calls waiting for a slot", ["limiter"])
+LIMITER_WAIT = REGISTRY.histogram("rag_limiter_wait_seconds", "Time calls waited for an LLM/embedding slot", ["limiter"])
+LIMITER_REJECTIONS = REGISTRY.counter("rag_limiter_rejections_total", "Calls refused by a limiter", ["limiter", "reason"])
+
+# Ingestion
+INGEST_STAGE_SECONDS = REGISTRY.counter("rag_ingest_stage_seconds_total", "Time spent in each ingestion stage", ["stage"])
+INGEST_ITEMS = REGISTRY.counter("rag_ingest_items_total", "Items produced by each ingestion stage", ["stage"])
+INGEST_PEAK_RSS = REGISTRY.gauge("rag_ingest_peak_rss_bytes", "Peak resident memory of an ingestion run", ["process"])
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token count: ~4 ASCII characters or ~2 Bengali characters per token"""
+    ascii_chars = sum(1 for char in text if char < "\x80")
+    return math.ceil(ascii_chars / 4 + (len(text) - ascii_chars) / 2)
+
+
+def observe_query(endpoint: str, outcome: str, timings_ms: Dict[str, Optional[float]]):
+    """Record a finished query: every "<stage>_ms" timing feeds the stage histogram"""
+    QUERIES.inc(endpoint=endpoint, outcome=outcome)
+    for key, value in timings_ms.items():
+        if value is None or not key.endswith("_ms"):
+            continue
+        if key == "total_ms":
+            QUERY_LATENCY.observe(value / 1000, endpoint=endpoint, outcome=outcome)
+        else:
+            STAGE_LATENCY.observe(value / 1000, stage=key[:-3])
+
+
+def observe_prompt(prompt: str, answer: str):
+    PROMPT_CHARS.observe(len(prompt))
+    prompt_tokens = estimate_tokens(prompt)
+    PROMPT_TOKENS.observe(prompt_tokens)
+    LLM_TOKENS.inc(prompt_tokens, kind="prompt")
+    LLM_TOKENS.inc(estimate_tokens(answer), kind="completion")
+
+
+def set_stats(gauge: Gauge, stats: Optional[Dict], **labels):
+    """Copy the numeric entries of a stats() dict into a gauge"""
+    for key, value in (stats or {}).items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            gauge.set(value, stat=key, **labels)
+
+
+class SlowQueryLog:
+    """Logs the per-stage breakdown of queries slower than a threshold, one JSON object per line"""
+
+    def __init__(self, threshold_ms: float, path: Optional[str] = None):
+        self.threshold_ms = threshold_ms
+        self.logger = logging.getLogger("rag.slow_query")
+        if path and not self.logger.handlers:
+            handler = logging.FileHandler(path, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self.logger.addHandler(handler)
+
+    def record(self, endpoint: str, query: str, timings_ms: Dict[str, Optional[float]], **details) -> bool:
+        total = timings_ms.get("total_ms")
+        if self.threshold_ms <= 0 or total is None or total < self.threshold_ms:
+            return False
+        SLOW_QUERIES.inc(endpoint=endpoint)
+        self.logger.warning(json.dumps({
+            "endpoint": endpoint,
+            "query": query[:200],
+            "total_ms": total,
+            "timings_ms": timings_ms,
+            **details
+        }, ensure_ascii=False))
+        return True
+
+
+def create_slow_query_log() -> SlowQueryLog:
+    """SLOW_QUERY_MS threshold (0 disables) and optional SLOW_QUERY_LOG_PATH file"""
+    return SlowQueryLog(
+        threshold_ms=float(os.getenv("SLOW_QUERY_MS", "3000")),
+        path=os.getenv("SLOW_QUERY_LOG_PATH") or None
+    )
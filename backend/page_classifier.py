@@ -0,0 +1,173 @@
+"""
+Story-vs-MCQ page classification from one scan per page
+Every indicator is a literal, exam-structure markers included ("ক)" options, "৩।"
+question numbers, "২২]" citations), so each page is scanned once for all of them:
+with an Aho-Corasick automaton when pyahocorasick is installed, otherwise with one
+trie-shaped compiled alternation. Each match is counted under its feature, pages
+are scored as a weighted sum of the counts, and classify_pages scores a batch as
+one matrix product.
+"""
+
+import re
+from collections import Counter
+from operator import itemgetter
+from typing import Callable, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+MIN_PAGE_CHARS = 50
+LONG_PAGE_CHARS = 200
+
+_BENGALI_DIGITS = "০১২৩৪৫৬৭৮৯"
+
+# Options are counted without their "(", which extraction sometimes loses; question
+# numbers as "২৩।" and board/university citations by the year closing them, "[ঢা.বো. '২২]".
+# "প্রশ্ন" and "উত্তর" also as they come out of the PDF's legacy font ("পরশন", "উিি")
+FEATURE_LITERALS = {
+    "options": ("ক)", "খ)", "গ)", "ঘ)"),
+    "question_numbers": tuple(digit + "।" for digit in _BENGALI_DIGITS),
+    "citations": tuple(digit + "]" for digit in _BENGALI_DIGITS + "0123456789"),
+    "answers": ("উত্তর:", "উত্তরঃ", "উিি:", "উিিঃ"),
+    "answer_key": ("SL Ans",),
+    "mcq_words": ('নিচের কোনটি', 'কোন সালে', 'প্রশ্ন', 'পরশন', 'সঠিক', 'ভুল'),
+    # Journey/train-scene words
+    "transport": ('স্টেশন-মাস্টার', 'প্ল্যাটফর্ম', 'স্টেশন', 'গাড়ি', 'ট্রেন', 'রেল', 'যাত্রা'),
+    "story_words": (
+        'গল্প', 'কাহিনী', 'চরিত্র', 'নায়ক', 'নায়িকা',
+        'বিয়ে', 'বিবাহ', 'অনুপম', 'কল্যাণী', 'শম্ভুনাথ',
+        'মামা', 'বাবা', 'মা', 'পিতা', 'মাতা',
+        'ঘটনা', 'পরিস্থিতি', 'সংলাপ', 'কথোপকথন',
+        'ভ্রমণ', 'টিকিট'
+    )
+}
+FEATURES = tuple(FEATURE_LITERALS) + ("long_page",)
+_FEATURE_OF = {literal: FEATURES.index(feature) for feature, literals in FEATURE_LITERALS.items() for literal in literals}
+
+# A page is story when the weighted sum of its counts is above THRESHOLD. The weights are
+# a least-squares fit (story = 1, other = -1) on the odd-numbered labelled pages of the
+# shipped PDF, rounded; the even-numbered pages are held out (benchmarks/
+# bench_page_classifier.py --fit). On that PDF, page length and the exam answers/answer-key
+# markers separate the classes; story-word counts barely matter once those are known
+FEATURE_WEIGHTS = {
+    "options": -0.03,
+    "question_numbers": -0.01,
+    "citations": 0.41,
+    "answers": -0.44,
+    "answer_key": -0.42,
+    "mcq_words": -0.27,
+    "transport": 0.28,
+    "story_words": -0.01,
+    "long_page": 1.12
+}
+WEIGHTS = np.array([FEATURE_WEIGHTS[feature] for feature in FEATURES])
+THRESHOLD = 0.0
+_WEIGHT_OF = {literal: FEATURE_WEIGHTS[FEATURES[index]] for literal, index in _FEATURE_OF.items()}
+_LONG_PAGE_WEIGHT = FEATURE_WEIGHTS["long_page"]
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Alternation over words with shared prefixes factored out, so the engine tries each prefix once"""
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        pattern = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            # A word ends here; longer words win since the group is greedy
+            pattern = ("(?:" + pattern + ")" if len(branches) == 1 and len(pattern) > 1 else pattern) + "?"
+        return pattern
+
+    return build(trie)
+
+
+def _build_scanner() -> Tuple[str, Callable[[str], Iterable[str]]]:
+    """(backend, scan) where scan yields the literals found in a page, leftmost-longest and non-overlapping"""
+    try:
+        import ahocorasick
+    except ImportError:
+        return "regex", re.compile(_trie_pattern(_FEATURE_OF)).findall
+    automaton = ahocorasick.Automaton()
+    for literal in _FEATURE_OF:
+        automaton.add_word(literal, literal)
+    automaton.make_automaton()
+    matched = itemgetter(1)
+    return "aho-corasick", lambda text: map(matched, automaton.iter_long(text))
+
+
+SCAN_BACKEND, _scan = _build_scanner()
+
+
+def _scan_page(text: str) -> Counter:
+    """How often each literal occurs in the page"""
+    return Counter(_scan(text))
+
+
+def _has_option_set(found: Counter) -> bool:
+    """True when every option label (ক) to (ঘ) occurs, which only MCQ pages do"""
+    return all(option in found for option in FEATURE_LITERALS["options"])
+
+
+def _features(found: Counter, length: int) -> np.ndarray:
+    counts = np.zeros(len(FEATURES))
+    for literal, count in found.items():
+        counts[_FEATURE_OF[literal]] += count
+    counts[-1] = length > LONG_PAGE_CHARS
+    return counts
+
+
+def page_features(text: str) -> np.ndarray:
+    """Feature counts of one page, in FEATURES order"""
+    return _features(_scan_page(text), len(text.strip()))
+
+
+def classify_pages(texts: List[str]) -> List[Dict]:
+    """Feature counts, score and verdict for each page, scored together
+
+    A page with the full option set is an MCQ page whatever its score, and pages
+    shorter than MIN_PAGE_CHARS are never story.
+    """
+    if not texts:
+        return []
+    scanned = [_scan_page(text) for text in texts]
+    lengths = [len(text.strip()) for text in texts]
+    matrix = np.vstack([_features(found, length) for found, length in zip(scanned, lengths)])
+    scores = matrix @ WEIGHTS
+    results = []
+    for found, length, counts, score in zip(scanned, lengths, matrix, scores):
+        option_set = _has_option_set(found)
+        results.append({
+            "features": dict(zip(FEATURES, counts.astype(int).tolist())),
+            "option_set": option_set,
+            "score": round(float(score), 3),
+            "is_story": bool(score > THRESHOLD) and not option_set and length >= MIN_PAGE_CHARS
+        })
+    return results
+
+
+def classify_page(text: str) -> Dict:
+    """classify_pages for a single page"""
+    return classify_pages([text])[0]
+
+
+def is_story_page(text: str) -> bool:
+    """True for story/analysis pages, False for MCQ, answer-key and near-empty pages
+
+    Scores one page without building its feature vector; same verdict as classify_pages.
+    """
+    length = len(text.strip())
+    if length < MIN_PAGE_CHARS:
+        return False
+    found = _scan_page(text)
+    if _has_option_set(found):
+        return False
+    score = _LONG_PAGE_WEIGHT * (length > LONG_PAGE_CHARS)
+    for literal, count in found.items():
+        score += _WEIGHT_OF[literal] * count
+    return score > THRESHOLD
@@ -0,0 +1,200 @@
+"""
+Provider registry for embedding models and LLMs
+EMBEDDING_PROVIDER / LLM_PROVIDER select Google, a local CPU model or the
+deterministic fakes, for both the API and ingestion
+"""
+
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from langchain.schema.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+
+# Collection metadata key recording which embedding model built the vector store
+EMBEDDING_MODEL_KEY = "embedding_model"
+
+EMBEDDING_PROVIDERS: Dict[str, Callable[[str, str], Embeddings]] = {}
+LLM_PROVIDERS: Dict[str, Callable[[str], BaseChatModel]] = {}
+
+DEFAULT_EMBEDDING_MODELS = {
+    "google": "models/text-embedding-004",
+    "local": "intfloat/multilingual-e5-small",
+    "fake": "fake-768"
+}
+DEFAULT_LLM_MODELS = {
+    "google": "gemini-1.5-flash",
+    "fake": "fake"
+}
+
+
+def register_embedding_provider(name: str):
+    """Register a factory(model, task) -> Embeddings; task is "document" or "query" """
+    def decorator(factory: Callable[[str, str], Embeddings]):
+        EMBEDDING_PROVIDERS[name] = factory
+        return factory
+    return decorator
+
+
+def register_llm_provider(name: str):
+    """Register a factory(model) -> chat model"""
+    def decorator(factory: Callable[[str], BaseChatModel]):
+        LLM_PROVIDERS[name] = factory
+        return factory
+    return decorator
+
+
+def _require_google_api_key() -> str:
+    api_key = os.getenv("GOOGLE_API_KEY")
+    if not api_key:
+        raise ValueError("GOOGLE_API_KEY not found in environment variables")
+    return api_key
+
+
+def _configured_model(provider: str, kind: str, generic_variable: str, defaults: Dict[str, str]) -> str:
+    """Model for a provider: <PROVIDER>_<KIND>_MODEL, then the generic variable, then the provider default
+    
+    The provider-specific variable lets one .env name models for several providers
+    without a Google model name leaking into the fake or local provider.
+    """
+    return (os.getenv(f"{provider.upper()}_{kind}_MODEL") or os.getenv(generic_variable)
+            or defaults.get(provider, ""))
+
+
+def embedding_settings() -> Tuple[str, str]:
+    """(provider, model) configured in the environment"""
+    provider = os.getenv("EMBEDDING_PROVIDER", "google").lower()
+    if provider not in EMBEDDING_PROVIDERS:
+        raise ValueError(f"Unknown EMBEDDING_PROVIDER: {provider} (available: {', '.join(EMBEDDING_PROVIDERS)})")
+    return provider, _configured_model(provider, "EMBEDDING", "EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODELS)
+
+
+def llm_settings() -> Tuple[str, str]:
+    """(provider, model) configured in the environment"""
+    provider = os.getenv("LLM_PROVIDER", "google").lower()
+    if provider not in LLM_PROVIDERS:
+        raise ValueError(f"Unknown LLM_PROVIDER: {provider} (available: {', '.join(LLM_PROVIDERS)})")
+    return provider, _configured_model(provider, "LLM", "MODEL_NAME", DEFAULT_LLM_MODELS)
+
+
+def embedding_model_id(provider: Optional[str] = None, model: Optional[str] = None) -> str:
+    """Identifier stored with the vector store, e.g. "google:models/text-embedding-004" """
+    if provider is None or model is None:
+        provider, model = embedding_settings()
+    return f"{provider}:{model}"
+
+
+def create_embeddings(task: str = "document", provider: Optional[str] = None,
+                      model: Optional[str] = None) -> Embeddings:
+    """Build the configured embedding model
+
+    task="query" returns a model whose embed_documents produces query embeddings,
+    for embedding many queries in one call.
+    """
+    if provider is None or model is None:
+        provider, model = embedding_settings()
+    return EMBEDDING_PROVIDERS[provider](model, task)
+
+
+def create_llm(provider: Optional[str] = None, model: Optional[str] = None) -> BaseChatModel:
+    """Build the configured chat model"""
+    if provider is None or model is None:
+        provider, model = llm_settings()
+    return LLM_PROVIDERS[provider](model)
+
+
+def recorded_embedding_model(collection: Any) -> Optional[str]:
+    """Embedding model recorded in a Chroma collection's metadata, if any"""
+    return (collection.metadata or {}).get(EMBEDDING_MODEL_KEY)
+
+
+def record_embedding_model(collection: Any, model_id: str):
+    """Store the embedding model in a Chroma collection's metadata, keeping other keys"""
+    collection.modify(metadata={**(collection.metadata or {}), EMBEDDING_MODEL_KEY: model_id})
+
+
+# Google
+
+@register_embedding_provider("google")
+def _google_embeddings(model: str, task: str) -> Embeddings:
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+    kwargs = {"task_type": "retrieval_query"} if task == "query" else {}
+    return GoogleGenerativeAIEmbeddings(model=model, google_api_key=_require_google_api_key(), **kwargs)
+
+
+@register_llm_provider("google")
+def _google_llm(model: str) -> BaseChatModel:
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(
+        model=model,
+        google_api_key=_require_google_api_key(),
+        temperature=0.7,  # Increased for more creative reasoning
+        max_tokens=2048,  # Allow longer responses
+        top_p=0.9  # Better diversity in responses
+    )
+
+
+# Local CPU embeddings (optional dependency: sentence-transformers)
+
+_local_models: Dict[str, Any] = {}
+_local_models_lock = threading.Lock()
+
+
+def _load_sentence_transformer(model_name: str):
+    with _local_models_lock:
+        if model_name not in _local_models:
+            try:
+                from sentence_transformers import SentenceTransformer
+            except ImportError as e:
+                raise ImportError(
+                    "EMBEDDING_PROVIDER=local requires sentence-transformers: pip install sentence-transformers"
+                ) from e
+            _local_models[model_name] = SentenceTransformer(model_name, device=os.getenv("LOCAL_EMBEDDING_DEVICE", "cpu"))
+        return _local_models[model_name]
+
+
+class LocalEmbeddings(Embeddings):
+    """sentence-transformers model run in-process; E5 models get their query:/passage: prefixes"""
+
+    def __init__(self, model_name: str, documents_as_queries: bool = False, batch_size: int = 32):
+        self.model = _load_sentence_transformer(model_name)
+        self.batch_size = batch_size
+        is_e5 = "e5" in model_name.lower()
+        self.query_prefix = "query: " if is_e5 else ""
+        self.document_prefix = self.query_prefix if documents_as_queries else ("passage: " if is_e5 else "")
+        self._lock = threading.Lock()
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        with self._lock:
+            vectors = self.model.encode(texts, batch_size=self.batch_size, normalize_embeddings=True,
+                                        convert_to_numpy=True, show_progress_bar=False)
+        return vectors.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._encode([self.document_prefix + text for text in texts])
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([self.query_prefix + text])[0]
+
+
+@register_embedding_provider("local")
+def _local_embeddings(model: str, task: str) -> Embeddings:
+    return LocalEmbeddings(model, documents_as_queries=task == "query")
+
+
+# Deterministic fakes for benchmarks, load tests and CI
+
+@register_embedding_provider("fake")
+def _fake_embeddings(model: str, task: str) -> Embeddings:
+    from fakes import FakeEmbeddings
+    dimensions = int(model.rsplit("-", 1)[-1]) if model.rsplit("-", 1)[-1].isdigit() else 768
+    return FakeEmbeddings(dimensions=dimensions, latency=float(os.getenv("FAKE_EMBEDDING_LATENCY", "0")))
+
+
+@register_llm_provider("fake")
+def _fake_llm(model: str) -> BaseChatModel:
+    from fakes import FakeChatModel
+    return FakeChatModel(
+        latency=float(os.getenv("FAKE_LLM_LATENCY", "0")),
+        token_latency=float(os.getenv("FAKE_LLM_TOKEN_LATENCY", "0"))
+    )
@@ -0,0 +1,187 @@
+"""
+Precomputed answers for the MCQ question bank in the source PDFs
+Ingestion pulls numbered question/option/answer blocks out of the pages, including
+the MCQ pages is_story_content skips, into a compact JSON index next to the vector
+store, each with its marked option precomputed as clean text. A query that matches a
+question exactly (or above QUESTION_BANK_ANSWER_SIMILARITY) is answered with that text
+before retrieval, without calling the LLM; a looser fuzzy match only pins the block
+at the top of the prompt context for the LLM to answer from.
+"""
+
+import os
+import re
+import json
+import logging
+import difflib
+from typing import Dict, Iterable, List, Optional
+
+from bengali_normalizer import fix_bengali_encoding, normalize_bengali_text
+
+logger = logging.getLogger(__name__)
+
+QUESTION_BANK_FILE = "question_bank.json"
+QUESTION_BANK_FORMAT = 1
+OPTION_LETTERS = ("ক", "খ", "গ", "ঘ")
+
+# "২৩। question (ক) .. (খ) .. (গ) .. (ঘ) .. উত্তর: ঘ". The PDF's legacy font extracts
+# "উত্তর" as "উিি", so both spellings mark the answer. No part may contain a parenthesis,
+# which keeps a block from running into the next one
+_QUESTION_BLOCK = re.compile(
+    r'(?P<number>[০-৯0-9]{1,3})\s*[।.]\s*(?P<question>[^()]{4,}?)\s*'
+    r'\(ক\)\s*(?P<ক>[^()]+?)\s*\(খ\)\s*(?P<খ>[^()]+?)\s*\(গ\)\s*(?P<গ>[^()]+?)\s*\(ঘ\)\s*(?P<ঘ>[^()]+?)\s*'
+    r'(?:উত্তর|উিি)\s*[:ঃ]\s*(?P<answer>[কখগঘ])'
+)
+_CITATION = re.compile(r'\[[^\]]*\]')
+# Extraction turns vowel signs into "র", "য" or "ক" (and drops conjunct marks), so lookups
+# compare consonant skeletons with those three letters removed
+_SKELETON_DROP = re.compile(r'[^ক-হৎড়-য়a-z0-9০-৯]|[করয]')
+
+
+def question_key(text: str) -> str:
+    """Matching key of a question: consonant skeleton without options or exam citations"""
+    text = normalize_bengali_text(text).lower()
+    text = text.split("(ক)", 1)[0]
+    text = _CITATION.sub(" ", text)
+    text = re.sub(r'^\s*[০-৯0-9]{1,3}\s*[।.]', " ", text)
+    return _SKELETON_DROP.sub("", text)
+
+
+def clean_option(text: str) -> str:
+    """Option text as returned to users: encoding-fixed and normalized like story chunks"""
+    return normalize_bengali_text(fix_bengali_encoding(text))
+
+
+def extract_questions(text: str, page_number: int, source: str = "") -> List[Dict]:
+    """Question/option/answer blocks of one fixed page text"""
+    questions = []
+    for match in _QUESTION_BLOCK.finditer(text):
+        question = " ".join(_CITATION.sub(" ", match.group("question")).split()).strip(" -–")
+        key = question_key(question)
+        if len(key) < 4:
+            continue
+        options = {letter: " ".join(match.group(letter).split()) for letter in OPTION_LETTERS}
+        questions.append({
+            "number": match.group("number"),
+            "question": question,
+            "options": options,
+            "answer": match.group("answer"),
+            "answer_text": clean_option(options[match.group("answer")]),
+            "key": key,
+            "page": page_number,
+            "source": source
+        })
+    return questions
+
+
+def write_question_bank(questions: Iterable[Dict], persist_directory: str) -> str:
+    """Write the index next to the vector store (temp file then rename, so readers never see half of it)"""
+    path = os.path.join(persist_directory, QUESTION_BANK_FILE)
+    os.makedirs(persist_directory, exist_ok=True)
+    payload = {"format": QUESTION_BANK_FORMAT, "questions": list(questions)}
+    with open(path + ".tmp", "w", encoding="utf-8") as handle:
+        json.dump(payload, handle, ensure_ascii=False)
+    os.replace(path + ".tmp", path)
+    return path
+
+
+class QuestionBank:
+    """Key lookup over the extracted questions, with optional fuzzy matching"""
+
+    def __init__(self, questions: List[Dict], min_similarity: float = 0.85, answer_similarity: float = 0.95):
+        self.min_similarity = min_similarity
+        self.answer_similarity = answer_similarity
+        self.by_key: Dict[str, Optional[Dict]] = {}
+        for entry in questions:
+            # Indexes written before answers were precomputed
+            if "answer_text" not in entry:
+                entry = {**entry, "answer_text": clean_option(entry["options"][entry["answer"]])}
+            existing = self.by_key.get(entry["key"], entry)
+            # The same question with two different answers is not safe to answer from here
+            if existing is None or existing["options"][existing["answer"]] != entry["options"][entry["answer"]]:
+                self.by_key[entry["key"]] = None
+            else:
+                self.by_key[entry["key"]] = existing
+        self.counters = {"hits": 0, "misses": 0}
+
+    def __len__(self) -> int:
+        return len(self.by_key)
+
+    def lookup(self, query: str) -> Optional[Dict]:
+        """Entry for a query plus its "similarity", or None when no question matches"""
+        key = question_key(query)
+        entry = self.by_key.get(key) if len(key) >= 4 else None
+        similarity = 1.0
+        if entry is None and len(key) >= 4 and self.min_similarity < 1.0:
+            matcher = difflib.SequenceMatcher(autojunk=False)
+            matcher.set_seq2(key)
+            similarity = self.min_similarity
+            for candidate_key, candidate in self.by_key.items():
+                if candidate is None:
+                    continue
+                matcher.set_seq1(candidate_key)
+                if matcher.real_quick_ratio() < similarity or matcher.quick_ratio() < similarity:
+                    continue
+                ratio = matcher.ratio()
+                if ratio >= similarity:
+                    entry, similarity = candidate, ratio
+        if entry is None:
+            self.counters["misses"] += 1
+            return None
+        self.counters["hits"] += 1
+        return {**entry, "similarity": round(similarity, 4)}
+
+    def answers_directly(self, entry: Dict) -> bool:
+        """Whether a lookup result is close enough to return its stored answer without the LLM"""
+        return entry["similarity"] >= self.answer_similarity
+
+    def stats(self) -> Dict:
+        return {"questions": len(self), **self.counters}
+
+
+def format_answer(entry: Dict) -> str:
+    """Stored answer of a matched question, e.g. "(ঘ) কল্যাণী" """
+    return f"({entry['answer']}) {entry['answer_text']}"
+
+
+def format_question(entry: Dict) -> str:
+    """The matched question block as extracted"""
+    options = " ".join(f"({letter}) {entry['options'][letter]}" for letter in OPTION_LETTERS)
+    return f"{entry['number']}। {entry['question']} {options} উত্তর: {entry['answer']}"
+
+
+def format_context(entry: Dict) -> str:
+    """A fuzzily matched block as pinned prompt context, flagged as exam material with possibly garbled spelling"""
+    return (
+        "Exam question from the book (text extracted from the PDF, so spellings may be garbled; "
+        f"the marked answer is correct): {format_question(entry)}"
+    )
+
+
+def question_bank_from_payload(payload: Dict, source: str) -> Optional[QuestionBank]:
+    """QuestionBank from a written index's contents (None on a format mismatch)"""
+    if payload.get("format") != QUESTION_BANK_FORMAT:
+        logger.warning(f"Question bank at {source} has format {payload.get('format')}, re-run ingestion")
+        return None
+    return QuestionBank(
+        payload["questions"],
+        min_similarity=float(os.getenv("QUESTION_BANK_MIN_SIMILARITY", "0.85")),
+        answer_similarity=float(os.getenv("QUESTION_BANK_ANSWER_SIMILARITY", "0.95"))
+    )
+
+
+def create_question_bank(persist_directory: str, payload: Optional[Dict] = None) -> Optional[QuestionBank]:
+    """Load the index written at ingestion, or the one carried in a vector snapshot (None when disabled or not built yet)"""
+    if os.getenv("QUESTION_BANK_ENABLED", "true").lower() != "true":
+        return None
+    if payload is not None:
+        return question_bank_from_payload(payload, "snapshot")
+    path = os.path.join(persist_directory, QUESTION_BANK_FILE)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, encoding="utf-8") as handle:
+            payload = json.load(handle)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Question bank at {path} is unreadable, skipping it: {e}")
+        return None
+    return question_bank_from_payload(payload, path)
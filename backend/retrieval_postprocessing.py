@@ -0,0 +1,212 @@
+"""
+Post-processing of retrieved chunks before they reach the prompt
+Near-duplicate chunks are collapsed, the rest are diversified with maximal marginal
+relevance over the vectors already in the store (no re-embedding), and the top hits
+can pull in the chunks that follow or precede them, found through a chunk_id
+adjacency index built once at startup
+"""
+
+import os
+import time
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain.schema import Document
+
+# Fused score first, then whichever single-search score a chunk carries
+SCORE_KEYS = ("rrf_score", "vector_score", "bm25_score")
+
+
+def chunk_position(metadata: Dict) -> Optional[Tuple[str, int, int]]:
+    """(source, page, index) from a "source:page_index" chunk_id, or None if it has none"""
+    page, _, index = str(metadata.get("chunk_id", "")).rpartition(":")[2].partition("_")
+    if not page.isdigit() or not index.isdigit():
+        return None
+    return str(metadata.get("source", "")), int(page), int(index)
+
+
+def score_key(doc: Document) -> Optional[str]:
+    """The first of SCORE_KEYS present in the chunk's metadata"""
+    return next((key for key in SCORE_KEYS if key in doc.metadata), None)
+
+
+def retrieval_score(doc: Document) -> float:
+    """The chunk's score under score_key, 0.0 when it has none"""
+    key = score_key(doc)
+    return float(doc.metadata[key]) if key else 0.0
+
+
+class RetrievalPostProcessor:
+    """Deduplication, MMR and neighbour expansion over the stored chunk vectors
+
+    `vectors` may be a memory-mapped matrix; only the rows of a query's candidates
+    are read and normalized.
+    """
+
+    def __init__(self, texts: List[str], metadatas: List[Dict], vectors: Any, mmr_k: int = 5,
+                 mmr_lambda: float = 0.7, duplicate_similarity: float = 0.95, expand_top: int = 1,
+                 expand_window: int = 1, neighbour_weight: float = 0.9):
+        self.texts = texts
+        self.metadatas = metadatas
+        self.vectors = vectors
+        self.mmr_k = mmr_k
+        self.mmr_lambda = mmr_lambda
+        self.duplicate_similarity = duplicate_similarity
+        self.expand_top = expand_top
+        self.expand_window = expand_window
+        self.neighbour_weight = neighbour_weight
+        # Identical text may be stored once per source
+        self.row_of_text = {(str((metadata or {}).get("source", "")), text): row
+                            for row, (text, metadata) in enumerate(zip(texts, metadatas))}
+
+        # Reading order of every chunk, so neighbours cross page boundaries within a source
+        positioned = sorted(
+            (position, row) for row, position in
+            ((row, chunk_position(metadata or {})) for row, metadata in enumerate(metadatas))
+            if position is not None
+        )
+        self.order = [row for _, row in positioned]
+        self.order_of_row = {row: order for order, row in enumerate(self.order)}
+        self.source_of_row = {row: position[0] for position, row in positioned}
+        # process() runs in worker threads, so the counters are only updated under the lock
+        self._lock = threading.Lock()
+        self.counters = {"queries": 0, "duplicates_removed": 0, "diversified_out": 0, "neighbours_added": 0}
+
+    @classmethod
+    def from_collection(cls, collection: Any, page_size: int = 2000, **kwargs) -> "RetrievalPostProcessor":
+        """Read texts, metadata and vectors from a Chroma collection a page at a time"""
+        total = collection.count()
+        texts: List[str] = []
+        metadatas: List[Dict] = []
+        vectors = None
+        for offset in range(0, total, page_size):
+            page = collection.get(include=["embeddings", "documents", "metadatas"], limit=page_size, offset=offset)
+            rows = np.asarray(page["embeddings"], dtype=np.float32).reshape(len(page["ids"]), -1)
+            if vectors is None:
+                vectors = np.empty((total, rows.shape[1]), dtype=np.float32)
+            vectors[len(texts):len(texts) + len(rows)] = rows
+            texts.extend(text or "" for text in page["documents"])
+            metadatas.extend(metadata or {} for metadata in page["metadatas"])
+        return cls(texts, metadatas, vectors if vectors is not None else np.zeros((0, 0), dtype=np.float32), **kwargs)
+
+    def _unit_vectors(self, rows: List[int]) -> np.ndarray:
+        vectors = np.asarray(self.vectors[rows], dtype=np.float32)
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1), 1e-12)[:, None]
+
+    def _deduplicate(self, docs: List[Document], rows: List[Optional[int]]) -> Tuple[List[Document], List[Optional[int]]]:
+        """Drop chunks that repeat a higher-ranked one: same text, contained text or near-identical vector"""
+        keep_docs: List[Document] = []
+        keep_rows: List[Optional[int]] = []
+        stored = [row for row in rows if row is not None]
+        units = dict(zip(stored, self._unit_vectors(stored))) if stored else {}
+        for doc, row in zip(docs, rows):
+            text = " ".join(doc.page_content.split())
+            duplicate = False
+            for kept_doc, kept_row in zip(keep_docs, keep_rows):
+                kept_text = " ".join(kept_doc.page_content.split())
+                if text in kept_text or kept_text in text:
+                    duplicate = True
+                elif row is not None and kept_row is not None:
+                    duplicate = float(units[row] @ units[kept_row]) >= self.duplicate_similarity
+                if duplicate:
+                    break
+            if duplicate:
+                continue
+            keep_docs.append(doc)
+            keep_rows.append(row)
+        return keep_docs, keep_rows
+
+    def _diversify(self, docs: List[Document], rows: List[Optional[int]]) -> Tuple[List[Document], List[Optional[int]]]:
+        """Greedy MMR: relevance is the retrieval score scaled to [0, 1], redundancy the stored-vector cosine"""
+        if len(docs) <= self.mmr_k:
+            return docs, rows
+        scores = np.array([retrieval_score(doc) for doc in docs])
+        relevance = scores / scores.max() if scores.max() > 0 else np.linspace(1.0, 0.0, len(docs))
+        stored = [index for index, row in enumerate(rows) if row is not None]
+        similarity = np.zeros((len(docs), len(docs)))
+        if stored:
+            units = self._unit_vectors([rows[index] for index in stored])
+            similarity[np.ix_(stored, stored)] = units @ units.T
+
+        selected = [0]  # The best hit always stays first
+        remaining = list(range(1, len(docs)))
+        while remaining and len(selected) < self.mmr_k:
+            redundancy = similarity[np.ix_(remaining, selected)].max(axis=1)
+            marginal = self.mmr_lambda * relevance[remaining] - (1 - self.mmr_lambda) * redundancy
+            selected.append(remaining.pop(int(np.argmax(marginal))))
+        return [docs[index] for index in selected], [rows[index] for index in selected]
+
+    def _expand(self, docs: List[Document], rows: List[Optional[int]],
+                retrieved_rows: List[Optional[int]]) -> Tuple[List[Document], int]:
+        """Add the chunks around the top hits, scored just below the hit that pulled them in
+
+        Chunks already retrieved are never added back, including those just dropped as duplicates.
+        """
+        taken = {row for row in retrieved_rows if row is not None}
+        expanded = list(docs)
+        added = 0
+        for doc, row in list(zip(docs, rows))[:self.expand_top]:
+            if row is None or row not in self.order_of_row:
+                continue
+            order = self.order_of_row[row]
+            key = score_key(doc)
+            for offset in range(-self.expand_window, self.expand_window + 1):
+                neighbour_order = order + offset
+                if offset == 0 or not 0 <= neighbour_order < len(self.order):
+                    continue
+                neighbour = self.order[neighbour_order]
+                if neighbour in taken or self.source_of_row[neighbour] != self.source_of_row[row]:
+                    continue
+                taken.add(neighbour)
+                metadata = {**self.metadatas[neighbour], "expanded_from": doc.metadata.get("chunk_id")}
+                if key:
+                    metadata[key] = round(retrieval_score(doc) * self.neighbour_weight, 6)
+                expanded.append(Document(page_content=self.texts[neighbour], metadata=metadata))
+                added += 1
+        return expanded, added
+
+    def process(self, docs: List[Document]) -> Tuple[List[Document], Dict]:
+        """Deduplicate, diversify and expand ranked chunks; returns (chunks, stats)"""
+        started = time.perf_counter()
+        rows = [self.row_of_text.get((str(doc.metadata.get("source", "")), doc.page_content)) for doc in docs]
+        unique_docs, unique_rows = self._deduplicate(docs, rows)
+        diverse_docs, diverse_rows = self._diversify(unique_docs, unique_rows)
+        expanded_docs, added = self._expand(diverse_docs, diverse_rows, rows) if self.expand_top > 0 else (diverse_docs, 0)
+        stats = {
+            "retrieved_chunks": len(docs),
+            "duplicates_removed": len(docs) - len(unique_docs),
+            "diversified_out": len(unique_docs) - len(diverse_docs),
+            "neighbours_added": added,
+            "returned_chunks": len(expanded_docs),
+            "postprocess_ms": round((time.perf_counter() - started) * 1000, 3)
+        }
+        with self._lock:
+            self.counters["queries"] += 1
+            for key in ("duplicates_removed", "diversified_out", "neighbours_added"):
+                self.counters[key] += stats[key]
+        return expanded_docs, stats
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"chunks": len(self.texts), "mmr_k": self.mmr_k, "expand_top": self.expand_top, **self.counters}
+
+
+def create_retrieval_postprocessor(collection: Any, vector_index: Optional[Any] = None) -> Optional[RetrievalPostProcessor]:
+    """Build the post-processor from environment configuration (None when disabled)
+
+    A memory-mapped vector index or snapshot is reused as-is; otherwise the vectors are
+    read from the collection once.
+    """
+    if os.getenv("RETRIEVAL_POSTPROCESSING_ENABLED", "true").lower() != "true":
+        return None
+    settings = {
+        "mmr_k": int(os.getenv("RETRIEVAL_MMR_K", "5")),
+        "mmr_lambda": float(os.getenv("RETRIEVAL_MMR_LAMBDA", "0.7")),
+        "duplicate_similarity": float(os.getenv("RETRIEVAL_DUPLICATE_SIMILARITY", "0.95")),
+        "expand_top": int(os.getenv("RETRIEVAL_EXPAND_TOP", "0")),
+        "expand_window": int(os.getenv("RETRIEVAL_EXPAND_WINDOW", "1"))
+    }
+    if getattr(vector_index, "backend", None) in ("mmap", "snapshot"):
+        return RetrievalPostProcessor(vector_index.documents, vector_index.metadatas, vector_index.matrix, **settings)
+    return RetrievalPostProcessor.from_collection(collection, **settings)
@@ -0,0 +1,238 @@
+"""
+Session-scoped conversation memory for the RAG API
+Keeps one bounded ConversationMemory per chat session behind a pluggable backend
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Dict, Optional
+
+
+class ConversationMemory:
+    """Simple conversation memory to maintain short-term context"""
+
+    def __init__(self, max_history: int = 5, history: Optional[List[Dict]] = None):
+        self.max_history = max_history
+        self.history = list(history or [])[-max_history:]
+
+    def add_exchange(self, query: str, answer: str):
+        """Add a query-answer pair to history"""
+        self.history.append({
+            "query": query,
+            "answer": answer,
+            "timestamp": datetime.now().isoformat()
+        })
+
+        # Keep only recent history
+        if len(self.history) > self.max_history:
+            self.history = self.history[-self.max_history:]
+
+    def get_context(self) -> str:
+        """Get formatted conversation history"""
+        if not self.history:
+            return ""
+
+        context = "Previous conversation:\n"
+        for exchange in self.history[-3:]:  # Last 3 exchanges
+            context += f"Q: {exchange['query']}\nA: {exchange['answer']}\n\n"
+
+        return context
+
+
+class MemoryBackend:
+    """Storage interface for per-session conversation history"""
+
+    def load(self, session_id: str) -> Optional[List[Dict]]:
+        """Return the stored history for a session, or None if unknown/expired"""
+        raise NotImplementedError
+
+    def save(self, session_id: str, history: List[Dict]):
+        """Persist the history for a session"""
+        raise NotImplementedError
+
+    def delete(self, session_id: str):
+        """Forget a session"""
+        raise NotImplementedError
+
+    def count(self) -> int:
+        """Number of live sessions held by the backend"""
+        raise NotImplementedError
+
+    def last_activity(self) -> Optional[str]:
+        """ISO timestamp of the most recent save, if any"""
+        raise NotImplementedError
+
+
+class InMemoryBackend(MemoryBackend):
+    """In-process LRU store with idle-time (TTL) eviction"""
+
+    def __init__(self, max_sessions: int = 1000, ttl_seconds: float = 3600):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions: "OrderedDict[str, tuple]" = OrderedDict()  # id -> (last_seen, history)
+        self._lock = threading.Lock()
+        self._last_activity: Optional[str] = None
+
+    def _expire(self, now: float):
+        # Entries are kept in last-seen order, so expired ones sit at the front
+        while self._sessions:
+            session_id, (last_seen, _) = next(iter(self._sessions.items()))
+            if now - last_seen <= self.ttl_seconds:
+                break
+            self._sessions.popitem(last=False)
+
+    def load(self, session_id: str) -> Optional[List[Dict]]:
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            self._sessions[session_id] = (now, entry[1])
+            self._sessions.move_to_end(session_id)
+            return list(entry[1])
+
+    def save(self, session_id: str, history: List[Dict]):
+        with self._lock:
+            now = time.monotonic()
+            self._sessions[session_id] = (now, list(history))
+            self._sessions.move_to_end(session_id)
+            self._expire(now)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            self._last_activity = datetime.now().isoformat()
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def count(self) -> int:
+        with self._lock:
+            self._expire(time.monotonic())
+            return len(self._sessions)
+
+    def last_activity(self) -> Optional[str]:
+        return self._last_activity
+
+
+class SQLiteBackend(MemoryBackend):
+    """SQLite-backed store, a local stand-in for Redis shared across processes"""
+
+    def __init__(self, db_path: str = "./session_memory.sqlite3", max_sessions: int = 1000, ttl_seconds: float = 3600):
+        self.db_path = db_path
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " session_id TEXT PRIMARY KEY,"
+            " history TEXT NOT NULL,"
+            " last_seen REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_last_seen ON sessions(last_seen)")
+        self._conn.commit()
+
+    def _expire(self, now: float):
+        self._conn.execute("DELETE FROM sessions WHERE last_seen < ?", (now - self.ttl_seconds,))
+
+    def load(self, session_id: str) -> Optional[List[Dict]]:
+        with self._lock:
+            now = time.time()
+            row = self._conn.execute(
+                "SELECT history, last_seen FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE sessions SET last_seen = ? WHERE session_id = ?", (now, session_id))
+            self._conn.commit()
+            return json.loads(row[0])
+
+    def save(self, session_id: str, history: List[Dict]):
+        with self._lock:
+            now = time.time()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, history, last_seen) VALUES (?, ?, ?)",
+                (session_id, json.dumps(history, ensure_ascii=False), now)
+            )
+            self._expire(now)
+            # LRU eviction: drop the least recently seen sessions beyond the cap
+            self._conn.execute(
+                "DELETE FROM sessions WHERE session_id IN ("
+                " SELECT session_id FROM sessions ORDER BY last_seen DESC LIMIT -1 OFFSET ?)",
+                (self.max_sessions,)
+            )
+            self._conn.commit()
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            self._conn.commit()
+
+    def count(self) -> int:
+        with self._lock:
+            cutoff = time.time() - self.ttl_seconds
+            return self._conn.execute("SELECT COUNT(*) FROM sessions WHERE last_seen >= ?", (cutoff,)).fetchone()[0]
+
+    def last_activity(self) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(last_seen) FROM sessions").fetchone()
+        return datetime.fromtimestamp(row[0]).isoformat() if row and row[0] else None
+
+
+class SessionMemoryStore:
+    """Hands out a ConversationMemory per session id, backed by a MemoryBackend"""
+
+    def __init__(self, backend: MemoryBackend, max_history: int = 5):
+        self.backend = backend
+        self.max_history = max_history
+
+    def get(self, session_id: Optional[str]) -> ConversationMemory:
+        """Load the memory for a session; requests without a session id get a fresh one"""
+        history = self.backend.load(session_id) if session_id else None
+        return ConversationMemory(max_history=self.max_history, history=history)
+
+    def save(self, session_id: Optional[str], memory: ConversationMemory):
+        """Write a session's memory back to the backend"""
+        if session_id:
+            self.backend.save(session_id, memory.history)
+
+    def clear(self, session_id: str):
+        self.backend.delete(session_id)
+
+    def active_sessions(self) -> int:
+        return self.backend.count()
+
+    def last_activity(self) -> Optional[str]:
+        return self.backend.last_activity()
+
+
+def create_memory_store() -> SessionMemoryStore:
+    """Build the session memory store from environment configuration"""
+    backend_name = os.getenv("MEMORY_BACKEND", "memory").lower()
+    max_sessions = int(os.getenv("MEMORY_MAX_SESSIONS", "1000"))
+    ttl_seconds = float(os.getenv("MEMORY_TTL_SECONDS", "3600"))
+    max_history = int(os.getenv("MEMORY_MAX_HISTORY", "5"))
+
+    if backend_name == "sqlite":
+        backend = SQLiteBackend(
+            db_path=os.getenv("MEMORY_SQLITE_PATH", "./session_memory.sqlite3"),
+            max_sessions=max_sessions,
+            ttl_seconds=ttl_seconds
+        )
+    elif backend_name == "memory":
+        backend = InMemoryBackend(max_sessions=max_sessions, ttl_seconds=ttl_seconds)
+    else:
+        raise ValueError(f"Unknown MEMORY_BACKEND: {backend_name} (expected 'memory' or 'sqlite')")
+
+    return SessionMemoryStore(backend, max_history=max_history)
@@ -0,0 +1,56 @@
+"""
+Single-flight coalescing of identical in-flight queries
+The first request for a key starts the work as a task; requests for the same key
+that arrive before it finishes await that task instead of repeating the
+embedding, retrieval and LLM calls
+"""
+
+import os
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class SingleFlight:
+    """Shares one asyncio task between concurrent callers with the same key"""
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self.counters = {"leaders": 0, "coalesced": 0}
+
+    async def do(self, key: Hashable, work: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Run work() once per key at a time; returns (result, whether this caller started it)
+
+        The task is shielded, so a leader whose client disconnects does not cancel the
+        work its followers are waiting on.
+        """
+        task = self._in_flight.get(key)
+        leader = task is None
+        if leader:
+            task = asyncio.ensure_future(work())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+            self.counters["leaders"] += 1
+        else:
+            self.counters["coalesced"] += 1
+        return await asyncio.shield(task), leader
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            task.exception()  # Retrieved here so an error nobody awaited any more is not logged as lost
+
+    def stats(self) -> Dict:
+        calls = self.counters["leaders"] + self.counters["coalesced"]
+        return {
+            **self.counters,
+            "in_flight": len(self._in_flight),
+            "coalesced_rate": round(self.counters["coalesced"] / calls, 4) if calls else 0.0
+        }
+
+
+def create_single_flight() -> Optional[SingleFlight]:
+    """Build the query coalescer from environment configuration (None when disabled)"""
+    if os.getenv("QUERY_COALESCING_ENABLED", "true").lower() != "true":
+        return None
+    return SingleFlight()
@@ -6,15 +6,32 @@ Fixes Bengali encoding issues and focuses on extracting actual story content
 
 import os
 import re
+import sys
+import glob
 import json
-import unicodedata
-from typing import List, Dict, Tuple, Optional
+import time
+import queue
+import shutil
+import hashlib
+import argparse
+import itertools
+import resource
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Dict, Tuple, Optional, Iterable, Iterator
 import fitz  # PyMuPDF for PDF processing
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_community.vectorstores import Chroma
+from chromadb.api.client import SharedSystemClient
 from langchain.schema import Document
 from dotenv import load_dotenv
+from embedding_pipeline import EmbeddingPipeline
+from providers import create_embeddings, embedding_model_id, recorded_embedding_model, record_embedding_model
+from vector_index import export_vector_index
+from question_bank import extract_questions, write_question_bank
+from page_classifier import is_story_page
+import metrics
+import bengali_normalizer
 
 # Load environment variables
 load_dotenv()
@@ -25,115 +42,13 @@ class BengaliTextProcessor:
     @staticmethod
     def fix_bengali_encoding(text: str) -> str:
         """Fix broken Bengali text encoding comprehensively"""
-        
-        # Step 1: Normalize to NFC (Canonical Decomposition + Composition)
-        text = unicodedata.normalize('NFC', text)
-        
-        # Step 2: Fix common broken conjuncts and characters
-        # These are the actual broken patterns we see in the PDF
-        conjunct_fixes = {
-            # Fix র্ + অন্য অক্ষর (র্ followed by other characters)
-            'র্ি': 'রি',      # র্ি -> রি  
-            'র্ব্': 'র্ব',      # র্ব্ -> র্ব (remove extra halant)
-            'র্ন': 'রন',      # র্ন -> রন
-            'র্ত': 'রত',      # র্ত -> রত
-            'র্চ': 'রচ',      # র্চ -> রচ
-            'র্ক': 'রক',      # র্ক -> রক
-            'র্ম': 'রম',      # র্ম -> রম
-            'র্প': 'রপ',      # র্প -> রপ
-            'র্ল': 'রল',      # র্ল -> রল
-            'র্স': 'রস',      # র্স -> রস
-            'র্গ': 'রগ',      # র্গ -> রগ
-            'র্থ': 'রথ',      # র্থ -> রথ
-            'র্ভ': 'রভ',      # র্ভ -> রভ
-            'র্দ': 'রদ',      # র্দ -> রদ
-            'র্জ': 'রজ',      # র্জ -> রজ
-            'র্য': 'র্য',      # Keep as is (this is correct)
-            
-            # Fix ন্ + অন্য অক্ষর patterns  
-            'ন্ত': 'ন্ত',     # Keep correct
-            'ন্ধ': 'ন্ধ',     # Keep correct
-            'ন্দ': 'ন্দ',     # Keep correct
-            'ন্ন': 'ন্ন',     # Keep correct
-            
-            # Fix ত্ + অন্য অক্ষর patterns
-            'ত্ত': 'ত্ত',     # Keep correct
-            'ত্র': 'ত্র',     # Keep correct
-            'ত্ম': 'ত্ম',     # Keep correct
-            
-            # Fix ক্ + অন্য অক্ষর patterns
-            'ক্ত': 'ক্ত',     # Keep correct
-            'ক্র': 'ক্র',     # Keep correct
-            'ক্ষ': 'ক্ষ',     # Keep correct
-            
-            # Fix ল্ + অন্য অক্ষর patterns
-            'ল্ল': 'ল্ল',     # Keep correct
-            'ল্প': 'ল্প',     # Keep correct
-            'ল্ট': 'ল্ট',     # Keep correct
-            
-            # Fix স্ + অন্য অক্ষর patterns
-            'স্ত': 'স্ত',     # Keep correct
-            'স্থ': 'স্থ',     # Keep correct
-            'স্ব': 'স্ব',     # Keep correct
-            'স্ম': 'স্ম',     # Keep correct
-            'স্ন': 'স্ন',     # Keep correct
-            
-            # Clean up zero-width characters
-            '\u200c': '',     # Remove ZWNJ (Zero Width Non-Joiner)
-            '\u200d': '',     # Remove ZWJ (Zero Width Joiner)
-            '\ufeff': '',     # Remove BOM (Byte Order Mark)
-        }
-        
-        # Apply fixes
-        for broken, fixed in conjunct_fixes.items():
-            text = text.replace(broken, fixed)
-        
-        # Step 3: Fix specific Bengali character issues
-        text = re.sub(r'্([ক-হড়ঢ়য়])', r'\1', text)  # Remove unnecessary halant before consonants
-        
-        # Step 4: Normalize whitespace
-        text = re.sub(r'\s+', ' ', text)
-        text = text.strip()
-        
-        return text
-    
+        return bengali_normalizer.fix_bengali_encoding(text)
+
+
     @staticmethod
     def is_story_content(text: str) -> bool:
-        """Determine if text is likely story content vs MCQ/metadata"""
-        # Story content indicators (including train scene indicators)
-        story_indicators = [
-            'গল্প', 'কাহিনী', 'চরিত্র', 'নায়ক', 'নায়িকা',
-            'বিয়ে', 'বিবাহ', 'অনুপম', 'কল্যাণী', 'শম্ভুনাথ',
-            'মামা', 'বাবা', 'মা', 'পিতা', 'মাতা',
-            'ঘটনা', 'পরিস্থিতি', 'সংলাপ', 'কথোপকথন',
-            'স্টেশন', 'গাড়ি', 'ট্রেন', 'রেল', 'প্ল্যাটফর্ম',
-            'যাত্রা', 'ভ্রমণ', 'স্টেশন-মাস্টার', 'টিকিট'
-        ]
-        
-        # MCQ indicators (to exclude)
-        mcq_indicators = [
-            'প্রশ্ন', 'উত্তর:', '(ক)', '(খ)', '(গ)', '(ঘ)',
-            'সঠিক', 'ভুল', 'নিচের কোনটি', 'কোন সালে'
-        ]
-        
-        # Check length (story content should be longer)
-        if len(text.strip()) < 50:
-            return False
-            
-        # Count indicators
-        story_count = sum(1 for indicator in story_indicators if indicator in text)
-        mcq_count = sum(1 for indicator in mcq_indicators if indicator in text)
-        
-        # If it has MCQ patterns, it's likely not story content
-        if mcq_count > 0 and '(ক)' in text:
-            return False
-            
-        # If it has story indicators and is substantial text, it's likely story
-        # OR if it contains transportation/journey elements (train scenes)
-        transportation_indicators = ['স্টেশন', 'গাড়ি', 'ট্রেন', 'রেল', 'প্ল্যাটফর্ম', 'যাত্রা']
-        has_transportation = any(indicator in text for indicator in transportation_indicators)
-        
-        return story_count > 0 or len(text.strip()) > 200 or has_transportation
+        """Determine if text is likely story content vs MCQ/metadata (see page_classifier.py)"""
+        return is_story_page(text)
     
     @staticmethod
     def clean_story_text(text: str) -> str:
@@ -153,73 +68,217 @@ class BengaliTextProcessor:
         
         return text
 
+def extract_page_range(pdf_path: str, start_page: int, end_page: int) -> Dict:
+    """Extract, fix and classify pages [start_page, end_page) of one PDF (process-pool work unit)"""
+    pdf_document = fitz.open(pdf_path)
+    story_chunks = []
+    questions = []
+    pages_processed = 0
+    pages_skipped = 0
+    
+    try:
+        for page_num in range(start_page, min(end_page, pdf_document.page_count)):
+            raw_text = pdf_document[page_num].get_text(flags=fitz.TEXT_PRESERVE_LIGATURES | fitz.TEXT_PRESERVE_WHITESPACE)
+            if not raw_text.strip():
+                continue
+            
+            pages_processed += 1
+            fixed_text = BengaliTextProcessor.fix_bengali_encoding(raw_text)
+            # MCQ blocks feed the question bank, whether or not the page is kept as story
+            questions.extend(extract_questions(fixed_text, page_num + 1, pdf_path))
+            
+            if not BengaliTextProcessor.is_story_content(fixed_text):
+                pages_skipped += 1
+                continue
+            
+            clean_text = BengaliTextProcessor.clean_story_text(fixed_text)
+            if len(clean_text.strip()) > 50:
+                story_chunks.append({
+                    "source": pdf_path,
+                    "page_number": page_num + 1,
+                    "content": clean_text,
+                    "content_length": len(clean_text),
+                    "content_type": "story"
+                })
+            else:
+                pages_skipped += 1
+    finally:
+        pdf_document.close()
+    
+    return {
+        "source": pdf_path,
+        "start_page": start_page,
+        "end_page": end_page,
+        "pages_processed": pages_processed,
+        "pages_skipped": pages_skipped,
+        "story_chunks": story_chunks,
+        "questions": questions
+    }
+
+def resolve_pdf_inputs(inputs: List[str]) -> List[str]:
+    """Expand files, directories and glob patterns into a sorted list of PDF paths"""
+    pdf_paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            matches = glob.glob(os.path.join(item, "**", "*.pdf"), recursive=True)
+        elif any(char in item for char in "*?["):
+            matches = glob.glob(item, recursive=True)
+        else:
+            matches = [item] if os.path.exists(item) else []
+        pdf_paths.extend(path for path in matches if path.lower().endswith(".pdf"))
+    return sorted(dict.fromkeys(pdf_paths))
+
 class StoryFocusedProcessor:
     """Process PDF to extract and properly encode Bengali story content"""
     
-    def __init__(self, pdf_path: str):
+    def __init__(self, pdf_path: Optional[str] = None):
         self.pdf_path = pdf_path
-        self.google_api_key = os.getenv("GOOGLE_API_KEY")
-        
-        if not self.google_api_key:
-            raise ValueError("GOOGLE_API_KEY not found in environment variables")
+        # Question/option/answer blocks found while extracting, for the question bank
+        self.questions: List[Dict] = []
     
     def extract_story_content(self) -> List[Dict]:
         """Extract story content from PDF with proper Bengali encoding"""
-        print(f"📖 Extracting story content from: {self.pdf_path}")
+        return list(self.iter_story_content())
+    
+    def iter_story_content(self, pdf_path: Optional[str] = None) -> Iterator[Dict]:
+        """Read, fix, classify and clean one page at a time, yielding story pages as they are found
         
-        # Open PDF
-        pdf_document = fitz.open(self.pdf_path)
+        Only the current page is held; the document is closed even if the consumer stops early.
+        """
+        pdf_path = pdf_path or self.pdf_path
+        print(f"📖 Extracting story content from: {pdf_path}")
         
-        story_chunks = []
         page_count = 0
         story_pages = 0
         
-        for page_num in range(pdf_document.page_count):
-            page = pdf_document[page_num]
-            
-            # Extract text with better encoding handling
-            raw_text = page.get_text(flags=fitz.TEXT_PRESERVE_LIGATURES | fitz.TEXT_PRESERVE_WHITESPACE)
-            
-            if not raw_text.strip():
-                continue
+        with fitz.open(pdf_path) as pdf_document:
+            for page_num in range(pdf_document.page_count):
+                # Extract text with better encoding handling
+                raw_text = pdf_document[page_num].get_text(flags=fitz.TEXT_PRESERVE_LIGATURES | fitz.TEXT_PRESERVE_WHITESPACE)
+                
+                if not raw_text.strip():
+                    continue
+                
+                page_count += 1
+                
+                # Fix Bengali encoding
+                fixed_text = BengaliTextProcessor.fix_bengali_encoding(raw_text)
+                self.questions.extend(extract_questions(fixed_text, page_num + 1, pdf_path))
+                
+                # Check if this is likely story content
+                if not BengaliTextProcessor.is_story_content(fixed_text):
+                    print(f"⏭️  Page {page_num + 1}: Skipped (MCQ/metadata content)")
+                    continue
                 
-            page_count += 1
-            
-            # Fix Bengali encoding
-            fixed_text = BengaliTextProcessor.fix_bengali_encoding(raw_text)
-            
-            # Check if this is likely story content
-            if BengaliTextProcessor.is_story_content(fixed_text):
                 # Clean the story text
                 clean_text = BengaliTextProcessor.clean_story_text(fixed_text)
-                
-                if len(clean_text.strip()) > 50:  # Only include substantial content
-                    story_chunks.append({
-                        "page_number": page_num + 1,
-                        "content": clean_text,
-                        "content_length": len(clean_text),
-                        "content_type": "story"
-                    })
-                    story_pages += 1
-                    print(f"✅ Page {page_num + 1}: Extracted {len(clean_text)} chars of story content")
-                else:
+                if len(clean_text.strip()) <= 50:  # Only include substantial content
                     print(f"⚠️  Page {page_num + 1}: Content too short after cleaning")
-            else:
-                print(f"⏭️  Page {page_num + 1}: Skipped (MCQ/metadata content)")
-        
-        pdf_document.close()
+                    continue
+                
+                story_pages += 1
+                print(f"✅ Page {page_num + 1}: Extracted {len(clean_text)} chars of story content")
+                yield {
+                    "source": pdf_path,
+                    "page_number": page_num + 1,
+                    "content": clean_text,
+                    "content_length": len(clean_text),
+                    "content_type": "story"
+                }
         
         print(f"\n📊 Extraction Summary:")
         print(f"   Total pages processed: {page_count}")
         print(f"   Story content pages: {story_pages}")
-        print(f"   Total story chunks: {len(story_chunks)}")
+        print(f"   MCQ questions found: {len(self.questions)}")
+    
+    def extract_story_content_parallel(self, pdf_paths: List[str], workers: Optional[int] = None,
+                                       pages_per_task: int = 4, queue_size: int = 64) -> Iterator[Dict]:
+        """Fan page extraction out over a process pool and stream story pages back
+        
+        Page ranges are the work unit. Finished pages pass through a bounded queue, so
+        extraction blocks instead of piling up results when the downstream stages lag.
+        """
+        tasks = []
+        for pdf_path in pdf_paths:
+            with fitz.open(pdf_path) as pdf_document:
+                page_count = pdf_document.page_count
+            for start_page in range(0, page_count, pages_per_task):
+                tasks.append((pdf_path, start_page, start_page + pages_per_task))
+        
+        workers = workers or os.cpu_count() or 1
+        print(f"📖 Extracting {len(pdf_paths)} PDF(s) as {len(tasks)} page-range tasks on {workers} worker(s)")
+        
+        results: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        finished = object()
+        stop = threading.Event()
+        
+        def produce():
+            try:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    task_iter = iter(tasks)
+                    in_flight = set()
+                    while True:
+                        while len(in_flight) < workers * 2 and not stop.is_set():
+                            task = next(task_iter, None)
+                            if task is None:
+                                break
+                            in_flight.add(executor.submit(extract_page_range, *task))
+                        if not in_flight:
+                            break
+                        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            results.put(future.result())
+            except Exception as e:
+                results.put(e)
+            finally:
+                results.put(finished)
+        
+        producer = threading.Thread(target=produce, name="pdf-extract", daemon=True)
+        producer.start()
+        
+        pages_processed = 0
+        story_pages = 0
+        try:
+            while True:
+                item = results.get()
+                if item is finished:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                
+                pages_processed += item["pages_processed"]
+                story_pages += len(item["story_chunks"])
+                self.questions.extend(item["questions"])
+                print(f"✅ {os.path.basename(item['source'])} pages {item['start_page'] + 1}-{item['end_page']}: "
+                      f"{len(item['story_chunks'])} story page(s), {item['pages_skipped']} skipped")
+                for chunk in item["story_chunks"]:
+                    yield chunk
+        finally:
+            # Unblock and stop the producer if the consumer bails out early
+            stop.set()
+            while producer.is_alive():
+                try:
+                    results.get(timeout=0.1)
+                except queue.Empty:
+                    pass
         
-        return story_chunks
+        print(f"\n📊 Extraction Summary:")
+        print(f"   PDFs processed: {len(pdf_paths)}")
+        print(f"   Total pages processed: {pages_processed}")
+        print(f"   Story content pages: {story_pages}")
+        print(f"   MCQ questions found: {len(self.questions)}")
     
     def create_langchain_documents(self, story_chunks: List[Dict]) -> List[Document]:
         """Convert story chunks to LangChain documents with proper chunking"""
         print(f"📄 Creating LangChain documents from {len(story_chunks)} story chunks...")
         
+        documents = list(self.iter_langchain_documents(story_chunks))
+        
+        print(f"✅ Created {len(documents)} LangChain documents")
+        return documents
+    
+    def iter_langchain_documents(self, story_chunks: Iterable[Dict]) -> Iterator[Document]:
+        """Lazily split story chunks into LangChain documents"""
         # Initialize text splitter for better chunking
         text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=800,  # Smaller chunks for better retrieval
@@ -228,11 +287,11 @@ class StoryFocusedProcessor:
             separators=['\n\n', '\n', '।', '।', '.', ' ']  # Bengali-aware separators
         )
         
-        documents = []
-        
         for chunk in story_chunks:
             page_num = chunk["page_number"]
             content = chunk["content"]
+            source = chunk.get("source", self.pdf_path)
+            source_key = self.source_key(source)
             
             # Split long content into smaller chunks
             if len(content) > 600:
@@ -244,65 +303,327 @@ class StoryFocusedProcessor:
                             page_content=sub_chunk.strip(),
                             metadata={
                                 "page": page_num,
-                                "chunk_id": f"{page_num}_{i}",
+                                "chunk_id": f"{source_key}:{page_num}_{i}",
                                 "content_type": "story",
-                                "source": self.pdf_path,
-                                "encoding_fixed": True
+                                "source": source,
+                                "encoding_fixed": True,
+                                "content_hash": self.content_hash(sub_chunk.strip(), source_key)
                             }
                         )
-                        documents.append(doc)
+                        yield doc
             else:
                 # Small content, keep as single document
                 doc = Document(
                     page_content=content.strip(),
                     metadata={
                         "page": page_num,
-                        "chunk_id": f"{page_num}_0",
+                        "chunk_id": f"{source_key}:{page_num}_0",
                         "content_type": "story", 
-                        "source": self.pdf_path,
-                        "encoding_fixed": True
+                        "source": source,
+                        "encoding_fixed": True,
+                        "content_hash": self.content_hash(content.strip(), source_key)
                     }
                 )
-                documents.append(doc)
-        
-        print(f"✅ Created {len(documents)} LangChain documents")
-        return documents
+                yield doc
     
-    def create_vector_store(self, documents: List[Document], persist_directory: str = "./chroma_db_story_focused") -> Chroma:
-        """Create vector store with story-focused documents"""
-        print(f"🔗 Creating vector store at: {persist_directory}")
-        
-        # Remove existing vector store
+    @staticmethod
+    def source_key(source: str) -> str:
+        """Short id of a source PDF for chunk ids; the file name only, so moving the PDFs keeps the ids"""
+        return hashlib.sha256(os.path.basename(source).encode("utf-8")).hexdigest()[:8]
+    
+    @staticmethod
+    def content_hash(text: str, source_key: str = "") -> str:
+        """Stable id for a cleaned chunk, used as its Chroma id; the same text in two sources gets two ids"""
+        return hashlib.sha256(f"{source_key}\x00{text}".encode("utf-8")).hexdigest()
+    
+    def create_vector_store(self, documents: Iterable[Document], persist_directory: str = "./chroma_db_story_focused") -> Chroma:
+        """Incrementally sync the vector store with the given documents
+        
+        Only new or changed chunks are embedded. Documents may be a lazy stream: new
+        chunks are embedded in groups as they arrive and only the ids seen so far are
+        kept in memory. The update is applied to a staging copy which the live path (a
+        symlink) is then switched to, so a running RAGSystem never opens a half-built index.
+        """
+        print(f"🔗 Syncing vector store at: {persist_directory}")
+        
+        # Initialize embeddings from the configured provider
+        embeddings = create_embeddings()
+        model_id = embedding_model_id()
+        print(f"🧠 Embedding model: {model_id}")
+        
+        # Work on a staging copy of the live store (unique name: Chroma caches clients per path)
+        persist_directory = os.path.normpath(persist_directory)
+        self._remove_stale_directories(persist_directory)
+        staging_directory = f"{persist_directory}.staging-{os.getpid()}-{int(time.time() * 1000)}"
         if os.path.exists(persist_directory):
-            import shutil
-            shutil.rmtree(persist_directory)
-            print(f"🗑️  Removed existing vector store")
-        
-        # Initialize embeddings
-        embeddings = GoogleGenerativeAIEmbeddings(
-            model="models/text-embedding-004",
-            google_api_key=self.google_api_key
-        )
+            shutil.copytree(persist_directory, staging_directory)
         
-        # Create vector store
-        vectorstore = Chroma.from_documents(
-            documents=documents,
-            embedding=embeddings,
-            persist_directory=persist_directory
+        vectorstore = Chroma(
+            persist_directory=staging_directory,
+            embedding_function=embeddings
         )
         
-        # Persist the vector store
+        # Vectors from another model cannot be mixed with new ones: rebuild from scratch
+        recorded_model = recorded_embedding_model(vectorstore._collection)
+        model_changed = recorded_model != model_id
+        if recorded_model is not None and model_changed:
+            print(f"⚠️  Store was embedded with {recorded_model}, re-embedding every chunk")
+            vectorstore.delete_collection()
+            vectorstore = Chroma(
+                persist_directory=staging_directory,
+                embedding_function=embeddings
+            )
+        record_embedding_model(vectorstore._collection, model_id)
+        
+        # A fingerprint per stored chunk instead of its full metadata, read a page at a time
+        existing_metadata = self._metadata_fingerprints(vectorstore._collection)
+        
+        # Embed new chunks in concurrent, rate-limited batches; a crash resumes from the checkpoint
+        # (one checkpoint per model, so a resume never mixes vectors from two models)
+        model_tag = hashlib.sha256(model_id.encode("utf-8")).hexdigest()[:8]
+        pipeline = EmbeddingPipeline.from_env(embeddings, checkpoint_path=f"{persist_directory}.checkpoint-{model_tag}.jsonl")
+        group_size = pipeline.batch_size * pipeline.concurrency * 4
+        
+        seen_ids = set()
+        pending_docs: List[Document] = []
+        pending_updates: List[Document] = []
+        added = updated = unchanged = 0
+        
+        for doc in documents:
+            # Identical chunks collapse onto one content-hash id
+            doc_id = doc.metadata.get("content_hash") or self.content_hash(doc.page_content)
+            doc.metadata["content_hash"] = doc_id
+            if doc_id in seen_ids:
+                continue
+            seen_ids.add(doc_id)
+            
+            if doc_id not in existing_metadata:
+                pending_docs.append(doc)
+                if len(pending_docs) >= group_size:
+                    added += self._embed_and_upsert(pipeline, vectorstore, pending_docs)
+                    pending_docs = []
+            elif existing_metadata[doc_id] != self.metadata_fingerprint(doc.metadata):
+                pending_updates.append(doc)
+                if len(pending_updates) >= group_size:
+                    updated += self._update_metadata(vectorstore, pending_updates)
+                    pending_updates = []
+            else:
+                unchanged += 1
+        
+        if pending_docs:
+            added += self._embed_and_upsert(pipeline, vectorstore, pending_docs)
+        if pending_updates:
+            updated += self._update_metadata(vectorstore, pending_updates)
+        
+        if not seen_ids:
+            # Never wipe a live store because extraction produced nothing
+            shutil.rmtree(staging_directory, ignore_errors=True)
+            print(f"⚠️  No documents received, leaving the existing vector store untouched")
+            return Chroma(persist_directory=persist_directory, embedding_function=embeddings)
+        
+        to_delete = [doc_id for doc_id in existing_metadata if doc_id not in seen_ids]
+        if to_delete:
+            vectorstore.delete(ids=to_delete)
+        
+        print(f"   New chunks embedded: {added}")
+        print(f"   Removed chunks: {len(to_delete)}")
+        print(f"   Metadata-only updates: {updated}")
+        print(f"   Unchanged chunks: {unchanged}")
+        
+        if not (added or to_delete or updated or model_changed):
+            shutil.rmtree(staging_directory)
+            print(f"✅ Vector store already up to date ({len(seen_ids)} documents)")
+            return Chroma(persist_directory=persist_directory, embedding_function=embeddings)
+        
+        # Persist the vector store, plus the memory-mapped copy API workers search
+        started = time.perf_counter()
         vectorstore.persist()
+        export_vector_index(vectorstore._collection, staging_directory, model_id)
+        metrics.INGEST_STAGE_SECONDS.inc(time.perf_counter() - started, stage="index_export")
+        
+        started = time.perf_counter()
+        self._swap_directories(staging_directory, persist_directory)
+        metrics.INGEST_STAGE_SECONDS.inc(time.perf_counter() - started, stage="swap")
+        pipeline.clear_checkpoint()
         
-        print(f"✅ Vector store created with {len(documents)} documents")
-        return vectorstore
+        print(f"✅ Vector store synced with {len(seen_ids)} documents")
+        return Chroma(persist_directory=persist_directory, embedding_function=embeddings)
+    
+    @staticmethod
+    def metadata_fingerprint(metadata: Dict) -> str:
+        """Short hash of a chunk's metadata, compared to detect metadata-only changes"""
+        return hashlib.sha256(json.dumps(metadata, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+    
+    @classmethod
+    def _metadata_fingerprints(cls, collection, page_size: int = 5000) -> Dict[str, str]:
+        """Fingerprints of every stored chunk, keyed by id"""
+        fingerprints = {}
+        for offset in range(0, collection.count(), page_size):
+            page = collection.get(include=["metadatas"], limit=page_size, offset=offset)
+            for doc_id, metadata in zip(page["ids"], page["metadatas"]):
+                fingerprints[doc_id] = cls.metadata_fingerprint(metadata)
+        return fingerprints
+    
+    @staticmethod
+    def _embed_and_upsert(pipeline: EmbeddingPipeline, vectorstore: Chroma, docs: List[Document]) -> int:
+        """Embed a group of new documents and write them to the store"""
+        docs_by_id = {doc.metadata["content_hash"]: doc for doc in docs}
+        started = time.perf_counter()
+        upsert_seconds = 0.0
+        for batch_ids, vectors in pipeline.run(list(docs_by_id), [doc.page_content for doc in docs_by_id.values()]):
+            upsert_started = time.perf_counter()
+            vectorstore._collection.upsert(
+                ids=batch_ids,
+                embeddings=vectors,
+                metadatas=[docs_by_id[doc_id].metadata for doc_id in batch_ids],
+                documents=[docs_by_id[doc_id].page_content for doc_id in batch_ids]
+            )
+            upsert_seconds += time.perf_counter() - upsert_started
+        metrics.INGEST_STAGE_SECONDS.inc(time.perf_counter() - started - upsert_seconds, stage="embedding")
+        metrics.INGEST_STAGE_SECONDS.inc(upsert_seconds, stage="upsert")
+        metrics.INGEST_ITEMS.inc(len(docs_by_id), stage="embedding")
+        return len(docs_by_id)
+    
+    @staticmethod
+    def _update_metadata(vectorstore: Chroma, docs: List[Document]) -> int:
+        """Rewrite metadata for chunks whose text is unchanged"""
+        started = time.perf_counter()
+        vectorstore._collection.update(
+            ids=[doc.metadata["content_hash"] for doc in docs],
+            metadatas=[doc.metadata for doc in docs]
+        )
+        metrics.INGEST_STAGE_SECONDS.inc(time.perf_counter() - started, stage="metadata_update")
+        return len(docs)
+    
+    @staticmethod
+    def _process_alive(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+    
+    @classmethod
+    def _remove_stale_directories(cls, persist_directory: str):
+        """Delete staging copies and store versions left behind by crashed or superseded runs
+        
+        Staging copies of a run that is still going are kept, and so are the version the
+        live symlink points at and the newest version it replaced: a server started before
+        the last swap still reads from that one.
+        """
+        previous_directory = f"{persist_directory}.previous"
+        if not os.path.lexists(persist_directory) and os.path.isdir(previous_directory):
+            # Crashed between moving a plain live directory aside and linking its replacement
+            os.rename(previous_directory, persist_directory)
+        
+        live_target = None
+        if os.path.islink(persist_directory):
+            live_target = os.path.abspath(os.path.join(os.path.dirname(persist_directory), os.readlink(persist_directory)))
+        parent = os.path.dirname(persist_directory) or "."
+        base = os.path.basename(persist_directory)
+        
+        def version_order(name: str) -> Optional[int]:
+            """Creation order of a store version directory (".previous" first), None for other names"""
+            if name == f"{base}.previous":
+                return -1
+            suffix = name[len(base) + 2:]
+            return int(suffix) if name.startswith(f"{base}.v") and suffix.isdigit() else None
+        
+        superseded = sorted(
+            (version_order(name), name) for name in os.listdir(parent)
+            if version_order(name) is not None and os.path.abspath(os.path.join(parent, name)) != live_target
+        )
+        retained = superseded[-1][1] if superseded and live_target is not None else None
+        for name in os.listdir(parent):
+            path = os.path.join(parent, name)
+            if name.startswith(f"{base}.staging-"):
+                pid = name[len(base) + len(".staging-"):].split("-")[0]
+                if pid.isdigit() and cls._process_alive(int(pid)):
+                    continue
+            elif name.startswith(f"{base}.link-"):
+                os.remove(path)
+                continue
+            elif version_order(name) is None or name == retained or os.path.abspath(path) == live_target:
+                continue
+            print(f"🧹 Removing stale {name}")
+            shutil.rmtree(path, ignore_errors=True)
+    
+    @staticmethod
+    def _swap_directories(staging_directory: str, persist_directory: str):
+        """Point the live store at the fully built staging copy in one atomic step
+        
+        The live path is a symlink to a versioned directory, replaced with os.replace, so
+        it always names one complete store (never a mix of old HNSW and new SQLite files).
+        The replaced version stays on disk until a later run, so servers that resolved the
+        link before the swap keep a complete store to read.
+        """
+        parent = os.path.dirname(persist_directory)
+        version = f"{os.path.basename(persist_directory)}.v{int(time.time() * 1000)}"
+        os.rename(staging_directory, os.path.join(parent, version))
+        
+        if os.path.exists(persist_directory) and not os.path.islink(persist_directory):
+            # First swap of a plain directory: it moves aside once and is kept like a replaced version
+            os.rename(persist_directory, f"{persist_directory}.previous")
+        
+        # Relative target, so the store can be moved or mounted elsewhere as a whole
+        link = f"{persist_directory}.link-{os.getpid()}"
+        os.symlink(version, link)
+        os.replace(link, persist_directory)
+        
+        # Cached Chroma clients still point at the replaced files
+        SharedSystemClient.clear_system_cache()
+        print(f"🔁 Swapped in updated vector store ({version})")
+
+def peak_rss_bytes() -> Dict[str, int]:
+    """Peak resident memory of this process and of its largest finished child (extraction workers)"""
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    unit = 1 if sys.platform == "darwin" else 1024
+    return {
+        "main": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit,
+        "workers": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * unit
+    }
+
+def report_ingest_metrics():
+    """Print seconds per ingestion stage; INGEST_METRICS_PATH also gets them in Prometheus text format"""
+    print("⏱️  Stage timings:")
+    for stage in ("extraction", "chunking", "embedding", "upsert", "metadata_update", "index_export", "swap"):
+        seconds = metrics.INGEST_STAGE_SECONDS.value(stage=stage)
+        if seconds:
+            print(f"   {stage}: {seconds:.3f}s")
+    
+    peak = peak_rss_bytes()
+    for process, value in peak.items():
+        metrics.INGEST_PEAK_RSS.set(value, process=process)
+    print(f"🧮 Peak RSS: {peak['main'] / 2**20:.1f} MiB main, {peak['workers'] / 2**20:.1f} MiB largest worker")
+    
+    metrics_path = os.getenv("INGEST_METRICS_PATH")
+    if metrics_path:
+        # Written for node_exporter's textfile collector: write then rename
+        with open(metrics_path + ".tmp", "w", encoding="utf-8") as handle:
+            handle.write(metrics.REGISTRY.render())
+        os.replace(metrics_path + ".tmp", metrics_path)
 
 def main():
-    """Main function to process PDF and create story-focused vector store"""
-    pdf_path = "./documents/HSC26-Bangla1st-Paper.pdf"
+    """Main function to process PDFs and sync the story-focused vector store"""
+    parser = argparse.ArgumentParser(description="Extract Bengali story content from PDFs into the vector store")
+    parser.add_argument("inputs", nargs="*", default=["./documents"],
+                        help="PDF files, directories or glob patterns (default: ./documents)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Extraction processes (default: CPU count)")
+    parser.add_argument("--pages-per-task", type=int, default=4,
+                        help="Pages per extraction work unit")
+    parser.add_argument("--queue-size", type=int, default=64,
+                        help="Maximum extracted page ranges buffered ahead of chunking/embedding")
+    parser.add_argument("--sequential", action="store_true",
+                        help="Extract in this process, one page at a time (lowest memory, no worker pool)")
+    parser.add_argument("--persist-directory", default="./chroma_db_story_focused")
+    args = parser.parse_args()
     
-    if not os.path.exists(pdf_path):
-        print(f"❌ PDF file not found: {pdf_path}")
+    pdf_paths = resolve_pdf_inputs(args.inputs)
+    if not pdf_paths:
+        print(f"❌ No PDF files found in: {', '.join(args.inputs)}")
         return
     
     print("🚀 Starting Story-Focused Processing...")
@@ -310,30 +631,62 @@ def main():
     
     try:
         # Initialize processor
-        processor = StoryFocusedProcessor(pdf_path)
-        
-        # Extract story content with fixed encoding
-        story_chunks = processor.extract_story_content()
-        
-        if not story_chunks:
-            print("❌ No story content found in PDF")
-            return
-        
-        # Create LangChain documents
-        documents = processor.create_langchain_documents(story_chunks)
-        
-        if not documents:
-            print("❌ No valid documents created")
+        processor = StoryFocusedProcessor()
+        
+        # Extract story pages in parallel and stream them through chunking into the store
+        stats = {"story_pages": 0, "documents": 0}
+        # Seconds spent waiting on each lazy stage, including the stages feeding it
+        waited = {"story_pages": 0.0, "documents": 0.0}
+        
+        def counted(items: Iterable, key: str) -> Iterator:
+            iterator = iter(items)
+            while True:
+                started = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    waited[key] += time.perf_counter() - started
+                stats[key] += 1
+                yield item
+        
+        if args.sequential:
+            extracted = itertools.chain.from_iterable(processor.iter_story_content(path) for path in pdf_paths)
+        else:
+            extracted = processor.extract_story_content_parallel(
+                pdf_paths,
+                workers=args.workers,
+                pages_per_task=args.pages_per_task,
+                queue_size=args.queue_size
+            )
+        story_pages = counted(extracted, "story_pages")
+        documents = counted(processor.iter_langchain_documents(story_pages), "documents")
+        
+        # Sync vector store (only new or changed chunks are embedded)
+        vectorstore = processor.create_vector_store(documents, persist_directory=args.persist_directory)
+        
+        # Exam questions answered without retrieval or the LLM (see question_bank.py)
+        if processor.questions:
+            bank_path = write_question_bank(processor.questions, args.persist_directory)
+            print(f"❓ Question bank: {len(processor.questions)} questions written to {bank_path}")
+        
+        metrics.INGEST_STAGE_SECONDS.inc(waited["story_pages"], stage="extraction")
+        metrics.INGEST_STAGE_SECONDS.inc(waited["documents"] - waited["story_pages"], stage="chunking")
+        metrics.INGEST_ITEMS.inc(stats["story_pages"], stage="extraction")
+        metrics.INGEST_ITEMS.inc(stats["documents"], stage="chunking")
+        report_ingest_metrics()
+        
+        if not stats["documents"]:
+            print("❌ No story content found in PDFs")
             return
         
-        # Create vector store
-        vectorstore = processor.create_vector_store(documents)
-        
         print("\n🎉 Story-focused processing completed successfully!")
         print(f"📊 Final Stats:")
-        print(f"   Story chunks extracted: {len(story_chunks)}")
-        print(f"   LangChain documents: {len(documents)}")
-        print(f"   Vector store: chroma_db_story_focused")
+        print(f"   PDFs processed: {len(pdf_paths)}")
+        print(f"   Story chunks extracted: {stats['story_pages']}")
+        print(f"   LangChain documents: {stats['documents']}")
+        print(f"   Vector store: {args.persist_directory}")
         print(f"   Bengali encoding: ✅ Fixed")
         
         # Test the vector store
@@ -343,6 +696,7 @@ def main():
         
         for i, result in enumerate(test_results[:2]):
             print(f"\nResult {i+1}:")
+            print(f"Source: {result.metadata.get('source', 'unknown')}")
             print(f"Page: {result.metadata.get('page', 'unknown')}")
             print(f"Content (first 100 chars): {result.page_content[:100]}...")
         
@@ -0,0 +1,8 @@
+"""
+Test configuration: backend modules are imported flat, as main.py and the scripts do
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
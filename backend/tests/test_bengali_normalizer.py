@@ -0,0 +1,37 @@
+"""
+The compiled single-pass normalizer against a pinned golden corpus of the chained
+str.replace implementations it replaced (regenerate with
+benchmarks/bench_normalizer.py --write-golden tests/fixtures/bengali_normalizer_golden.json)
+"""
+
+import os
+import json
+import unicodedata
+
+import pytest
+
+from bengali_normalizer import fix_bengali_encoding, normalize_bengali_text, to_nfc
+
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "bengali_normalizer_golden.json")
+
+with open(GOLDEN_PATH, encoding="utf-8") as f:
+    GOLDEN_CASES = json.load(f)
+
+
+@pytest.mark.parametrize("function", [fix_bengali_encoding, normalize_bengali_text], ids=lambda function: function.__name__)
+def test_matches_golden_output(function):
+    mismatches = [case["input"] for case in GOLDEN_CASES if function(case["input"]) != case[function.__name__]]
+    assert not mismatches, f"{len(mismatches)} of {len(GOLDEN_CASES)} differ, first: {mismatches[0][:60]!r}"
+
+
+def test_to_nfc_matches_unicodedata():
+    mismatches = [case["input"] for case in GOLDEN_CASES
+                  if to_nfc(case["input"]) != unicodedata.normalize("NFC", case["input"])]
+    assert not mismatches, f"first mismatch: {mismatches[0][:60]!r}"
+
+
+def test_golden_corpus_covers_the_fixes():
+    inputs = [case["input"] for case in GOLDEN_CASES]
+    assert len(inputs) > 300
+    for marker in ("র্ি", "র্ব্", "\u200c", "\u200d", "\ufeff", "\u09bc"):
+        assert any(marker in text for text in inputs), marker
@@ -0,0 +1,113 @@
+"""
+Ingestion embedding stage against the fake embedder: batching, the resumable
+checkpoint, and which errors are retried
+"""
+
+from typing import List
+
+import pytest
+
+from embedding_pipeline import EmbeddingCheckpoint, EmbeddingPipeline
+from fakes import FakeEmbeddings, FakeRateLimitError
+
+
+class ServerError(Exception):
+    """An HTTP client error carrying its status code"""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"{status_code} error")
+        self.status_code = status_code
+
+
+class FlakyEmbeddings(FakeEmbeddings):
+    """FakeEmbeddings that raises the given errors on its first calls"""
+
+    def __init__(self, errors: List[Exception]):
+        super().__init__(dimensions=8)
+        self.errors = list(errors)
+        self.sizes: List[int] = []
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        self.sizes.append(len(texts))
+        return [self._vector(text) for text in texts]
+
+
+def make_pipeline(embeddings, **kwargs) -> EmbeddingPipeline:
+    settings = {"batch_size": 3, "concurrency": 1, "base_delay": 0.001, "max_delay": 0.01, "report_every": 60.0}
+    return EmbeddingPipeline(embeddings, **{**settings, **kwargs})
+
+
+def collect(pipeline: EmbeddingPipeline, count: int) -> dict:
+    ids = [f"chunk-{index}" for index in range(count)]
+    texts = [f"অনুপম chunk {index}" for index in range(count)]
+    return {doc_id: vector for batch_ids, vectors in pipeline.run(ids, texts) for doc_id, vector in zip(batch_ids, vectors)}
+
+
+def test_embeds_in_fixed_size_batches():
+    fake = FlakyEmbeddings([])
+    vectors = collect(make_pipeline(fake), 10)
+    assert fake.sizes == [3, 3, 3, 1]
+    assert vectors["chunk-4"] == fake._vector("অনুপম chunk 4")
+    assert len(vectors) == 10
+
+
+def test_resumes_from_checkpoint_without_calling_the_model(tmp_path):
+    path = str(tmp_path / "embeddings.checkpoint.jsonl")
+    first = FlakyEmbeddings([])
+    expected = collect(make_pipeline(first, checkpoint_path=path), 10)
+    with open(path, "a", encoding="utf-8") as handle:
+        handle.write('{"ids": ["torn')  # A crash mid-write leaves a partial last line
+
+    second = FlakyEmbeddings([])
+    pipeline = make_pipeline(second, checkpoint_path=path)
+    assert collect(pipeline, 10) == expected
+    assert second.calls == 0
+    assert pipeline.stats["resumed"] == 10
+    assert len(EmbeddingCheckpoint(path).load()) == 10
+
+
+def test_backs_off_and_retries_rate_limits():
+    fake = FlakyEmbeddings([FakeRateLimitError(), FakeRateLimitError()])
+    pipeline = make_pipeline(fake)
+    assert len(collect(pipeline, 3)) == 3
+    assert fake.calls == 3
+    assert pipeline.stats["rate_limited"] == 2
+    assert pipeline.stats["backoff_seconds"] > 0
+
+
+@pytest.mark.parametrize("error", [ServerError(503), TimeoutError("read timed out")], ids=["5xx", "timeout"])
+def test_retries_transient_errors(error):
+    fake = FlakyEmbeddings([error])
+    pipeline = make_pipeline(fake)
+    assert len(collect(pipeline, 3)) == 3
+    assert fake.calls == 2
+    assert pipeline.stats["errors"] == 1
+
+
+@pytest.mark.parametrize("error", [ServerError(400), ValueError("malformed request")], ids=["4xx", "other"])
+def test_raises_other_errors_without_retrying(error):
+    fake = FlakyEmbeddings([error])
+    pipeline = make_pipeline(fake)
+    with pytest.raises(type(error)):
+        collect(pipeline, 3)
+    assert fake.calls == 1
+    assert pipeline.stats["backoff_seconds"] == 0
+
+
+def test_gives_up_after_max_retries():
+    fake = FlakyEmbeddings([FakeRateLimitError()] * 5)
+    with pytest.raises(FakeRateLimitError):
+        collect(make_pipeline(fake, max_retries=2), 3)
+    assert fake.calls == 3
+
+
+def test_random_rate_limits_across_workers_lose_no_chunks():
+    fake = FakeEmbeddings(dimensions=8, error_rate=0.3, seed=1)
+    pipeline = make_pipeline(fake, concurrency=3, max_retries=20)
+    vectors = collect(pipeline, 30)
+    assert sorted(vectors) == sorted(f"chunk-{index}" for index in range(30))
+    assert pipeline.stats["rate_limited"] > 0
+    assert fake.calls == pipeline.stats["batches"] + pipeline.stats["rate_limited"]
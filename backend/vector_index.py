@@ -0,0 +1,234 @@
+"""
+NumPy vector indexes searched instead of Chroma's HNSW index
+MmapVectorIndex maps a read-only export, written at ingestion or snapshot import,
+that every worker process shares through the OS page cache; InMemoryVectorIndex
+holds one contiguous, optionally quantized matrix. Both brute-force search with Chroma's distance definitions, so relevance
+scores and thresholds are unchanged
+"""
+
+import os
+import json
+import logging
+import hashlib
+from typing import Any, List, Dict, Optional, Tuple
+
+import numpy as np
+
+INDEX_DIRNAME = "numpy_index"
+EMBEDDINGS_FILE = "embeddings.npy"
+META_FILE = "meta.json"
+INDEX_FORMAT = 1
+INDEX_DTYPES = ("float32", "float16", "int8")
+
+logger = logging.getLogger(__name__)
+
+
+def collection_signature(ids: List[str], embedding_model: str) -> str:
+    """Identity of a collection's contents: chunk ids are content hashes, so this changes with any edit"""
+    digest = hashlib.sha256(embedding_model.encode("utf-8"))
+    for doc_id in sorted(ids):
+        digest.update(b"\x00" + doc_id.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def export_vector_index(collection: Any, persist_directory: str, embedding_model: str,
+                        page_size: int = 2000) -> str:
+    """Write the collection's vectors, texts and metadata next to the Chroma files
+
+    Vectors are read a page at a time straight into the .npy file, so exporting never
+    holds the whole collection's embeddings as Python lists.
+    """
+    index_directory = os.path.join(persist_directory, INDEX_DIRNAME)
+    os.makedirs(index_directory, exist_ok=True)
+    embeddings_path = os.path.join(index_directory, EMBEDDINGS_FILE)
+
+    total = collection.count()
+    ids: List[str] = []
+    documents: List[str] = []
+    metadatas: List[Dict] = []
+    matrix = None
+    for offset in range(0, total, page_size):
+        page = collection.get(include=["embeddings", "documents", "metadatas"], limit=page_size, offset=offset)
+        vectors = np.asarray(page["embeddings"], dtype=np.float32).reshape(len(page["ids"]), -1)
+        if matrix is None:
+            matrix = np.lib.format.open_memmap(embeddings_path + ".tmp", mode="w+", dtype=np.float32,
+                                               shape=(total, vectors.shape[1]))
+        matrix[len(ids):len(ids) + len(vectors)] = vectors
+        ids.extend(page["ids"])
+        documents.extend(page["documents"])
+        metadatas.extend(page["metadatas"])
+    if matrix is None:
+        with open(embeddings_path + ".tmp", "wb") as handle:
+            np.save(handle, np.zeros((0, 0), dtype=np.float32))
+    else:
+        matrix.flush()
+        del matrix
+
+    meta = {
+        "format": INDEX_FORMAT,
+        "signature": collection_signature(ids, embedding_model),
+        "embedding_model": embedding_model,
+        "space": (collection.metadata or {}).get("hnsw:space", "l2"),
+        "ids": ids,
+        "documents": documents,
+        "metadatas": metadatas
+    }
+
+    # Write-then-rename, so a reader never maps a half-written file
+    os.replace(embeddings_path + ".tmp", embeddings_path)
+
+    meta_path = os.path.join(index_directory, META_FILE)
+    with open(meta_path + ".tmp", "w", encoding="utf-8") as handle:
+        json.dump(meta, handle, ensure_ascii=False)
+    os.replace(meta_path + ".tmp", meta_path)
+    return index_directory
+
+
+def chroma_distances(space: str, products: np.ndarray, query_norms: np.ndarray,
+                     row_norms: np.ndarray) -> np.ndarray:
+    """(m, n) distances as Chroma reports them, from raw dot products and vector norms"""
+    if space == "ip":
+        return 1.0 - products
+    if space == "cosine":
+        return 1.0 - products / np.maximum(query_norms[:, None] * row_norms[None, :], 1e-12)
+    # hnswlib's l2 space is the squared euclidean distance
+    return np.maximum(query_norms[:, None] ** 2 + row_norms[None, :] ** 2 - 2.0 * products, 0.0)
+
+
+class VectorIndex:
+    """Shared top-k search; subclasses provide the dot products of queries with every row"""
+
+    space: str = "l2"
+    ids: List[str]
+    documents: List[str]
+    metadatas: List[Dict]
+    row_norms: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def dot_products(self, queries: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def search(self, embeddings: List[List[float]], k: int) -> List[List[Tuple[int, float]]]:
+        """Top-k (row, distance) pairs per query, closest first"""
+        queries = np.asarray(embeddings, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries[None, :]
+        all_distances = chroma_distances(
+            self.space, self.dot_products(queries), np.linalg.norm(queries, axis=1), self.row_norms
+        )
+        k = min(k, len(self.ids))
+        results = []
+        for distances in all_distances:
+            if k <= 0:
+                results.append([])
+                continue
+            top = np.argpartition(distances, k - 1)[:k] if k < len(distances) else np.arange(len(distances))
+            top = top[np.argsort(distances[top], kind="stable")]
+            results.append([(int(row), float(distances[row])) for row in top])
+        return results
+
+
+class MmapVectorIndex(VectorIndex):
+    """Memory-mapped float32 export shared by every worker process"""
+
+    backend = "mmap"
+
+    def __init__(self, index_directory: str):
+        with open(os.path.join(index_directory, META_FILE), "r", encoding="utf-8") as handle:
+            meta = json.load(handle)
+        self.signature = meta["signature"]
+        self.embedding_model = meta["embedding_model"]
+        self.space = meta["space"]
+        self.ids = meta["ids"]
+        self.documents = meta["documents"]
+        self.metadatas = meta["metadatas"]
+        self.matrix = np.load(os.path.join(index_directory, EMBEDDINGS_FILE), mmap_mode="r")
+        # One float per row, kept in process memory
+        self.row_norms = np.sqrt(np.einsum("ij,ij->i", self.matrix, self.matrix))
+
+    def dot_products(self, queries: np.ndarray) -> np.ndarray:
+        return queries @ self.matrix.T
+
+
+class InMemoryVectorIndex(VectorIndex):
+    """Unit-normalized rows in one contiguous matrix: float32, float16, or int8 with a per-row scale"""
+
+    backend = "numpy"
+
+    def __init__(self, collection: Any, dtype: str = "float32"):
+        if dtype not in INDEX_DTYPES:
+            raise ValueError(f"Unknown vector index dtype: {dtype} (expected one of {', '.join(INDEX_DTYPES)})")
+        stored = collection.get(include=["embeddings", "documents", "metadatas"])
+        self.space = (collection.metadata or {}).get("hnsw:space", "l2")
+        self.ids = stored["ids"]
+        self.documents = stored["documents"]
+        self.metadatas = stored["metadatas"]
+        self.dtype = dtype
+
+        vectors = np.asarray(stored["embeddings"], dtype=np.float32).reshape(len(self.ids), -1)
+        self.row_norms = np.linalg.norm(vectors, axis=1)
+        unit = vectors / np.maximum(self.row_norms, 1e-12)[:, None]
+        if dtype == "int8":
+            # Symmetric per-row quantization: the largest component maps to +-127
+            self.row_scales = 127.0 / np.maximum(np.abs(unit).max(axis=1), 1e-12)
+            self.matrix = np.ascontiguousarray(np.rint(unit * self.row_scales[:, None]).astype(np.int8))
+        else:
+            self.matrix = np.ascontiguousarray(unit.astype(dtype))
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.matrix.nbytes)
+
+    def dot_products(self, queries: np.ndarray) -> np.ndarray:
+        if self.dtype == "int8":
+            # Quantize the queries too, so the product runs on int8 with int32 accumulation
+            query_scales = 127.0 / np.maximum(np.abs(queries).max(axis=1), 1e-12)
+            quantized = np.rint(queries * query_scales[:, None]).astype(np.int8)
+            products = np.matmul(quantized, self.matrix.T, dtype=np.int32).astype(np.float32)
+            products /= query_scales[:, None] * self.row_scales[None, :]
+        else:
+            products = (queries.astype(self.matrix.dtype) @ self.matrix.T).astype(np.float32)
+        # Rows are stored normalized; their norms restore Chroma's unnormalized distances
+        return products * self.row_norms[None, :]
+
+
+def open_vector_index(collection: Any, persist_directory: str, embedding_model: str) -> Optional[MmapVectorIndex]:
+    """Open the export written at ingestion or snapshot import, read-only; None if it is missing or stale
+
+    Serving never writes the export, so every worker can map the same files, from a
+    read-only mount too.
+    """
+    index_directory = os.path.join(persist_directory, INDEX_DIRNAME)
+    try:
+        index = MmapVectorIndex(index_directory)
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"⚠️ No readable vector index export in {index_directory} ({e}), using Chroma search. "
+                       "Re-run ingestion to write it")
+        return None
+    if index.signature != collection_signature(collection.get(include=[])["ids"], embedding_model):
+        logger.warning(f"⚠️ Vector index export in {index_directory} does not match the store, using Chroma search. "
+                       "Re-run ingestion to rewrite it")
+        return None
+    return index
+
+
+def create_vector_index(collection: Any, persist_directory: str, embedding_model: str) -> Optional[VectorIndex]:
+    """Build the VECTOR_BACKEND index, or None to keep searching Chroma"""
+    backend = os.getenv("VECTOR_BACKEND", "chroma").lower()
+    if backend == "chroma":
+        return None
+    if backend not in ("mmap", "numpy"):
+        raise ValueError(f"Unknown VECTOR_BACKEND: {backend} (expected 'chroma', 'mmap' or 'numpy')")
+
+    # Brute force stops paying off on large corpora, where HNSW wins
+    max_chunks = int(os.getenv("VECTOR_INDEX_MAX_CHUNKS", "50000"))
+    count = collection.count()
+    if count > max_chunks:
+        logger.warning(f"⚠️ {count} chunks exceeds VECTOR_INDEX_MAX_CHUNKS={max_chunks}, using Chroma search")
+        return None
+
+    if backend == "mmap":
+        return open_vector_index(collection, persist_directory, embedding_model)
+    return InMemoryVectorIndex(collection, dtype=os.getenv("VECTOR_INDEX_DTYPE", "float32").lower())
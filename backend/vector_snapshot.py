@@ -0,0 +1,361 @@
+"""
+Single-file snapshots of the vector store
+A snapshot holds every chunk's text, metadata and vector, plus the question bank,
+independent of the chromadb version that built the store. Rolling out a corpus is
+copying one file: RAGSystem memory-maps the matrix (VECTOR_SNAPSHOT_PATH) instead of
+opening Chroma, and `import` rebuilds a Chroma directory from it when one is needed.
+
+Layout (little-endian):
+    MAGIC | padding to 64 bytes | float32/float16 matrix, rows x dimensions |
+    float32 row norms | zlib-compressed JSON table (ids, documents, metadata by
+    column, extras) | JSON header | header length (uint64) | MAGIC
+The header sits at the end so the file is written in one streaming pass; it records
+the format version, shape, dtype, offsets and SHA-256 of the matrix, the norms and
+the table. Loading checks the header, norms and table; hashing the whole matrix is
+left to inspect/import, or done once per file (VECTOR_SNAPSHOT_VERIFY=once).
+"""
+
+import os
+import json
+import zlib
+import struct
+import hashlib
+import argparse
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from langchain_core.vectorstores import VectorStore
+
+from vector_index import VectorIndex, collection_signature
+
+MAGIC = b"RAGSNAP\x00"
+SNAPSHOT_FORMAT = 2
+SNAPSHOT_DTYPES = ("float32", "float16")
+# Stored byte order is little-endian whatever the writing machine uses
+_FILE_DTYPES = {"float32": "<f4", "float16": "<f2"}
+MATRIX_OFFSET = 64
+# header: header, norms and table checksums; once: also the matrix checksum, the first
+# time each file (by size and mtime) is loaded; always: the matrix checksum on every load
+SNAPSHOT_VERIFY_MODES = ("header", "once", "always")
+VERIFIED_SUFFIX = ".verified"
+_FOOTER = struct.Struct("<Q8s")
+_HASH_BLOCK = 1 << 20
+
+
+class SnapshotError(ValueError):
+    """The file is not a snapshot, has an unsupported format, or fails its checksums"""
+
+
+def _columns(metadatas: List[Dict]) -> Dict[str, List]:
+    """Metadata as one list per key (None where a chunk lacks the key)"""
+    keys = sorted({key for metadata in metadatas for key in (metadata or {})})
+    return {key: [(metadata or {}).get(key) for metadata in metadatas] for key in keys}
+
+
+def _rows(columns: Dict[str, List], count: int) -> List[Dict]:
+    return [
+        {key: values[row] for key, values in columns.items() if values[row] is not None}
+        for row in range(count)
+    ]
+
+
+def _region_sha256(path: str, offset: int, length: int) -> str:
+    """SHA-256 of a byte range, read in blocks so the matrix is never copied whole"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        handle.seek(offset)
+        while length > 0:
+            block = handle.read(min(_HASH_BLOCK, length))
+            if not block:
+                break
+            digest.update(block)
+            length -= len(block)
+    return digest.hexdigest()
+
+
+def write_snapshot(collection: Any, path: str, embedding_model: str, dtype: str = "float32",
+                   extras: Optional[Dict] = None, page_size: int = 2000) -> Dict:
+    """Stream a Chroma collection into a snapshot file (temp file then rename); returns its header"""
+    if dtype not in SNAPSHOT_DTYPES:
+        raise ValueError(f"Unknown snapshot dtype: {dtype} (expected one of {', '.join(SNAPSHOT_DTYPES)})")
+
+    total = collection.count()
+    ids: List[str] = []
+    documents: List[str] = []
+    metadatas: List[Dict] = []
+    norms: List[np.ndarray] = []
+    dimensions = 0
+    matrix_digest = hashlib.sha256()
+    with open(path + ".tmp", "wb") as handle:
+        handle.write(MAGIC.ljust(MATRIX_OFFSET, b"\x00"))
+        for offset in range(0, total, page_size):
+            page = collection.get(include=["embeddings", "documents", "metadatas"], limit=page_size, offset=offset)
+            vectors = np.asarray(page["embeddings"], dtype=np.float32).reshape(len(page["ids"]), -1)
+            dimensions = vectors.shape[1]
+            stored = np.ascontiguousarray(vectors.astype(_FILE_DTYPES[dtype]))
+            data = stored.tobytes()
+            matrix_digest.update(data)
+            handle.write(data)
+            # Norms of the vectors as stored, so float16 distances stay consistent
+            stored = stored.astype(np.float32)
+            norms.append(np.sqrt(np.einsum("ij,ij->i", stored, stored)))
+            ids.extend(page["ids"])
+            documents.extend(text or "" for text in page["documents"])
+            metadatas.extend(metadata or {} for metadata in page["metadatas"])
+
+        norms_offset = handle.tell()
+        norms_data = np.concatenate(norms).astype("<f4").tobytes() if norms else b""
+        handle.write(norms_data)
+
+        table = zlib.compress(json.dumps({
+            "ids": ids,
+            "documents": documents,
+            "metadata": _columns(metadatas),
+            "extras": extras or {}
+        }, ensure_ascii=False).encode("utf-8"), 6)
+        table_offset = handle.tell()
+        handle.write(table)
+
+        header = {
+            "format": SNAPSHOT_FORMAT,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "embedding_model": embedding_model,
+            "signature": collection_signature(ids, embedding_model),
+            "space": (collection.metadata or {}).get("hnsw:space", "l2"),
+            "dtype": dtype,
+            "rows": len(ids),
+            "dimensions": dimensions,
+            "matrix_offset": MATRIX_OFFSET,
+            "matrix_sha256": matrix_digest.hexdigest(),
+            "norms_offset": norms_offset,
+            "norms_sha256": hashlib.sha256(norms_data).hexdigest(),
+            "table_offset": table_offset,
+            "table_bytes": len(table),
+            "table_sha256": hashlib.sha256(table).hexdigest()
+        }
+        encoded = json.dumps(header).encode("utf-8")
+        handle.write(encoded)
+        handle.write(_FOOTER.pack(len(encoded), MAGIC))
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(path + ".tmp", path)
+    return header
+
+
+def read_snapshot_header(path: str) -> Dict:
+    with open(path, "rb") as handle:
+        handle.seek(0, os.SEEK_END)
+        size = handle.tell()
+        if size < MATRIX_OFFSET + _FOOTER.size:
+            raise SnapshotError(f"{path} is too small to be a vector snapshot")
+        handle.seek(size - _FOOTER.size)
+        header_length, magic = _FOOTER.unpack(handle.read(_FOOTER.size))
+        handle.seek(0)
+        if magic != MAGIC or handle.read(len(MAGIC)) != MAGIC:
+            raise SnapshotError(f"{path} is not a vector snapshot")
+        handle.seek(size - _FOOTER.size - header_length)
+        header = json.loads(handle.read(header_length))
+    if header.get("format") != SNAPSHOT_FORMAT:
+        raise SnapshotError(f"{path} has snapshot format {header.get('format')}, this build reads {SNAPSHOT_FORMAT}")
+    return header
+
+
+class SnapshotVectorIndex(VectorIndex):
+    """Memory-mapped snapshot matrix with its chunk texts and metadata"""
+
+    backend = "snapshot"
+
+    def __init__(self, path: str, verify: str = "header"):
+        """Map the matrix and load the norms and table; verify is one of SNAPSHOT_VERIFY_MODES"""
+        if verify not in SNAPSHOT_VERIFY_MODES:
+            raise ValueError(f"Unknown snapshot verify mode: {verify} (expected one of {', '.join(SNAPSHOT_VERIFY_MODES)})")
+        header = read_snapshot_header(path)
+        with open(path, "rb") as handle:
+            handle.seek(header["norms_offset"])
+            norms = handle.read(header["table_offset"] - header["norms_offset"])
+            table = handle.read(header["table_bytes"])
+        if hashlib.sha256(norms).hexdigest() != header["norms_sha256"]:
+            raise SnapshotError(f"{path}: row norms checksum mismatch")
+        if hashlib.sha256(table).hexdigest() != header["table_sha256"]:
+            raise SnapshotError(f"{path}: metadata table checksum mismatch")
+        payload = json.loads(zlib.decompress(table))
+
+        self.path = path
+        self.header = header
+        self.signature = header["signature"]
+        self.embedding_model = header["embedding_model"]
+        self.space = header["space"]
+        self.ids = payload["ids"]
+        self.documents = payload["documents"]
+        self.metadatas = _rows(payload["metadata"], len(self.ids))
+        self.extras = payload["extras"]
+
+        shape = (header["rows"], header["dimensions"])
+        if header["rows"]:
+            self.matrix = np.memmap(path, dtype=_FILE_DTYPES[header["dtype"]], mode="r",
+                                    offset=header["matrix_offset"], shape=shape)
+        else:
+            self.matrix = np.zeros(shape, dtype=_FILE_DTYPES[header["dtype"]])
+        # One float per row, kept in process memory; read from the file, not recomputed
+        self.row_norms = np.frombuffer(norms, dtype="<f4").astype(np.float32)
+        if len(self.row_norms) != header["rows"]:
+            raise SnapshotError(f"{path}: has {len(self.row_norms)} row norms for {header['rows']} rows")
+        if verify == "always" or (verify == "once" and not self._verified_before()):
+            self.verify_matrix()
+
+    def _file_identity(self) -> Dict:
+        stat = os.stat(self.path)
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "matrix_sha256": self.header["matrix_sha256"]}
+
+    def _verified_before(self) -> bool:
+        try:
+            with open(self.path + VERIFIED_SUFFIX, encoding="utf-8") as handle:
+                return json.load(handle) == self._file_identity()
+        except (OSError, ValueError):
+            return False
+
+    def verify_matrix(self):
+        """Hash the whole matrix against the header, and remember the file as verified"""
+        length = self.matrix.size * self.matrix.itemsize
+        if _region_sha256(self.path, self.header["matrix_offset"], length) != self.header["matrix_sha256"]:
+            raise SnapshotError(f"{self.path}: matrix checksum mismatch")
+        try:
+            with open(self.path + VERIFIED_SUFFIX, "w", encoding="utf-8") as handle:
+                json.dump(self._file_identity(), handle)
+        except OSError:
+            # A read-only deployment just verifies again next time it is asked to
+            pass
+
+    def dot_products(self, queries: np.ndarray) -> np.ndarray:
+        return (queries @ self.matrix.T).astype(np.float32)
+
+
+class SnapshotCollection:
+    """Read-only stand-in for the parts of a Chroma collection the API reads"""
+
+    def __init__(self, index: SnapshotVectorIndex):
+        self.index = index
+        self.metadata = {"hnsw:space": index.space}
+
+    def count(self) -> int:
+        return len(self.index)
+
+    def get(self, include: Optional[List[str]] = None, limit: Optional[int] = None, offset: int = 0) -> Dict:
+        include = ["documents", "metadatas"] if include is None else include
+        end = len(self.index) if limit is None else offset + limit
+        result: Dict[str, Any] = {"ids": self.index.ids[offset:end]}
+        if "documents" in include:
+            result["documents"] = self.index.documents[offset:end]
+        if "metadatas" in include:
+            result["metadatas"] = self.index.metadatas[offset:end]
+        if "embeddings" in include:
+            result["embeddings"] = np.asarray(self.index.matrix[offset:end], dtype=np.float32).tolist()
+        return result
+
+
+class SnapshotVectorStore:
+    """What RAGSystem and HybridRetriever use of a LangChain Chroma store, served from a snapshot"""
+
+    def __init__(self, index: SnapshotVectorIndex, embeddings: Any):
+        self.index = index
+        self.embeddings = embeddings
+        self._collection = SnapshotCollection(index)
+
+    def _select_relevance_score_fn(self):
+        """Same distance-to-relevance mapping LangChain's Chroma store uses for the space"""
+        if self.index.space == "cosine":
+            return VectorStore._cosine_relevance_score_fn
+        if self.index.space == "ip":
+            return VectorStore._max_inner_product_relevance_score_fn
+        return VectorStore._euclidean_relevance_score_fn
+
+
+def load_snapshot_store(path: str, embeddings: Any) -> SnapshotVectorStore:
+    """Open VECTOR_SNAPSHOT_PATH-style snapshots, checking them as VECTOR_SNAPSHOT_VERIFY says"""
+    verify = os.getenv("VECTOR_SNAPSHOT_VERIFY", "header").lower()
+    return SnapshotVectorStore(SnapshotVectorIndex(path, verify=verify), embeddings)
+
+
+def import_snapshot(path: str, persist_directory: str, page_size: int = 2000) -> int:
+    """Rebuild a Chroma directory (with its numpy export and question bank) from a snapshot
+
+    The store is built in a fresh staging directory and swapped in like an ingestion run,
+    so it holds exactly the snapshot's chunks and a running server never sees it half-built.
+    """
+    from langchain_community.vectorstores import Chroma
+    from providers import record_embedding_model
+    from vector_index import export_vector_index
+    from question_bank import QUESTION_BANK_FILE
+    from story_focused_processor import StoryFocusedProcessor
+
+    index = SnapshotVectorIndex(path, verify="always")
+    persist_directory = os.path.normpath(persist_directory)
+    StoryFocusedProcessor._remove_stale_directories(persist_directory)
+    staging_directory = f"{persist_directory}.staging-{os.getpid()}-{int(time.time() * 1000)}"
+    vectorstore = Chroma(persist_directory=staging_directory, collection_metadata={"hnsw:space": index.space})
+    collection = vectorstore._collection
+    for offset in range(0, len(index), page_size):
+        end = offset + page_size
+        collection.upsert(
+            ids=index.ids[offset:end],
+            embeddings=np.asarray(index.matrix[offset:end], dtype=np.float32).tolist(),
+            documents=index.documents[offset:end],
+            metadatas=index.metadatas[offset:end]
+        )
+    record_embedding_model(collection, index.embedding_model)
+    vectorstore.persist()
+    export_vector_index(collection, staging_directory, index.embedding_model)
+    if index.extras.get("question_bank"):
+        with open(os.path.join(staging_directory, QUESTION_BANK_FILE), "w", encoding="utf-8") as handle:
+            json.dump(index.extras["question_bank"], handle, ensure_ascii=False)
+    StoryFocusedProcessor._swap_directories(staging_directory, persist_directory)
+    return len(index)
+
+
+def main():
+    """export / import / inspect snapshots"""
+    parser = argparse.ArgumentParser(description="Export the vector store to a single snapshot file, or import one")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="Write a Chroma store to a snapshot file")
+    export_parser.add_argument("output")
+    export_parser.add_argument("--persist-directory", default="./chroma_db_story_focused")
+    export_parser.add_argument("--dtype", choices=SNAPSHOT_DTYPES, default="float32",
+                               help="float16 halves the file; scores move by ~1e-3")
+    import_parser = commands.add_parser("import", help="Rebuild a Chroma store from a snapshot file")
+    import_parser.add_argument("snapshot")
+    import_parser.add_argument("--persist-directory", default="./chroma_db_story_focused")
+    inspect_parser = commands.add_parser("inspect", help="Verify a snapshot's checksums and print its header")
+    inspect_parser.add_argument("snapshot")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        from langchain_community.vectorstores import Chroma
+        from providers import recorded_embedding_model
+        from question_bank import QUESTION_BANK_FILE
+
+        collection = Chroma(persist_directory=args.persist_directory)._collection
+        embedding_model = recorded_embedding_model(collection)
+        if embedding_model is None:
+            raise SystemExit(f"❌ {args.persist_directory} does not record its embedding model, re-run ingestion first")
+        extras = {}
+        bank_path = os.path.join(args.persist_directory, QUESTION_BANK_FILE)
+        if os.path.exists(bank_path):
+            with open(bank_path, encoding="utf-8") as handle:
+                extras["question_bank"] = json.load(handle)
+        header = write_snapshot(collection, args.output, embedding_model, args.dtype, extras)
+        size_mb = os.path.getsize(args.output) / 1e6
+        print(f"📦 Snapshot written to {args.output}: {header['rows']} chunks x {header['dimensions']} "
+              f"{header['dtype']}, {size_mb:.2f} MB ({embedding_model})")
+    elif args.command == "import":
+        count = import_snapshot(args.snapshot, args.persist_directory)
+        print(f"📥 Imported {count} chunks from {args.snapshot} into {args.persist_directory}")
+    else:
+        index = SnapshotVectorIndex(args.snapshot, verify="always")
+        print(json.dumps({**index.header, "extras": sorted(index.extras)}, indent=2))
+        print(f"✅ Checksums OK ({len(index)} chunks)")
+
+
+if __name__ == "__main__":
+    main()
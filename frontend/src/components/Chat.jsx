@@ -13,6 +13,10 @@ const Chat = () => {
   const [connectionStatus, setConnectionStatus] = useState('checking') // 'checking', 'connected', 'disconnected'
   const messagesEndRef = useRef(null)
   const [apiUrl] = useState('http://localhost:8000')
+  // One conversation-memory session per page load
+  const [sessionId] = useState(() =>
+    (window.crypto?.randomUUID?.() ?? `${Date.now()}-${Math.random().toString(36).slice(2)}`)
+  )
 
   // Check backend connection on component mount
   useEffect(() => {
@@ -81,14 +85,15 @@ const Chat = () => {
         throw new Error('Backend server is not running. Please start the backend server on port 8000.')
       }
 
-      const response = await fetch(`${apiUrl}/chat`, {
+      const response = await fetch(`${apiUrl}/chat/stream`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
         },
         body: JSON.stringify({
           query: userMessage.content,
-          language: detectLanguage(userMessage.content)
+          language: detectLanguage(userMessage.content),
+          session_id: sessionId
         }),
       })
 
@@ -97,18 +102,56 @@ const Chat = () => {
         throw new Error(`HTTP ${response.status}: ${errorText}`)
       }
 
-      const data = await response.json()
+      // The answer arrives as Server-Sent Events: context, then tokens, then the final response
+      const messageId = `${Date.now()}-${Math.random().toString(36).slice(2)}`
+      const updateAssistant = (update) =>
+        setMessages(prev => prev.map(message => message.id === messageId ? { ...message, ...update(message) } : message))
 
-      const assistantMessage = {
-        type: 'assistant',
-        content: data.answer,
-        context_chunks: data.context_chunks,
-        confidence_score: data.confidence_score,
-        metadata: data.metadata,
-        timestamp: new Date()
+      const handleEvent = (event, data) => {
+        if (event === 'context') {
+          setMessages(prev => [...prev, {
+            id: messageId,
+            type: 'assistant',
+            content: '',
+            context_chunks: data.context_chunks,
+            metadata: data.metadata,
+            streaming: true,
+            timestamp: new Date()
+          }])
+        } else if (event === 'token') {
+          updateAssistant(message => ({ content: message.content + data.text }))
+        } else if (event === 'done') {
+          updateAssistant(() => ({
+            content: data.answer,
+            context_chunks: data.context_chunks,
+            confidence_score: data.confidence_score,
+            metadata: data.metadata,
+            streaming: false
+          }))
+        } else if (event === 'error') {
+          throw new Error(data.detail)
+        }
       }
 
-      setMessages(prev => [...prev, assistantMessage])
+      const reader = response.body.getReader()
+      const decoder = new TextDecoder()
+      let buffer = ''
+      while (true) {
+        const { value, done } = await reader.read()
+        if (done) break
+        buffer += decoder.decode(value, { stream: true })
+
+        let boundary
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+          const rawEvent = buffer.slice(0, boundary)
+          buffer = buffer.slice(boundary + 2)
+          const event = rawEvent.match(/^event: (.*)$/m)?.[1]
+          const data = rawEvent.match(/^data: (.*)$/m)?.[1]
+          if (event && data) {
+            handleEvent(event, JSON.parse(data))
+          }
+        }
+      }
 
     } catch (error) {
       console.error('Error:', error)
@@ -135,7 +178,8 @@ const Chat = () => {
         timestamp: new Date(),
         isError: true
       }
-      setMessages(prev => [...prev, errorMessage])
+      // Keep any partially streamed answer, but stop treating it as in progress
+      setMessages(prev => [...prev.map(message => message.streaming ? { ...message, streaming: false } : message), errorMessage])
     } finally {
       setIsLoading(false)
     }
@@ -225,8 +269,8 @@ const Chat = () => {
           </div>
         ))}
 
-        {/* Loading indicator */}
-        {isLoading && (
+        {/* Loading indicator (until the answer starts streaming) */}
+        {isLoading && !messages.some(message => message.streaming) && (
           <div className="flex justify-start">
             <div className="max-w-[85%] sm:max-w-[80%] md:max-w-[75%]">
               <div className="bg-white border border-gray-200 rounded-lg px-3 sm:px-4 py-2 sm:py-3">
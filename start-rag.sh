@@ -211,17 +211,24 @@ print_status "Starting backend server..."
 python -m uvicorn main:app --reload --host 0.0.0.0 --port 8000 > server.log 2>&1 &
 BACKEND_PID=$!
 
-# Wait and verify backend startup
+# Wait until the backend reports ready (models loaded and warmed up)
 print_status "Waiting for backend to initialize..."
-sleep 5
+for _ in $(seq 1 60); do
+    if ! kill -0 $BACKEND_PID 2>/dev/null || curl -sf http://localhost:8000/readyz > /dev/null 2>&1; then
+        break
+    fi
+    sleep 1
+done
 
-if kill -0 $BACKEND_PID 2>/dev/null; then
-    print_success "Backend server started (PID: $BACKEND_PID)"
-    print_success "Backend API: http://localhost:8000"
-else
+if ! kill -0 $BACKEND_PID 2>/dev/null; then
     print_error "Backend server failed to start"
     cat server.log
     exit 1
+elif curl -sf http://localhost:8000/readyz > /dev/null 2>&1; then
+    print_success "Backend server started (PID: $BACKEND_PID)"
+    print_success "Backend API: http://localhost:8000"
+else
+    print_warning "Backend server is running but not ready yet (see http://localhost:8000/readyz)"
 fi
 
 # ===== FRONTEND SETUP =====